@@ -18,6 +18,7 @@ CREATE TABLE IF NOT EXISTS `achievement` (
   `AchievementID` int NOT NULL AUTO_INCREMENT,
   `Name` varchar(100) NOT NULL,
   `Description` varchar(255) DEFAULT NULL,
+  `UpdatedAt` timestamp(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
   PRIMARY KEY (`AchievementID`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 
@@ -28,7 +29,9 @@ CREATE TABLE IF NOT EXISTS `game` (
   `Genre` varchar(50) DEFAULT NULL,
   `MaxPlayers` int DEFAULT NULL,
   `ReleaseDate` date DEFAULT NULL,
-  PRIMARY KEY (`GameID`)
+  `UpdatedAt` timestamp(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+  PRIMARY KEY (`GameID`),
+  KEY `idx_game_updatedat` (`UpdatedAt`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 
 -- Item table
@@ -37,7 +40,9 @@ CREATE TABLE IF NOT EXISTS `item` (
   `ItemName` varchar(100) NOT NULL,
   `ItemType` varchar(50) DEFAULT NULL,
   `Rarity` varchar(50) DEFAULT NULL,
-  PRIMARY KEY (`ItemID`)
+  `UpdatedAt` timestamp(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+  PRIMARY KEY (`ItemID`),
+  KEY `idx_item_updatedat` (`UpdatedAt`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 
 -- Player table (with proper foreign key)
@@ -49,10 +54,12 @@ CREATE TABLE IF NOT EXISTS `player` (
   `TotalScore` int DEFAULT '0',
   `Avatar` varchar(100) DEFAULT NULL,
   `RankID` int DEFAULT 1,
+  `UpdatedAt` timestamp(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
   PRIMARY KEY (`PlayerID`),
   UNIQUE KEY `Username` (`Username`),
   UNIQUE KEY `Email` (`Email`),
   KEY `RankID` (`RankID`),
+  KEY `idx_player_updatedat` (`UpdatedAt`),
   CONSTRAINT `player_ibfk_1` FOREIGN KEY (`RankID`) REFERENCES `ranks` (`RankID`) ON DELETE SET NULL
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 
@@ -63,6 +70,7 @@ CREATE TABLE IF NOT EXISTS `level` (
   `LevelNumber` int NOT NULL,
   `Difficulty` varchar(20) DEFAULT NULL,
   `Description` varchar(255) DEFAULT NULL,
+  `UpdatedAt` timestamp(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
   PRIMARY KEY (`LevelID`),
   KEY `GameID` (`GameID`),
   CONSTRAINT `level_ibfk_1` FOREIGN KEY (`GameID`) REFERENCES `game` (`GameID`) ON DELETE CASCADE
@@ -101,6 +109,7 @@ CREATE TABLE IF NOT EXISTS `playeritem` (
   `DateObtained` date DEFAULT NULL,
   `Quantity` int DEFAULT '1',
   PRIMARY KEY (`PlayerItemID`),
+  UNIQUE KEY `uq_playeritem_player_item` (`PlayerID`,`ItemID`),
   KEY `PlayerID` (`PlayerID`),
   KEY `ItemID` (`ItemID`),
   CONSTRAINT `playeritem_ibfk_1` FOREIGN KEY (`PlayerID`) REFERENCES `player` (`PlayerID`) ON DELETE CASCADE,
@@ -121,6 +130,56 @@ CREATE TABLE IF NOT EXISTS `playersession` (
   CONSTRAINT `playersession_ibfk_2` FOREIGN KEY (`PlayerID`) REFERENCES `player` (`PlayerID`) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 
+-- Materialized leaderboard (kept current by the trg_leaderboard_* triggers)
+CREATE TABLE IF NOT EXISTS `leaderboard` (
+  `PlayerID` int NOT NULL,
+  `Username` varchar(50) NOT NULL,
+  `TotalScore` int NOT NULL DEFAULT '0',
+  `RankName` varchar(50) DEFAULT NULL,
+  `AchievementCount` int NOT NULL DEFAULT '0',
+  PRIMARY KEY (`PlayerID`),
+  KEY `idx_leaderboard_score` (`TotalScore` DESC, `PlayerID`),
+  CONSTRAINT `leaderboard_ibfk_1` FOREIGN KEY (`PlayerID`) REFERENCES `player` (`PlayerID`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- Players per leaderboard score (kept current by the trg_leaderboard_player_* triggers),
+-- so fn_leaderboard_position sums one row per distinct score instead of one per player
+CREATE TABLE IF NOT EXISTS `leaderboard_score_counts` (
+  `TotalScore` int NOT NULL,
+  `Players` int NOT NULL DEFAULT '0',
+  PRIMARY KEY (`TotalScore`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- Dashboard counters (kept current by the trg_stats_* triggers)
+CREATE TABLE IF NOT EXISTS `dashboard_stats` (
+  `StatName` varchar(50) NOT NULL,
+  `StatValue` bigint NOT NULL DEFAULT '0',
+  `UpdatedAt` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`StatName`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- Per-day score activity (kept current by trg_stats_session_insert)
+CREATE TABLE IF NOT EXISTS `dashboard_daily` (
+  `StatDate` date NOT NULL,
+  `ScoresSubmitted` int NOT NULL DEFAULT '0',
+  `PointsScored` bigint NOT NULL DEFAULT '0',
+  `UpdatedAt` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`StatDate`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- Per-player session stats (kept current by trg_first_session and the trg_player_stats_* triggers)
+CREATE TABLE IF NOT EXISTS `player_stats` (
+  `PlayerID` int NOT NULL,
+  `SessionCount` int NOT NULL DEFAULT '0',
+  `BestScore` int NOT NULL DEFAULT '0',
+  `LastPlayed` datetime DEFAULT NULL,
+  PRIMARY KEY (`PlayerID`),
+  CONSTRAINT `player_stats_ibfk_1` FOREIGN KEY (`PlayerID`) REFERENCES `player` (`PlayerID`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+INSERT IGNORE INTO dashboard_stats (StatName) VALUES
+('players'), ('games'), ('sessions'), ('active_sessions'), ('items_awarded'), ('achievements_earned');
+
 -- =====================================================
 -- 2. STORED PROCEDURES
 -- =====================================================
@@ -155,25 +214,14 @@ CREATE PROCEDURE sp_award_item(
     IN p_quantity INT
 )
 BEGIN
-    DECLARE existing_quantity INT DEFAULT 0;
-    
-    -- Check if player already has this item
-    SELECT Quantity INTO existing_quantity 
-    FROM playeritem 
-    WHERE PlayerID = p_player_id AND ItemID = p_item_id
-    LIMIT 1;
-    
-    IF existing_quantity > 0 THEN
-        -- Update existing quantity
-        UPDATE playeritem 
-        SET Quantity = Quantity + p_quantity,
-            DateObtained = CURDATE()
-        WHERE PlayerID = p_player_id AND ItemID = p_item_id;
-    ELSE
-        -- Insert new item
-        INSERT INTO playeritem (PlayerID, ItemID, DateObtained, Quantity)
-        VALUES (p_player_id, p_item_id, CURDATE(), p_quantity);
-    END IF;
+    -- Add to the player's stack, or start one; a single statement on the
+    -- uq_playeritem_player_item key (migration 002), so concurrent awards
+    -- cannot create duplicate stacks
+    INSERT INTO playeritem (PlayerID, ItemID, DateObtained, Quantity)
+    VALUES (p_player_id, p_item_id, CURDATE(), p_quantity)
+    ON DUPLICATE KEY UPDATE
+        Quantity = Quantity + VALUES(Quantity),
+        DateObtained = VALUES(DateObtained);
 END$$
 
 -- Procedure 3: Complete multiplayer session
@@ -186,35 +234,123 @@ BEGIN
     SET EndTime = NOW() 
     WHERE SessionID = p_session_id AND EndTime IS NULL;
     
-    -- Update player rankings based on scores
+    -- Update player rankings based on scores (one window pass instead of a
+    -- correlated count per row; ties share a position as before)
     UPDATE playersession ps
-    SET Position = (
-        SELECT COUNT(*) + 1
+    JOIN (
+        SELECT PlayerSessionID,
+               RANK() OVER (ORDER BY Score DESC) AS NewPosition
+        FROM playersession
+        WHERE SessionID = p_session_id
+    ) ranked ON ranked.PlayerSessionID = ps.PlayerSessionID
+    SET ps.Position = ranked.NewPosition;
+END$$
+
+-- Procedure 3b: Complete every open multiplayer session in one transaction
+DROP PROCEDURE IF EXISTS sp_complete_open_sessions$$
+CREATE PROCEDURE sp_complete_open_sessions()
+BEGIN
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        ROLLBACK;
+        DROP TEMPORARY TABLE IF EXISTS tmp_closing_sessions;
+        RESIGNAL;
+    END;
+    
+    START TRANSACTION;
+    
+    DROP TEMPORARY TABLE IF EXISTS tmp_closing_sessions;
+    CREATE TEMPORARY TABLE tmp_closing_sessions (PRIMARY KEY (SessionID))
+        SELECT SessionID FROM multiplayersession WHERE EndTime IS NULL FOR UPDATE;
+    
+    UPDATE multiplayersession m
+    JOIN tmp_closing_sessions c ON c.SessionID = m.SessionID
+    SET m.EndTime = NOW();
+    
+    UPDATE playersession ps
+    JOIN (
+        SELECT ps2.PlayerSessionID,
+               RANK() OVER (PARTITION BY ps2.SessionID ORDER BY ps2.Score DESC) AS NewPosition
         FROM playersession ps2
-        WHERE ps2.SessionID = ps.SessionID 
-        AND ps2.Score > ps.Score
-    )
-    WHERE ps.SessionID = p_session_id;
+        JOIN tmp_closing_sessions c ON c.SessionID = ps2.SessionID
+    ) ranked ON ranked.PlayerSessionID = ps.PlayerSessionID
+    SET ps.Position = ranked.NewPosition;
+    
+    SELECT COUNT(*) AS SessionsClosed FROM tmp_closing_sessions;
+    
+    COMMIT;
+    DROP TEMPORARY TABLE tmp_closing_sessions;
 END$$
 
--- Procedure 4: Get player leaderboard
+-- Procedure 4: Get player leaderboard (top N read straight off idx_leaderboard_score)
 DROP PROCEDURE IF EXISTS sp_get_leaderboard$$
 CREATE PROCEDURE sp_get_leaderboard(
     IN p_limit INT
 )
 BEGIN
+    SELECT 
+        PlayerID,
+        Username,
+        TotalScore,
+        RankName,
+        AchievementCount
+    FROM leaderboard
+    ORDER BY TotalScore DESC, PlayerID
+    LIMIT p_limit;
+END$$
+
+-- Procedure 5: Rebuild the materialized leaderboard from scratch (recovery)
+DROP PROCEDURE IF EXISTS sp_rebuild_leaderboard$$
+CREATE PROCEDURE sp_rebuild_leaderboard()
+BEGIN
+    START TRANSACTION;
+    DELETE FROM leaderboard;
+    INSERT INTO leaderboard (PlayerID, Username, TotalScore, RankName, AchievementCount)
     SELECT 
         p.PlayerID,
         p.Username,
-        p.TotalScore,
+        IFNULL(p.TotalScore, 0),
         r.RankName,
-        COUNT(DISTINCT pa.AchievementID) as AchievementCount
+        COUNT(DISTINCT pa.AchievementID)
     FROM player p
     LEFT JOIN ranks r ON p.RankID = r.RankID
     LEFT JOIN playerachievement pa ON p.PlayerID = pa.PlayerID
-    GROUP BY p.PlayerID, p.Username, p.TotalScore, r.RankName
-    ORDER BY p.TotalScore DESC
-    LIMIT p_limit;
+    GROUP BY p.PlayerID, p.Username, p.TotalScore, r.RankName;
+    DELETE FROM leaderboard_score_counts;
+    INSERT INTO leaderboard_score_counts (TotalScore, Players)
+    SELECT TotalScore, COUNT(*) FROM leaderboard GROUP BY TotalScore;
+    COMMIT;
+END$$
+
+-- Procedure 6: Recount the dashboard totals (backfill / recovery)
+DROP PROCEDURE IF EXISTS sp_refresh_dashboard_stats$$
+CREATE PROCEDURE sp_refresh_dashboard_stats()
+BEGIN
+    START TRANSACTION;
+    UPDATE dashboard_stats SET StatValue = (SELECT COUNT(*) FROM player) WHERE StatName = 'players';
+    UPDATE dashboard_stats SET StatValue = (SELECT COUNT(*) FROM game) WHERE StatName = 'games';
+    UPDATE dashboard_stats SET StatValue = (SELECT COUNT(*) FROM multiplayersession) WHERE StatName = 'sessions';
+    UPDATE dashboard_stats SET StatValue = (SELECT COUNT(*) FROM multiplayersession WHERE EndTime IS NULL)
+    WHERE StatName = 'active_sessions';
+    UPDATE dashboard_stats SET StatValue = (SELECT IFNULL(SUM(Quantity), 0) FROM playeritem)
+    WHERE StatName = 'items_awarded';
+    UPDATE dashboard_stats SET StatValue = (SELECT COUNT(*) FROM playerachievement)
+    WHERE StatName = 'achievements_earned';
+    COMMIT;
+END$$
+
+-- Procedure 7: Recompute player_stats from playersession (backfill / recovery)
+DROP PROCEDURE IF EXISTS sp_rebuild_player_stats$$
+CREATE PROCEDURE sp_rebuild_player_stats()
+BEGIN
+    START TRANSACTION;
+    DELETE FROM player_stats;
+    INSERT INTO player_stats (PlayerID, SessionCount, BestScore, LastPlayed)
+    SELECT ps.PlayerID, COUNT(*), IFNULL(MAX(ps.Score), 0), MAX(m.StartTime)
+    FROM playersession ps
+    JOIN multiplayersession m ON m.SessionID = ps.SessionID
+    GROUP BY ps.PlayerID;
+    COMMIT;
 END$$
 
 -- =====================================================
@@ -298,6 +434,42 @@ BEGIN
     RETURN has_it;
 END$$
 
+-- Function 5: Leaderboard position of a player (1 = top)
+-- Cost: one row of leaderboard_score_counts per distinct score above the player,
+-- plus an idx_leaderboard_score range over the players tied on the same score with
+-- a lower PlayerID. That grows with the number of distinct scores ahead (not with
+-- the number of players ahead), so it is cheap when scores repeat but is not a
+-- constant-time lookup.
+DROP FUNCTION IF EXISTS fn_leaderboard_position$$
+CREATE FUNCTION fn_leaderboard_position(p_player_id INT)
+RETURNS INT
+DETERMINISTIC
+READS SQL DATA
+BEGIN
+    DECLARE player_score INT;
+    DECLARE higher INT;
+    DECLARE tied_ahead INT;
+    
+    SELECT TotalScore INTO player_score
+    FROM leaderboard
+    WHERE PlayerID = p_player_id;
+    
+    IF player_score IS NULL THEN
+        RETURN NULL;
+    END IF;
+    
+    -- Same ordering as sp_get_leaderboard: score desc, then PlayerID
+    SELECT IFNULL(SUM(Players), 0) INTO higher
+    FROM leaderboard_score_counts
+    WHERE TotalScore > player_score;
+    
+    SELECT COUNT(*) INTO tied_ahead
+    FROM leaderboard
+    WHERE TotalScore = player_score AND PlayerID < p_player_id;
+    
+    RETURN higher + tied_ahead + 1;
+END$$
+
 -- =====================================================
 -- 4. TRIGGERS
 -- =====================================================
@@ -314,6 +486,16 @@ BEGIN
         SET TotalScore = TotalScore + (NEW.Score - OLD.Score)
         WHERE PlayerID = NEW.PlayerID;
         
+        -- Keep the best score current; only lowering the best one needs a rescan
+        UPDATE player_stats
+        SET BestScore = IF(
+            NEW.Score >= BestScore,
+            NEW.Score,
+            IF(OLD.Score >= BestScore,
+               (SELECT IFNULL(MAX(Score), 0) FROM playersession WHERE PlayerID = NEW.PlayerID),
+               BestScore))
+        WHERE PlayerID = NEW.PlayerID;
+        
         -- Award Sharp Shooter achievement for high score
         IF NEW.Score > 700 AND NOT fn_has_achievement(NEW.PlayerID, 2) THEN
             INSERT INTO playerachievement (PlayerID, AchievementID, DateEarned)
@@ -323,14 +505,19 @@ BEGIN
 END$$
 
 -- Trigger 2: Auto-update player rank based on total score
+-- (BEFORE UPDATE, so the rank is set on the row being written: one write, and
+-- no second UPDATE of player from inside a player trigger)
 DROP TRIGGER IF EXISTS trg_auto_rank_update$$
 CREATE TRIGGER trg_auto_rank_update 
-AFTER UPDATE ON player 
+BEFORE UPDATE ON player 
 FOR EACH ROW
 BEGIN
     DECLARE new_rank_id INT;
     
-    IF OLD.TotalScore <> NEW.TotalScore THEN
+    -- Callers that already resolved the rank skip the lookup: scores.adjust_scores
+    -- sets @rank_resolved around its updates, and any update that changes RankID
+    -- itself keeps the rank it wrote
+    IF OLD.TotalScore <> NEW.TotalScore AND @rank_resolved IS NULL AND NEW.RankID <=> OLD.RankID THEN
         -- Determine new rank
         SELECT RankID INTO new_rank_id
         FROM ranks
@@ -338,16 +525,15 @@ BEGIN
         ORDER BY RankScore DESC
         LIMIT 1;
         
-        -- Update rank if changed
-        IF new_rank_id IS NOT NULL AND new_rank_id <> NEW.RankID THEN
-            UPDATE player
-            SET RankID = new_rank_id
-            WHERE PlayerID = NEW.PlayerID;
+        IF new_rank_id IS NOT NULL THEN
+            SET NEW.RankID = new_rank_id;
         END IF;
     END IF;
 END$$
 
 -- Trigger 3: Award First Blood achievement on first session
+-- (player_stats is bumped here, so the session count is a primary-key read
+-- instead of a COUNT(*) over the player's whole history)
 DROP TRIGGER IF EXISTS trg_first_session$$
 CREATE TRIGGER trg_first_session 
 AFTER INSERT ON playersession 
@@ -355,8 +541,20 @@ FOR EACH ROW
 BEGIN
     DECLARE session_count INT;
     
-    SELECT COUNT(*) INTO session_count
-    FROM playersession
+    INSERT INTO player_stats (PlayerID, SessionCount, BestScore, LastPlayed)
+    VALUES (
+        NEW.PlayerID,
+        1,
+        IFNULL(NEW.Score, 0),
+        (SELECT StartTime FROM multiplayersession WHERE SessionID = NEW.SessionID)
+    )
+    ON DUPLICATE KEY UPDATE
+        SessionCount = SessionCount + 1,
+        BestScore = GREATEST(BestScore, VALUES(BestScore)),
+        LastPlayed = IF(LastPlayed IS NULL OR VALUES(LastPlayed) > LastPlayed, VALUES(LastPlayed), LastPlayed);
+    
+    SELECT SessionCount INTO session_count
+    FROM player_stats
     WHERE PlayerID = NEW.PlayerID;
     
     -- Award First Blood on first session with score > 0
@@ -383,6 +581,314 @@ BEGIN
     END IF;
 END$$
 
+-- Same limits when an existing stack grows (sp_award_item / inventory.award_items upserts)
+DROP TRIGGER IF EXISTS trg_validate_item_quantity_update$$
+CREATE TRIGGER trg_validate_item_quantity_update 
+BEFORE UPDATE ON playeritem 
+FOR EACH ROW
+BEGIN
+    IF NEW.Quantity < 1 THEN
+        SIGNAL SQLSTATE '45000' 
+        SET MESSAGE_TEXT = 'Item quantity must be at least 1';
+    END IF;
+    
+    IF NEW.Quantity > 999 THEN
+        SIGNAL SQLSTATE '45000' 
+        SET MESSAGE_TEXT = 'Item quantity cannot exceed 999';
+    END IF;
+END$$
+
+-- Triggers 5-12: Keep the materialized leaderboard in step with player,
+-- playerachievement and ranks (player deletes cascade through the foreign key)
+DROP TRIGGER IF EXISTS trg_leaderboard_player_insert$$
+CREATE TRIGGER trg_leaderboard_player_insert 
+AFTER INSERT ON player 
+FOR EACH ROW
+BEGIN
+    INSERT INTO leaderboard (PlayerID, Username, TotalScore, RankName, AchievementCount)
+    VALUES (
+        NEW.PlayerID,
+        NEW.Username,
+        IFNULL(NEW.TotalScore, 0),
+        (SELECT RankName FROM ranks WHERE RankID = NEW.RankID),
+        0
+    );
+    INSERT INTO leaderboard_score_counts (TotalScore, Players)
+    VALUES (IFNULL(NEW.TotalScore, 0), 1)
+    ON DUPLICATE KEY UPDATE Players = Players + 1;
+END$$
+
+DROP TRIGGER IF EXISTS trg_leaderboard_player_update$$
+CREATE TRIGGER trg_leaderboard_player_update 
+AFTER UPDATE ON player 
+FOR EACH ROW
+BEGIN
+    IF NOT (OLD.Username <=> NEW.Username)
+       OR NOT (OLD.TotalScore <=> NEW.TotalScore)
+       OR NOT (OLD.RankID <=> NEW.RankID) THEN
+        UPDATE leaderboard
+        SET Username = NEW.Username,
+            TotalScore = IFNULL(NEW.TotalScore, 0),
+            RankName = (SELECT RankName FROM ranks WHERE RankID = NEW.RankID)
+        WHERE PlayerID = NEW.PlayerID;
+    END IF;
+    IF IFNULL(OLD.TotalScore, 0) <> IFNULL(NEW.TotalScore, 0) THEN
+        UPDATE leaderboard_score_counts SET Players = Players - 1 WHERE TotalScore = IFNULL(OLD.TotalScore, 0);
+        INSERT INTO leaderboard_score_counts (TotalScore, Players)
+        VALUES (IFNULL(NEW.TotalScore, 0), 1)
+        ON DUPLICATE KEY UPDATE Players = Players + 1;
+    END IF;
+END$$
+
+-- The leaderboard row goes with the player through ON DELETE CASCADE, which fires no triggers
+DROP TRIGGER IF EXISTS trg_leaderboard_player_delete$$
+CREATE TRIGGER trg_leaderboard_player_delete 
+BEFORE DELETE ON player 
+FOR EACH ROW
+BEGIN
+    UPDATE leaderboard_score_counts SET Players = Players - 1 WHERE TotalScore = IFNULL(OLD.TotalScore, 0);
+END$$
+
+DROP TRIGGER IF EXISTS trg_leaderboard_achievement_insert$$
+CREATE TRIGGER trg_leaderboard_achievement_insert 
+AFTER INSERT ON playerachievement 
+FOR EACH ROW
+BEGIN
+    UPDATE leaderboard
+    SET AchievementCount = AchievementCount + 1
+    WHERE PlayerID = NEW.PlayerID;
+END$$
+
+DROP TRIGGER IF EXISTS trg_leaderboard_achievement_delete$$
+CREATE TRIGGER trg_leaderboard_achievement_delete 
+AFTER DELETE ON playerachievement 
+FOR EACH ROW
+BEGIN
+    UPDATE leaderboard
+    SET AchievementCount = AchievementCount - 1
+    WHERE PlayerID = OLD.PlayerID;
+END$$
+
+-- Cascaded deletes do not fire triggers, so account for them before the achievement goes
+DROP TRIGGER IF EXISTS trg_leaderboard_achievement_removed$$
+CREATE TRIGGER trg_leaderboard_achievement_removed 
+BEFORE DELETE ON achievement 
+FOR EACH ROW
+BEGIN
+    UPDATE leaderboard l
+    JOIN playerachievement pa ON pa.PlayerID = l.PlayerID
+    SET l.AchievementCount = l.AchievementCount - 1
+    WHERE pa.AchievementID = OLD.AchievementID;
+END$$
+
+DROP TRIGGER IF EXISTS trg_leaderboard_rank_update$$
+CREATE TRIGGER trg_leaderboard_rank_update 
+AFTER UPDATE ON ranks 
+FOR EACH ROW
+BEGIN
+    IF NOT (OLD.RankName <=> NEW.RankName) THEN
+        UPDATE leaderboard l
+        JOIN player p ON p.PlayerID = l.PlayerID
+        SET l.RankName = NEW.RankName
+        WHERE p.RankID = NEW.RankID;
+    END IF;
+END$$
+
+DROP TRIGGER IF EXISTS trg_leaderboard_rank_delete$$
+CREATE TRIGGER trg_leaderboard_rank_delete 
+BEFORE DELETE ON ranks 
+FOR EACH ROW
+BEGIN
+    UPDATE leaderboard l
+    JOIN player p ON p.PlayerID = l.PlayerID
+    SET l.RankName = NULL
+    WHERE p.RankID = OLD.RankID;
+END$$
+
+-- Triggers 13+: Keep dashboard_stats / dashboard_daily current. Rows removed by
+-- ON DELETE CASCADE do not fire triggers, so parent deletes subtract their children first.
+DROP TRIGGER IF EXISTS trg_stats_player_insert$$
+CREATE TRIGGER trg_stats_player_insert AFTER INSERT ON player FOR EACH ROW
+    UPDATE dashboard_stats SET StatValue = StatValue + 1 WHERE StatName = 'players'$$
+
+DROP TRIGGER IF EXISTS trg_stats_player_delete$$
+CREATE TRIGGER trg_stats_player_delete BEFORE DELETE ON player FOR EACH ROW
+BEGIN
+    UPDATE dashboard_stats SET StatValue = StatValue - 1 WHERE StatName = 'players';
+    UPDATE dashboard_stats
+    SET StatValue = StatValue - (SELECT IFNULL(SUM(Quantity), 0) FROM playeritem WHERE PlayerID = OLD.PlayerID)
+    WHERE StatName = 'items_awarded';
+    UPDATE dashboard_stats
+    SET StatValue = StatValue - (SELECT COUNT(*) FROM playerachievement WHERE PlayerID = OLD.PlayerID)
+    WHERE StatName = 'achievements_earned';
+END$$
+
+DROP TRIGGER IF EXISTS trg_stats_game_insert$$
+CREATE TRIGGER trg_stats_game_insert AFTER INSERT ON game FOR EACH ROW
+    UPDATE dashboard_stats SET StatValue = StatValue + 1 WHERE StatName = 'games'$$
+
+DROP TRIGGER IF EXISTS trg_stats_game_delete$$
+CREATE TRIGGER trg_stats_game_delete BEFORE DELETE ON game FOR EACH ROW
+BEGIN
+    UPDATE dashboard_stats SET StatValue = StatValue - 1 WHERE StatName = 'games';
+    UPDATE dashboard_stats
+    SET StatValue = StatValue - (SELECT COUNT(*) FROM multiplayersession WHERE GameID = OLD.GameID)
+    WHERE StatName = 'sessions';
+    UPDATE dashboard_stats
+    SET StatValue = StatValue - (SELECT COUNT(*) FROM multiplayersession WHERE GameID = OLD.GameID AND EndTime IS NULL)
+    WHERE StatName = 'active_sessions';
+END$$
+
+DROP TRIGGER IF EXISTS trg_stats_session_open$$
+CREATE TRIGGER trg_stats_session_open AFTER INSERT ON multiplayersession FOR EACH ROW
+BEGIN
+    UPDATE dashboard_stats SET StatValue = StatValue + 1 WHERE StatName = 'sessions';
+    IF NEW.EndTime IS NULL THEN
+        UPDATE dashboard_stats SET StatValue = StatValue + 1 WHERE StatName = 'active_sessions';
+    END IF;
+END$$
+
+DROP TRIGGER IF EXISTS trg_stats_session_close$$
+CREATE TRIGGER trg_stats_session_close AFTER UPDATE ON multiplayersession FOR EACH ROW
+BEGIN
+    IF OLD.EndTime IS NULL AND NEW.EndTime IS NOT NULL THEN
+        UPDATE dashboard_stats SET StatValue = StatValue - 1 WHERE StatName = 'active_sessions';
+    ELSEIF OLD.EndTime IS NOT NULL AND NEW.EndTime IS NULL THEN
+        UPDATE dashboard_stats SET StatValue = StatValue + 1 WHERE StatName = 'active_sessions';
+    END IF;
+END$$
+
+DROP TRIGGER IF EXISTS trg_stats_session_delete$$
+CREATE TRIGGER trg_stats_session_delete AFTER DELETE ON multiplayersession FOR EACH ROW
+BEGIN
+    UPDATE dashboard_stats SET StatValue = StatValue - 1 WHERE StatName = 'sessions';
+    IF OLD.EndTime IS NULL THEN
+        UPDATE dashboard_stats SET StatValue = StatValue - 1 WHERE StatName = 'active_sessions';
+    END IF;
+END$$
+
+DROP TRIGGER IF EXISTS trg_stats_item_insert$$
+CREATE TRIGGER trg_stats_item_insert AFTER INSERT ON playeritem FOR EACH ROW
+    UPDATE dashboard_stats SET StatValue = StatValue + IFNULL(NEW.Quantity, 0) WHERE StatName = 'items_awarded'$$
+
+DROP TRIGGER IF EXISTS trg_stats_item_update$$
+CREATE TRIGGER trg_stats_item_update AFTER UPDATE ON playeritem FOR EACH ROW
+    UPDATE dashboard_stats
+    SET StatValue = StatValue + IFNULL(NEW.Quantity, 0) - IFNULL(OLD.Quantity, 0)
+    WHERE StatName = 'items_awarded'$$
+
+DROP TRIGGER IF EXISTS trg_stats_item_delete$$
+CREATE TRIGGER trg_stats_item_delete AFTER DELETE ON playeritem FOR EACH ROW
+    UPDATE dashboard_stats SET StatValue = StatValue - IFNULL(OLD.Quantity, 0) WHERE StatName = 'items_awarded'$$
+
+DROP TRIGGER IF EXISTS trg_stats_item_removed$$
+CREATE TRIGGER trg_stats_item_removed BEFORE DELETE ON item FOR EACH ROW
+    UPDATE dashboard_stats
+    SET StatValue = StatValue - (SELECT IFNULL(SUM(Quantity), 0) FROM playeritem WHERE ItemID = OLD.ItemID)
+    WHERE StatName = 'items_awarded'$$
+
+DROP TRIGGER IF EXISTS trg_stats_achievement_insert$$
+CREATE TRIGGER trg_stats_achievement_insert AFTER INSERT ON playerachievement FOR EACH ROW
+    UPDATE dashboard_stats SET StatValue = StatValue + 1 WHERE StatName = 'achievements_earned'$$
+
+DROP TRIGGER IF EXISTS trg_stats_achievement_delete$$
+CREATE TRIGGER trg_stats_achievement_delete AFTER DELETE ON playerachievement FOR EACH ROW
+    UPDATE dashboard_stats SET StatValue = StatValue - 1 WHERE StatName = 'achievements_earned'$$
+
+DROP TRIGGER IF EXISTS trg_stats_achievement_removed$$
+CREATE TRIGGER trg_stats_achievement_removed BEFORE DELETE ON achievement FOR EACH ROW
+    UPDATE dashboard_stats
+    SET StatValue = StatValue - (SELECT COUNT(*) FROM playerachievement WHERE AchievementID = OLD.AchievementID)
+    WHERE StatName = 'achievements_earned'$$
+
+DROP TRIGGER IF EXISTS trg_stats_session_insert$$
+CREATE TRIGGER trg_stats_session_insert AFTER INSERT ON playersession FOR EACH ROW
+    INSERT INTO dashboard_daily (StatDate, ScoresSubmitted, PointsScored)
+    VALUES (CURDATE(), 1, IFNULL(NEW.Score, 0))
+    ON DUPLICATE KEY UPDATE
+        ScoresSubmitted = ScoresSubmitted + 1,
+        PointsScored = PointsScored + IFNULL(NEW.Score, 0)$$
+
+-- Player stats on removal. Best score and last played are only rescanned when
+-- the removed row could have been the one holding them.
+DROP TRIGGER IF EXISTS trg_player_stats_session_delete$$
+CREATE TRIGGER trg_player_stats_session_delete 
+AFTER DELETE ON playersession 
+FOR EACH ROW
+BEGIN
+    DECLARE removed_start DATETIME;
+    
+    SELECT StartTime INTO removed_start FROM multiplayersession WHERE SessionID = OLD.SessionID;
+    
+    UPDATE player_stats
+    SET SessionCount = SessionCount - 1,
+        BestScore = IF(IFNULL(OLD.Score, 0) >= BestScore,
+                       (SELECT IFNULL(MAX(Score), 0) FROM playersession WHERE PlayerID = OLD.PlayerID),
+                       BestScore),
+        LastPlayed = IF(removed_start IS NULL OR removed_start >= LastPlayed,
+                        (SELECT MAX(m.StartTime)
+                         FROM playersession ps
+                         JOIN multiplayersession m ON m.SessionID = ps.SessionID
+                         WHERE ps.PlayerID = OLD.PlayerID),
+                        LastPlayed)
+    WHERE PlayerID = OLD.PlayerID;
+END$$
+
+-- Session and game deletes cascade to playersession without firing its
+-- triggers, so recount the affected players before the rows go
+DROP TRIGGER IF EXISTS trg_player_stats_session_removed$$
+CREATE TRIGGER trg_player_stats_session_removed 
+BEFORE DELETE ON multiplayersession 
+FOR EACH ROW
+BEGIN
+    UPDATE player_stats s
+    JOIN (SELECT DISTINCT PlayerID FROM playersession WHERE SessionID = OLD.SessionID) affected
+      ON affected.PlayerID = s.PlayerID
+    LEFT JOIN (
+        SELECT ps.PlayerID, COUNT(*) AS SessionCount, IFNULL(MAX(ps.Score), 0) AS BestScore,
+               MAX(m.StartTime) AS LastPlayed
+        FROM playersession ps
+        JOIN multiplayersession m ON m.SessionID = ps.SessionID
+        WHERE ps.SessionID <> OLD.SessionID
+          AND ps.PlayerID IN (SELECT PlayerID FROM playersession WHERE SessionID = OLD.SessionID)
+        GROUP BY ps.PlayerID
+    ) remaining ON remaining.PlayerID = s.PlayerID
+    SET s.SessionCount = IFNULL(remaining.SessionCount, 0),
+        s.BestScore = IFNULL(remaining.BestScore, 0),
+        s.LastPlayed = remaining.LastPlayed;
+END$$
+
+DROP TRIGGER IF EXISTS trg_player_stats_game_removed$$
+CREATE TRIGGER trg_player_stats_game_removed 
+BEFORE DELETE ON game 
+FOR EACH ROW
+BEGIN
+    UPDATE player_stats s
+    JOIN (
+        SELECT DISTINCT ps.PlayerID
+        FROM playersession ps
+        JOIN multiplayersession m ON m.SessionID = ps.SessionID
+        WHERE m.GameID = OLD.GameID
+    ) affected ON affected.PlayerID = s.PlayerID
+    LEFT JOIN (
+        SELECT ps.PlayerID, COUNT(*) AS SessionCount, IFNULL(MAX(ps.Score), 0) AS BestScore,
+               MAX(m.StartTime) AS LastPlayed
+        FROM playersession ps
+        JOIN multiplayersession m ON m.SessionID = ps.SessionID
+        WHERE m.GameID <> OLD.GameID
+          AND ps.PlayerID IN (
+              SELECT ps2.PlayerID
+              FROM playersession ps2
+              JOIN multiplayersession m2 ON m2.SessionID = ps2.SessionID
+              WHERE m2.GameID = OLD.GameID
+          )
+        GROUP BY ps.PlayerID
+    ) remaining ON remaining.PlayerID = s.PlayerID
+    SET s.SessionCount = IFNULL(remaining.SessionCount, 0),
+        s.BestScore = IFNULL(remaining.BestScore, 0),
+        s.LastPlayed = remaining.LastPlayed;
+END$$
+
 DELIMITER ;
 
 -- =====================================================
@@ -395,19 +901,28 @@ INSERT IGNORE INTO ranks VALUES
 (3,'Gold',5000),
 (4,'Platinum',10000);
 
-INSERT IGNORE INTO achievement VALUES 
+INSERT IGNORE INTO achievement (AchievementID, Name, Description) VALUES 
 (1,'First Blood','Scored first kill in a match'),
 (2,'Sharp Shooter','Achieved 80% hit accuracy'),
 (3,'Level Master','Completed all levels of a game');
 
-INSERT IGNORE INTO game VALUES 
+INSERT IGNORE INTO game (GameID, Title, Genre, MaxPlayers, ReleaseDate) VALUES 
 (1,'Space Invaders','Arcade',2,'2020-05-10'),
 (2,'PacMan Adventures','Arcade',4,'2021-08-15'),
 (3,'Battle Arena','Action',10,'2022-11-20');
 
-INSERT IGNORE INTO item VALUES 
+INSERT IGNORE INTO item (ItemID, ItemName, ItemType, Rarity) VALUES 
 (1,'Excalibur Sword','Weapon','Mythic'),
 (2,'Healing Potion','Consumable','Common'),
 (3,'Phoenix Shield','Armor','Epic'),
 (4,'Invisibility Cloak','Accessory','Rare'),
 (5,'Magic Ring','Accessory','Uncommon');
+
+-- Backfill the leaderboard for players that existed before it was added
+CALL sp_rebuild_leaderboard();
+
+-- Backfill the dashboard counters
+CALL sp_refresh_dashboard_stats();
+
+-- Backfill per-player session stats
+CALL sp_rebuild_player_stats();
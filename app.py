@@ -1,9 +1,35 @@
+import os
+import time
+import uuid
 import streamlit as st
-import mysql.connector
 from mysql.connector import Error
 import pandas as pd
 from datetime import datetime, date
-conn=None
+import db
+import bulk_import
+import bulk_export
+import leaderboard
+import sessions as session_ops
+import inventory
+import player_stats
+import scores
+import dashboard
+import query_stats
+import queries
+import profiles
+import records
+import lookups
+import custom_query as custom_queries
+
+# Per-page timing (DB queries, health-check pings and reconnects)
+page_start = time.perf_counter()
+db.reset_timing()
+
+# Read-your-writes: after this browser session writes, its reads avoid replicas that lack the write
+if "db_session" not in st.session_state:
+    st.session_state.db_session = uuid.uuid4().hex
+db.set_session(st.session_state.db_session)
+
 # Page configuration
 st.set_page_config(
     page_title="Arcade Database Management System",
@@ -11,24 +37,6 @@ st.set_page_config(
     layout="wide"
 )
 
-# Database conn function
-@st.cache_resource
-def get_connection():
-    try:
-        conn = mysql.connector.connect(
-            host='localhost',
-            database='mini_project_25',
-            user='root',
-            password='password'  # Update with your MySQL password
-        )
-        if conn.is_connected():
-            return conn
-    except Error as e:
-        st.error(f"Error connecting to MySQL: {e}")
-        return None
-# Initialize connection
-conn = get_connection()
-
 # Custom CSS
 st.markdown("""
     <style>
@@ -57,42 +65,16 @@ menu = st.sidebar.radio(
         "🏠 Home", "➕ Create", "📖 Read",
         "✏️ Update", "🗑️ Delete",
         "🔍 Advanced Queries",
-        "⚡ Triggers, Functions & Procedures"
+        "⚡ Triggers, Functions & Procedures",
+        "📈 Performance"
     ]
 )
 
 # Helper function
-def execute_query(query, params=None, fetch=False):
-    global conn
+def execute_query(query, params=None, fetch=False, use_cache=True):
+    # Each call checks out its own pooled connection; reads may come from the result cache
     try:
-        # Ensure conn exists or reconnect
-        if conn is None or not conn.is_connected():
-            conn = get_connection()
-            if conn is None or not conn.is_connected():
-                st.error("❌ Could not connect to MySQL database.")
-                return None
-
-        # Attempt to keep alive
-        conn.ping(reconnect=True, attempts=3, delay=2)
-
-        cursor = conn.cursor()
-
-        if params:
-            cursor.execute(query, params)
-        else:
-            cursor.execute(query)
-
-        # FETCH (for SELECT queries)
-        if fetch:
-            result = cursor.fetchall()
-            columns = [desc[0] for desc in cursor.description]
-            cursor.close()
-            return pd.DataFrame(result, columns=columns)
-        else:
-            # Non-select queries (INSERT, UPDATE, DELETE)
-            conn.commit()
-            cursor.close()
-            return True
+        return db.execute_query(query, params, fetch, use_cache)
 
     except Error as e:
         st.error(f"Database Error: {e}")
@@ -102,13 +84,163 @@ def execute_query(query, params=None, fetch=False):
         st.error(f"Unexpected Error: {e}")
         return None
 
-    finally:
-        # Safe close even if cursor was never assigned
+# Streamed results: show at most this many rows, but count them all
+DISPLAY_ROW_LIMIT = 5000
+# Exports larger than this are left on disk instead of offered as a download
+EXPORT_DOWNLOAD_LIMIT = 200 * 1024 * 1024
+
+
+def stream_to_dataframe(query, params=None, limit=DISPLAY_ROW_LIMIT):
+    # Consumes db.stream_query chunk by chunk; only the displayed rows are kept
+    shown, kept, total = [], 0, 0
+    try:
+        for chunk in db.stream_query(query, params):
+            total += len(chunk)
+            if kept < limit or not shown:
+                shown.append(chunk.head(limit - kept))
+                kept += len(shown[-1])
+    except Error as e:
+        st.error(f"Database Error: {e}")
+        return None, 0
+    return pd.concat(shown, ignore_index=True), total
+
+
+def show_streamed(df, total, limit=DISPLAY_ROW_LIMIT):
+    st.dataframe(df, use_container_width=True)
+    if total > limit:
+        st.caption(f"Showing the first {limit} of {total} rows.")
+
+
+def pick_record(kind, page):
+    # One record by ID or name search. The version it was loaded at is kept across
+    # reruns, so a save only goes through if nobody changed the record since.
+    _, key, name, _ = records.RECORDS[kind]
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        record_id = int(st.number_input(f"{kind} ID", min_value=1, step=1, key=f"{page}_{kind}_id"))
+    if name is not None:
+        with col2:
+            term = st.text_input(f"...or search by {name}", key=f"{page}_{kind}_search")
+        if term:
+            try:
+                matches = records.search(kind, term)
+            except Error as e:
+                st.error(f"Database Error: {e}")
+                return None
+            if matches.empty:
+                st.info(f"ℹ️ No {kind.lower()} starts with '{term}'.")
+            else:
+                labels = dict(zip(matches[key].tolist(), matches[name].tolist()))
+                record_id = st.selectbox("Matches", list(labels), format_func=lambda i: f"{labels[i]} (#{i})",
+                                         key=f"{page}_{kind}_match")
+
+    state_key = f"{page}_{kind}_record"
+    loaded = st.session_state.get(state_key)
+    reload = st.button("🔄 Reload", key=f"{page}_{kind}_reload")
+    if reload or loaded is None or loaded[key] != record_id:
         try:
-            if "cursor" in locals() and cursor:
-                cursor.close()
-        except:
-            pass
+            loaded = records.fetch(kind, record_id)
+        except Error as e:
+            st.error(f"Database Error: {e}")
+            return None
+        st.session_state[state_key] = loaded
+    if loaded is None:
+        st.warning(f"⚠️ No {kind.lower()} with ID {record_id}.")
+        return None
+    st.dataframe(pd.DataFrame([loaded]), use_container_width=True)
+    return loaded
+
+
+def save_record(kind, record, values, page):
+    # Only the fields that differ from the loaded record are written
+    key = records.RECORDS[kind][1]
+    changes = {
+        column: value for column, value in values.items()
+        if value != record[column] and not (value in ("", None) and record[column] in ("", None))
+    }
+    if not changes:
+        st.warning("⚠️ No changes specified!")
+        return
+    try:
+        records.update(kind, record[key], changes, record["UpdatedAt"])
+        st.success(f"✅ {kind} ID {record[key]} updated successfully!")
+    except records.StaleRecordError as e:
+        st.error(f"❌ {e} Check the current values and try again.")
+    except Error as e:
+        st.error(f"Database Error: {e}")
+    # Either way the next run shows the record as it is now
+    st.session_state.pop(f"{page}_{kind}_record", None)
+
+
+def lookup_ids(lookup):
+    # Selectbox options from the shared ID <-> name maps (label them with lookup.name_for)
+    try:
+        return lookup.ids()
+    except Error as e:
+        st.error(f"Database Error: {e}")
+        return None
+
+
+def choice_index(options, current):
+    # Selectbox options with the stored value first if it is not one of the usual ones
+    if current and current not in options:
+        options = [current] + options
+    return options, options.index(current) if current in options else 0
+
+
+# Sidebar cache and pool metrics
+with st.sidebar.expander("🗄️ Query Cache"):
+    cache_stats = db.cache.stats()
+    st.metric("Hit Rate", f"{cache_stats['hit_rate']:.0%}")
+    st.caption(
+        f"Hits: {cache_stats['hits']} · Misses: {cache_stats['misses']} · "
+        f"Entries: {cache_stats['entries']} / {cache_stats['max_entries']} · "
+        f"Evictions: {cache_stats['evictions']} · Invalidations: {cache_stats['invalidations']} · "
+        f"TTL: {cache_stats['ttl']:.0f}s"
+    )
+    st.caption("Lookups: " + " · ".join(
+        f"{table} {info['entries']} ({info['loads']} loads, {info['refreshes']} refreshes)"
+        for table, info in lookups.stats().items()
+    ))
+    if st.button("Clear Cache"):
+        db.cache.clear()
+        st.rerun()
+
+
+with st.sidebar.expander("🔌 Connection Pool"):
+    pool_stats = db.get_pool().stats()
+    st.metric("In Use", f"{pool_stats['in_use']} / {pool_stats['size']}")
+    st.metric("Saturation", f"{pool_stats['saturation']:.0%}")
+    st.caption(
+        f"Checkouts: {pool_stats['checkouts']} · "
+        f"Avg wait: {pool_stats['avg_wait_ms']:.1f} ms · "
+        f"Max wait: {pool_stats['max_wait_ms']:.1f} ms · "
+        f"Timeouts: {pool_stats['timeouts']} · "
+        f"Pings: {pool_stats['pings']} ({pool_stats['ping_failures']} failed) · "
+        f"Reconnects: {pool_stats['reconnects']}"
+    )
+    st.metric("Prepared Reuse", f"{pool_stats['stmt_reuse_rate']:.0%}")
+    st.caption(
+        f"Prepares: {pool_stats['stmt_prepares']} · Reuses: {pool_stats['stmt_reuses']} · "
+        f"Evictions: {pool_stats['stmt_evictions']} · Cache per connection: {db.STATEMENT_CACHE_SIZE}"
+    )
+
+routing = db.routing_stats()
+if routing is not None:
+    with st.sidebar.expander("🔀 Read Replicas"):
+        total_reads = routing["replica_reads"] + routing["sticky_reads"] + routing["fallback_reads"]
+        st.metric("Reads on Replicas", f"{routing['replica_reads'] / total_reads:.0%}" if total_reads else "—")
+        st.caption(
+            f"Replica: {routing['replica_reads']} · Read-your-writes on primary: {routing['sticky_reads']} · "
+            f"Fallback to primary: {routing['fallback_reads']} · Primary only (CALL, locking): "
+            f"{routing['primary_reads']}"
+        )
+        for replica in routing["replicas"]:
+            lag = "not replicating" if replica["lag"] is None else f"{replica['lag']:.0f}s behind"
+            st.caption(
+                f"{'🟢' if replica['up'] else '🔴'} {replica['endpoint']}: {lag} · "
+                f"{replica['reads']} reads · {replica['failures']} failures · {replica['pool_in_use']} in use"
+            )
 
 # HOME PAGE
 if menu == "🏠 Home":
@@ -118,11 +250,23 @@ if menu == "🏠 Home":
     
     with col1:
         st.info("### 📊 Database Statistics")
-        if conn:
-            players = execute_query("SELECT COUNT(*) as count FROM player", fetch=True)
-            games = execute_query("SELECT COUNT(*) as count FROM game", fetch=True)
-            st.metric("Total Players", players['count'].iloc[0] if players is not None else 0)
-            st.metric("Total Games", games['count'].iloc[0] if games is not None else 0)
+        # One round trip to the trigger-maintained counters
+        try:
+            stats, updated_at = dashboard.get_stats()
+        except Error as e:
+            st.error(f"Database Error: {e}")
+            stats, updated_at = dict.fromkeys(dashboard.STAT_NAMES, 0), None
+        m1, m2 = st.columns(2)
+        m1.metric("Total Players", stats["players"])
+        m2.metric("Total Games", stats["games"])
+        m1.metric("Sessions", stats["sessions"])
+        m2.metric("Active Sessions", stats["active_sessions"])
+        m1.metric("Items Awarded", stats["items_awarded"])
+        m2.metric("Achievements Earned", stats["achievements_earned"])
+        m1.metric("Scores Today", stats["scores_today"])
+        m2.metric("Points Today", stats["points_today"])
+        if updated_at is not None:
+            st.caption(f"Last change: {updated_at}")
     
     with col2:
         st.success("### 🎯 Features")
@@ -144,7 +288,7 @@ if menu == "🏠 Home":
 elif menu == "➕ Create":
     st.markdown('<h2 class="section-header">Create New Records</h2>', unsafe_allow_html=True)
     
-    create_table = st.selectbox("Select Table", ["Player", "Game", "Achievement", "Item", "Level", "Multiplayer Session", "Rank"])
+    create_table = st.selectbox("Select Table", ["Player", "Game", "Achievement", "Item", "Level", "Multiplayer Session", "Rank", "📦 Bulk Import"])
     
     if create_table == "Player":
         with st.form("create_player"):
@@ -164,9 +308,7 @@ elif menu == "➕ Create":
                 if username and email:
                     # Call stored procedure instead of direct insert
                     try:
-                        cursor = conn.cursor()
-                        cursor.callproc("sp_register_player", [username, email, avatar])
-                        conn.commit()
+                        db.call_procedure("sp_register_player", [username, email, avatar])
                         st.success(f"✅ Player '{username}' registered successfully!")
 
                         # Display assigned PlayerID and Rank
@@ -178,8 +320,6 @@ elif menu == "➕ Create":
                         st.dataframe(df)
                     except Error as e:
                         st.error(f"Error creating player: {e}")
-                    finally:
-                        cursor.close()
                 else:
                     st.warning("⚠️ Please enter both username and email!")
 
@@ -242,10 +382,11 @@ elif menu == "➕ Create":
                     st.success(f"✅ Item '{item_name}' created successfully!")
     
     elif create_table == "Level":
+        game_ids = lookup_ids(lookups.games) or []
         with st.form("create_level"):
             st.subheader("Add New Level")
             level_id = st.number_input("Level ID", min_value=1, step=1)
-            game_id = st.number_input("Game ID", min_value=1, step=1)
+            game_id = st.selectbox("Game", game_ids, format_func=lambda g: f"{lookups.games.name_for(g)} (#{g})")
             level_number = st.number_input("Level Number", min_value=1, step=1)
             difficulty = st.selectbox("Difficulty", ["Easy", "Medium", "Hard", "Expert"])
             description = st.text_area("Description")
@@ -259,10 +400,11 @@ elif menu == "➕ Create":
                     st.success(f"✅ Level {level_number} created successfully!")
     
     elif create_table == "Multiplayer Session":
+        game_ids = lookup_ids(lookups.games) or []
         with st.form("create_session"):
             st.subheader("Add New Multiplayer Session")
             session_id = st.number_input("Session ID", min_value=1, step=1)
-            game_id = st.number_input("Game ID", min_value=1, step=1)
+            game_id = st.selectbox("Game", game_ids, format_func=lambda g: f"{lookups.games.name_for(g)} (#{g})")
             start_time = st.text_input("Start Time (YYYY-MM-DD HH:MM:SS)", value=datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
             end_time = st.text_input("End Time (optional, YYYY-MM-DD HH:MM:SS)", value="")
             
@@ -290,6 +432,48 @@ elif menu == "➕ Create":
                 if execute_query(query, (rank_id, rank_name, rank_score)):
                     st.success(f"✅ Rank '{rank_name}' created successfully!")
 
+    elif create_table == "📦 Bulk Import":
+        st.subheader("Bulk Import from CSV / Parquet")
+
+        import_kind = st.selectbox("Import Into", list(bulk_import.IMPORT_SPECS))
+        _, required_cols, optional_cols = bulk_import.IMPORT_SPECS[import_kind]
+        st.caption(
+            f"Required columns: {', '.join(required_cols)} · "
+            f"Optional: {', '.join(optional_cols)}"
+        )
+
+        upload = st.file_uploader("Upload File", type=["csv", "parquet"])
+        batch_size = st.number_input("Batch Size (rows per transaction)", min_value=1, max_value=100000,
+                                     value=bulk_import.BULK_BATCH_SIZE, step=100)
+
+        if upload is not None and st.button("Import", type="primary"):
+            try:
+                raw = bulk_import.read_upload(upload)
+                valid, rejected = bulk_import.validate(import_kind, raw)
+            except (ValueError, Error) as e:
+                st.error(f"❌ Could not import file: {e}")
+            else:
+                progress = st.progress(0.0, text="Importing...")
+                report = bulk_import.import_rows(
+                    import_kind, valid, int(batch_size),
+                    progress=lambda done: progress.progress(done, text=f"Importing... {done:.0%}"),
+                )
+                rejected = pd.concat([rejected, report["failed"]], ignore_index=True)
+
+                col1, col2, col3 = st.columns(3)
+                col1.metric("Rows Inserted", report["inserted"])
+                col2.metric("Rows Rejected", len(rejected))
+                col3.metric("Rows / sec", f"{report['rows_per_sec']:,.0f}")
+                st.caption(f"Completed in {report['seconds']:.2f}s")
+
+                if not rejected.empty:
+                    st.warning("⚠️ Some rows were rejected:")
+                    st.dataframe(rejected, use_container_width=True)
+                    st.download_button("Download Rejected Rows", rejected.to_csv(index=False),
+                                       file_name="rejected_rows.csv", mime="text/csv")
+                else:
+                    st.success(f"✅ All {report['inserted']} rows imported successfully!")
+
 # READ OPERATIONS
 elif menu == "📖 Read":
     st.markdown('<h2 class="section-header">View Database Records</h2>', unsafe_allow_html=True)
@@ -298,64 +482,86 @@ elif menu == "📖 Read":
                               ["Players", "Games", "Achievements", "Items", "Levels", 
                                "Multiplayer Sessions", "Ranks", "Player Achievements", "Player Items"])
     
+
     if st.button("Load Data", type="primary"):
-        if read_table == "Players":
-            df = execute_query("""
-                SELECT p.PlayerID, p.Username, p.Email, p.RegistrationDate, 
-                       p.TotalScore, p.Avatar, r.RankName 
-                FROM player p 
-                LEFT JOIN ranks r ON p.RankID = r.RankID
-            """, fetch=True)
-        
-        elif read_table == "Games":
-            df = execute_query("SELECT * FROM game", fetch=True)
-        
-        elif read_table == "Achievements":
-            df = execute_query("SELECT * FROM achievement", fetch=True)
-        
-        elif read_table == "Items":
-            df = execute_query("SELECT * FROM item", fetch=True)
-        
-        elif read_table == "Levels":
-            df = execute_query("""
-                SELECT l.LevelID, l.LevelNumber, l.Difficulty, l.Description, g.Title as GameTitle 
-                FROM level l 
-                JOIN game g ON l.GameID = g.GameID
-            """, fetch=True)
-        
-        elif read_table == "Multiplayer Sessions":
-            df = execute_query("""
-                SELECT m.SessionID, g.Title as GameTitle, m.StartTime, m.EndTime 
-                FROM multiplayersession m 
-                JOIN game g ON m.GameID = g.GameID
-            """, fetch=True)
-        
-        elif read_table == "Ranks":
-            df = execute_query("SELECT * FROM ranks ORDER BY RankScore", fetch=True)
-        
-        elif read_table == "Player Achievements":
-            df = execute_query("""
-                SELECT p.Username, a.Name as Achievement, a.Description 
-                FROM playerachievement pa 
-                JOIN player p ON pa.PlayerID = p.PlayerID 
-                JOIN achievement a ON pa.AchievementID = a.AchievementID
-            """, fetch=True)
-        
-        elif read_table == "Player Items":
-            df = execute_query("""
-                SELECT p.Username, i.ItemName, i.ItemType, i.Rarity, 
-                       pi.Quantity, pi.DateObtained 
-                FROM playeritem pi 
-                JOIN player p ON pi.PlayerID = p.PlayerID 
-                JOIN item i ON pi.ItemID = i.ItemID
-            """, fetch=True)
-        
+        st.session_state.read_view = {"table": read_table, "start": None, "before": None}
+
+    view = st.session_state.get("read_view")
+    if view and view["table"] == read_table:
+        base_query, key_expr, key_column, count_table = queries.READ_QUERIES[read_table]
+
+        col1, col2, col3 = st.columns([1, 1, 1])
+        with col1:
+            page_size = st.selectbox("Page Size", [25, 50, 100, 500], index=1)
+        with col2:
+            jump_key = st.number_input(f"Jump to {key_column}", min_value=0, step=1, value=0)
+        with col3:
+            st.write("")
+            if st.button("Go"):
+                view.update(start=int(jump_key), before=None)
+
+        try:
+            df, has_prev, has_next = db.fetch_page(
+                base_query, key_expr, page_size, start=view["start"], before=view["before"]
+            )
+            total, is_estimate = db.table_row_count(count_table)
+        except Error as e:
+            st.error(f"Database Error: {e}")
+            df = None
+
         if df is not None and not df.empty:
             st.dataframe(df, use_container_width=True, height=400)
-            st.info(f"📊 Total Records: {len(df)}")
-        else:
+            first_key, last_key = int(df[key_column].iloc[0]), int(df[key_column].iloc[-1])
+            st.info(
+                f"📊 Showing {key_column} {first_key}–{last_key} · "
+                f"Total Records: {'≈' if is_estimate else ''}{total}"
+            )
+
+            nav_prev, nav_next = st.columns(2)
+            with nav_prev:
+                if st.button("⬅️ Previous", disabled=not has_prev):
+                    view.update(start=None, before=first_key)
+                    st.rerun()
+            with nav_next:
+                if st.button("Next ➡️", disabled=not has_next):
+                    view.update(start=last_key + 1, before=None)
+                    st.rerun()
+        elif df is not None:
             st.warning("⚠️ No data found!")
 
+    # Export the whole view to a compressed file, streamed in chunks
+    with st.expander("📤 Export Table"):
+        export_format = st.selectbox("Format", list(bulk_export.EXPORT_FORMATS))
+        if st.button("Export"):
+            base_query, key_expr, _, count_table = queries.READ_QUERIES[read_table]
+            path = bulk_export.export_path(read_table, export_format)
+            try:
+                expected, _ = db.table_row_count(count_table)
+                progress = st.progress(0.0, text="Exporting...")
+
+                def show_progress(rows, rate):
+                    done = min(rows / expected, 1.0) if expected else 1.0
+                    progress.progress(done, text=f"Exported {rows:,} rows · {rate:,.0f} rows/sec")
+
+                report = bulk_export.export_query(
+                    f"{base_query} ORDER BY {key_expr}", path, export_format, progress=show_progress
+                )
+            except (ValueError, Error, OSError) as e:
+                st.error(f"❌ Export failed: {e}")
+            else:
+                progress.progress(1.0, text="Export complete")
+                st.success(
+                    f"✅ Exported {report['rows']:,} rows to `{report['path']}` "
+                    f"({report['bytes'] / 1e6:.1f} MB) in {report['seconds']:.1f}s "
+                    f"· {report['rows_per_sec']:,.0f} rows/sec"
+                )
+                if report["bytes"] <= EXPORT_DOWNLOAD_LIMIT:
+                    with open(report["path"], "rb") as exported:
+                        st.download_button("Download Export", exported,
+                                           file_name=os.path.basename(report["path"]))
+                else:
+                    st.info("File is too large to download through the browser; fetch it from the server path above.")
+
 # UPDATE OPERATIONS
 elif menu == "✏️ Update":
     st.markdown('<h2 class="section-header">Update Existing Records</h2>', unsafe_allow_html=True)
@@ -364,155 +570,74 @@ elif menu == "✏️ Update":
     
     if update_table == "Player":
         st.subheader("Update Player Information")
+        record = pick_record("Player", "update")
         
-        players_df = execute_query("SELECT PlayerID, Username, Email, TotalScore FROM player", fetch=True)
-        if players_df is not None:
-            st.dataframe(players_df, use_container_width=True)
-        
-        with st.form("update_player"):
-            player_id = st.number_input("Select Player ID to Update", min_value=1, step=1)
-            
-            col1, col2 = st.columns(2)
-            with col1:
-                new_username = st.text_input("New Username (leave empty to keep current)")
-                new_email = st.text_input("New Email (leave empty to keep current)")
-            with col2:
-                new_score = st.number_input("New Total Score (-1 to keep current)", min_value=-1, value=-1)
-                new_avatar = st.text_input("New Avatar (leave empty to keep current)")
-            
-            submit = st.form_submit_button("Update Player")
+        if record:
+            with st.form("update_player"):
+                col1, col2 = st.columns(2)
+                with col1:
+                    new_username = st.text_input("Username", record["Username"])
+                    new_email = st.text_input("Email", record["Email"])
+                with col2:
+                    new_score = st.number_input("Total Score", min_value=0, value=int(record["TotalScore"] or 0))
+                    new_avatar = st.text_input("Avatar", record["Avatar"] or "")
+                
+                submit = st.form_submit_button("Update Player")
             
             if submit:
-                updates = []
-                params = []
-                
-                if new_username:
-                    updates.append("Username = %s")
-                    params.append(new_username)
-                if new_email:
-                    updates.append("Email = %s")
-                    params.append(new_email)
-                if new_score >= 0:
-                    updates.append("TotalScore = %s")
-                    params.append(new_score)
-                if new_avatar:
-                    updates.append("Avatar = %s")
-                    params.append(new_avatar)
-                
-                if updates:
-                    params.append(player_id)
-                    query = f"UPDATE player SET {', '.join(updates)} WHERE PlayerID = %s"
-                    if execute_query(query, tuple(params)):
-                        st.success(f"✅ Player ID {player_id} updated successfully!")
-                else:
-                    st.warning("⚠️ No changes specified!")
+                save_record("Player", record, {
+                    "Username": new_username, "Email": new_email,
+                    "TotalScore": int(new_score), "Avatar": new_avatar,
+                }, "update")
     
     elif update_table == "Game":
         st.subheader("Update Game Information")
+        record = pick_record("Game", "update")
         
-        games_df = execute_query("SELECT GameID, Title, Genre, MaxPlayers FROM game", fetch=True)
-        if games_df is not None:
-            st.dataframe(games_df, use_container_width=True)
-        
-        with st.form("update_game"):
-            game_id = st.number_input("Select Game ID to Update", min_value=1, step=1)
-            new_title = st.text_input("New Title (leave empty to keep current)")
-            new_genre = st.selectbox("New Genre", ["", "Arcade", "Action", "RPG", "Strategy", "Sports"])
-            new_max_players = st.number_input("New Max Players (-1 to keep current)", min_value=-1, value=-1)
-            
-            submit = st.form_submit_button("Update Game")
+        if record:
+            with st.form("update_game"):
+                new_title = st.text_input("Title", record["Title"])
+                genres, genre_index = choice_index(["Arcade", "Action", "RPG", "Strategy", "Sports"], record["Genre"])
+                new_genre = st.selectbox("Genre", genres, index=genre_index)
+                new_max_players = st.number_input("Max Players", min_value=1, value=int(record["MaxPlayers"] or 1))
+                
+                submit = st.form_submit_button("Update Game")
             
             if submit:
-                updates = []
-                params = []
-                
-                if new_title:
-                    updates.append("Title = %s")
-                    params.append(new_title)
-                if new_genre:
-                    updates.append("Genre = %s")
-                    params.append(new_genre)
-                if new_max_players > 0:
-                    updates.append("MaxPlayers = %s")
-                    params.append(new_max_players)
-                
-                if updates:
-                    params.append(game_id)
-                    query = f"UPDATE game SET {', '.join(updates)} WHERE GameID = %s"
-                    if execute_query(query, tuple(params)):
-                        st.success(f"✅ Game ID {game_id} updated successfully!")
-                else:
-                    st.warning("⚠️ No changes specified!")
+                save_record("Game", record, {
+                    "Title": new_title, "Genre": new_genre, "MaxPlayers": int(new_max_players),
+                }, "update")
     
     elif update_table == "Achievement":
         st.subheader("Update Achievement Information")
+        record = pick_record("Achievement", "update")
         
-        ach_df = execute_query("SELECT * FROM achievement", fetch=True)
-        if ach_df is not None:
-            st.dataframe(ach_df, use_container_width=True)
-        
-        with st.form("update_achievement"):
-            ach_id = st.number_input("Select Achievement ID to Update", min_value=1, step=1)
-            new_name = st.text_input("New Name (leave empty to keep current)")
-            new_desc = st.text_area("New Description (leave empty to keep current)")
-            
-            submit = st.form_submit_button("Update Achievement")
+        if record:
+            with st.form("update_achievement"):
+                new_name = st.text_input("Name", record["Name"])
+                new_desc = st.text_area("Description", record["Description"] or "")
+                
+                submit = st.form_submit_button("Update Achievement")
             
             if submit:
-                updates = []
-                params = []
-                
-                if new_name:
-                    updates.append("Name = %s")
-                    params.append(new_name)
-                if new_desc:
-                    updates.append("Description = %s")
-                    params.append(new_desc)
-                
-                if updates:
-                    params.append(ach_id)
-                    query = f"UPDATE achievement SET {', '.join(updates)} WHERE AchievementID = %s"
-                    if execute_query(query, tuple(params)):
-                        st.success(f"✅ Achievement ID {ach_id} updated successfully!")
-                else:
-                    st.warning("⚠️ No changes specified!")
+                save_record("Achievement", record, {"Name": new_name, "Description": new_desc}, "update")
     
     elif update_table == "Item":
         st.subheader("Update Item Information")
+        record = pick_record("Item", "update")
         
-        items_df = execute_query("SELECT * FROM item", fetch=True)
-        if items_df is not None:
-            st.dataframe(items_df, use_container_width=True)
-        
-        with st.form("update_item"):
-            item_id = st.number_input("Select Item ID to Update", min_value=1, step=1)
-            new_name = st.text_input("New Item Name (leave empty to keep current)")
-            new_type = st.selectbox("New Item Type", ["", "Weapon", "Armor", "Consumable", "Accessory"])
-            new_rarity = st.selectbox("New Rarity", ["", "Common", "Uncommon", "Rare", "Epic", "Mythic"])
-            
-            submit = st.form_submit_button("Update Item")
+        if record:
+            with st.form("update_item"):
+                new_name = st.text_input("Item Name", record["ItemName"])
+                types, type_index = choice_index(["Weapon", "Armor", "Consumable", "Accessory"], record["ItemType"])
+                new_type = st.selectbox("Item Type", types, index=type_index)
+                rarities, rarity_index = choice_index(["Common", "Uncommon", "Rare", "Epic", "Mythic"], record["Rarity"])
+                new_rarity = st.selectbox("Rarity", rarities, index=rarity_index)
+                
+                submit = st.form_submit_button("Update Item")
             
             if submit:
-                updates = []
-                params = []
-                
-                if new_name:
-                    updates.append("ItemName = %s")
-                    params.append(new_name)
-                if new_type:
-                    updates.append("ItemType = %s")
-                    params.append(new_type)
-                if new_rarity:
-                    updates.append("Rarity = %s")
-                    params.append(new_rarity)
-                
-                if updates:
-                    params.append(item_id)
-                    query = f"UPDATE item SET {', '.join(updates)} WHERE ItemID = %s"
-                    if execute_query(query, tuple(params)):
-                        st.success(f"✅ Item ID {item_id} updated successfully!")
-                else:
-                    st.warning("⚠️ No changes specified!")
+                save_record("Item", record, {"ItemName": new_name, "ItemType": new_type, "Rarity": new_rarity}, "update")
 
 # DELETE OPERATIONS
 elif menu == "🗑️ Delete":
@@ -520,122 +645,43 @@ elif menu == "🗑️ Delete":
     st.warning("⚠️ Warning: Deletion is permanent and cannot be undone!")
     
     delete_table = st.selectbox("Select Table", ["Player", "Game", "Achievement", "Item", "Level"])
+    st.subheader(f"Delete {delete_table}")
+    record = pick_record(delete_table, "delete")
     
-    if delete_table == "Player":
-        st.subheader("Delete Player")
-        players_df = execute_query("SELECT PlayerID, Username, Email FROM player", fetch=True)
-        if players_df is not None:
-            st.dataframe(players_df, use_container_width=True)
-        
-        with st.form("delete_player"):
-            player_id = st.number_input("Enter Player ID to Delete", min_value=1, step=1)
-            confirm = st.checkbox("I confirm I want to delete this player")
-            submit = st.form_submit_button("Delete Player", type="primary")
-            
-            if submit and confirm:
-                query = "DELETE FROM player WHERE PlayerID = %s"
-                if execute_query(query, (player_id,)):
-                    st.success(f"✅ Player ID {player_id} deleted successfully!")
-            elif submit:
-                st.error("❌ Please confirm deletion!")
-    
-    elif delete_table == "Game":
-        st.subheader("Delete Game")
-        games_df = execute_query("SELECT GameID, Title, Genre FROM game", fetch=True)
-        if games_df is not None:
-            st.dataframe(games_df, use_container_width=True)
+    if record:
+        record_id = record[records.RECORDS[delete_table][1]]
+        with st.form(f"delete_{delete_table.lower()}"):
+            confirm = st.checkbox(f"I confirm I want to delete this {delete_table.lower()}")
+            submit = st.form_submit_button(f"Delete {delete_table}", type="primary")
         
-        with st.form("delete_game"):
-            game_id = st.number_input("Enter Game ID to Delete", min_value=1, step=1)
-            confirm = st.checkbox("I confirm I want to delete this game")
-            submit = st.form_submit_button("Delete Game", type="primary")
-            
-            if submit and confirm:
-                query = "DELETE FROM game WHERE GameID = %s"
-                if execute_query(query, (game_id,)):
-                    st.success(f"✅ Game ID {game_id} deleted successfully!")
-            elif submit:
-                st.error("❌ Please confirm deletion!")
-    
-    elif delete_table == "Achievement":
-        st.subheader("Delete Achievement")
-        ach_df = execute_query("SELECT * FROM achievement", fetch=True)
-        if ach_df is not None:
-            st.dataframe(ach_df, use_container_width=True)
-        
-        with st.form("delete_achievement"):
-            ach_id = st.number_input("Enter Achievement ID to Delete", min_value=1, step=1)
-            confirm = st.checkbox("I confirm I want to delete this achievement")
-            submit = st.form_submit_button("Delete Achievement", type="primary")
-            
-            if submit and confirm:
-                query = "DELETE FROM achievement WHERE AchievementID = %s"
-                if execute_query(query, (ach_id,)):
-                    st.success(f"✅ Achievement ID {ach_id} deleted successfully!")
-            elif submit:
-                st.error("❌ Please confirm deletion!")
-    
-    elif delete_table == "Item":
-        st.subheader("Delete Item")
-        items_df = execute_query("SELECT * FROM item", fetch=True)
-        if items_df is not None:
-            st.dataframe(items_df, use_container_width=True)
-        
-        with st.form("delete_item"):
-            item_id = st.number_input("Enter Item ID to Delete", min_value=1, step=1)
-            confirm = st.checkbox("I confirm I want to delete this item")
-            submit = st.form_submit_button("Delete Item", type="primary")
-            
-            if submit and confirm:
-                query = "DELETE FROM item WHERE ItemID = %s"
-                if execute_query(query, (item_id,)):
-                    st.success(f"✅ Item ID {item_id} deleted successfully!")
-            elif submit:
-                st.error("❌ Please confirm deletion!")
-    
-    elif delete_table == "Level":
-        st.subheader("Delete Level")
-        levels_df = execute_query("SELECT l.LevelID, l.LevelNumber, g.Title FROM level l JOIN game g ON l.GameID = g.GameID", fetch=True)
-        if levels_df is not None:
-            st.dataframe(levels_df, use_container_width=True)
-        
-        with st.form("delete_level"):
-            level_id = st.number_input("Enter Level ID to Delete", min_value=1, step=1)
-            confirm = st.checkbox("I confirm I want to delete this level")
-            submit = st.form_submit_button("Delete Level", type="primary")
-            
-            if submit and confirm:
-                query = "DELETE FROM level WHERE LevelID = %s"
-                if execute_query(query, (level_id,)):
-                    st.success(f"✅ Level ID {level_id} deleted successfully!")
-            elif submit:
-                st.error("❌ Please confirm deletion!")
+        if submit and confirm:
+            try:
+                records.delete(delete_table, record_id, record["UpdatedAt"])
+                st.success(f"✅ {delete_table} ID {record_id} deleted successfully!")
+            except records.StaleRecordError as e:
+                st.error(f"❌ {e} Check the current values and try again.")
+            except Error as e:
+                st.error(f"Database Error: {e}")
+            st.session_state.pop(f"delete_{delete_table}_record", None)
+        elif submit:
+            st.error("❌ Please confirm deletion!")
 
 # ADVANCED QUERIES
 elif menu == "🔍 Advanced Queries":
     st.markdown('<h2 class="section-header">Advanced Queries</h2>', unsafe_allow_html=True)
     
-    query_type = st.selectbox("Select Query Type", 
-                              ["Nested Query - Top Players", 
-                               "Join Query - Player Sessions", 
-                               "Aggregate Query - Game Statistics"])
+    query_type = st.selectbox("Select Query Type", list(queries.ADVANCED_QUERIES))
     
     if query_type == "Nested Query - Top Players":
         st.subheader("🏆 Players with Above Average Score (Nested Query)")
         st.info("This query finds all players whose total score is above the average score of all players")
         
         if st.button("Execute Query", type="primary"):
-            query = """
-                SELECT PlayerID, Username, Email, TotalScore, 
-                       (SELECT AVG(TotalScore) FROM player) as AverageScore
-                FROM player
-                WHERE TotalScore > (SELECT AVG(TotalScore) FROM player)
-                ORDER BY TotalScore DESC
-            """
-            df = execute_query(query, fetch=True)
+            query = queries.ADVANCED_QUERIES["Nested Query - Top Players"]
+            df, total = stream_to_dataframe(query)
             if df is not None and not df.empty:
-                st.dataframe(df, use_container_width=True)
-                st.success(f"✅ Found {len(df)} players above average!")
+                show_streamed(df, total)
+                st.success(f"✅ Found {total} players above average!")
             else:
                 st.warning("No results found!")
     
@@ -644,19 +690,11 @@ elif menu == "🔍 Advanced Queries":
         st.info("This query joins player, session, and game tables to show detailed session information")
         
         if st.button("Execute Query", type="primary"):
-            query = """
-                SELECT p.Username, g.Title as GameTitle, 
-                       m.StartTime, m.EndTime, ps.Score, ps.Position
-                FROM playersession ps
-                JOIN player p ON ps.PlayerID = p.PlayerID
-                JOIN multiplayersession m ON ps.SessionID = m.SessionID
-                JOIN game g ON m.GameID = g.GameID
-                ORDER BY ps.Score DESC
-            """
-            df = execute_query(query, fetch=True)
+            query = queries.ADVANCED_QUERIES["Join Query - Player Sessions"]
+            df, total = stream_to_dataframe(query)
             if df is not None and not df.empty:
-                st.dataframe(df, use_container_width=True)
-                st.success(f"✅ Found {len(df)} session records!")
+                show_streamed(df, total)
+                st.success(f"✅ Found {total} session records!")
             else:
                 st.warning("No results found!")
     
@@ -665,22 +703,11 @@ elif menu == "🔍 Advanced Queries":
         st.info("This query shows player count, average score, and total score per game")
         
         if st.button("Execute Query", type="primary"):
-            query = """
-                SELECT g.Title as GameTitle, g.Genre,
-                       COUNT(DISTINCT ps.PlayerID) as TotalPlayers,
-                       AVG(ps.Score) as AverageScore,
-                       SUM(ps.Score) as TotalScore,
-                       MAX(ps.Score) as HighScore
-                FROM game g
-                LEFT JOIN multiplayersession m ON g.GameID = m.GameID
-                LEFT JOIN playersession ps ON m.SessionID = ps.SessionID
-                GROUP BY g.GameID, g.Title, g.Genre
-                ORDER BY TotalPlayers DESC
-            """
-            df = execute_query(query, fetch=True)
+            query = queries.ADVANCED_QUERIES["Aggregate Query - Game Statistics"]
+            df, total = stream_to_dataframe(query)
             if df is not None and not df.empty:
-                st.dataframe(df, use_container_width=True)
-                st.success(f"✅ Statistics for {len(df)} games!")
+                show_streamed(df, total)
+                st.success(f"✅ Statistics for {total} games!")
             else:
                 st.warning("No results found!")
     
@@ -690,23 +717,89 @@ elif menu == "🔍 Advanced Queries":
     st.warning("⚠️ Advanced users only! Be careful with custom queries.")
     
     custom_query = st.text_area("Enter your SQL query:", height=150)
-    
+    st.caption(
+        f"Runs on its own connection: results stop at {custom_queries.CUSTOM_ROW_LIMIT} rows, reads at "
+        f"{custom_queries.CUSTOM_TIMEOUT:.0f}s (MAX_EXECUTION_TIME), anything at "
+        f"{custom_queries.CUSTOM_TIMEOUT + custom_queries.CUSTOM_GRACE:.0f}s."
+    )
+    run = st.session_state.get("custom_run")
+
     col1, col2 = st.columns(2)
     with col1:
         if st.button("Execute Custom Query"):
-            if custom_query:
-                df = execute_query(custom_query, fetch=True)
-                if df is not None and not df.empty:
-                    st.dataframe(df, use_container_width=True)
-                    st.success("✅ Query executed successfully!")
-                elif df is not None:
-                    st.info("Query executed but returned no results")
-            else:
+            if not custom_query:
                 st.error("Please enter a query!")
-    
+            elif run is not None and run.running():
+                st.error("❌ A query is still running. Cancel it first.")
+            else:
+                # EXPLAIN first; expensive-looking statements wait for confirmation
+                try:
+                    estimate = custom_queries.estimate(custom_query)
+                except Error as e:
+                    st.error(f"Database Error: {e}")
+                else:
+                    st.session_state.custom_estimate = estimate
+                    # No estimate (CALL, DDL, ...) means the cost is unknown: confirm as well
+                    st.session_state.custom_pending = custom_query if estimate is None or estimate["risky"] else None
+                    if not st.session_state.custom_pending:
+                        run = st.session_state.custom_run = custom_queries.QueryRun(custom_query)
+
     with col2:
         if st.button("Clear Query"):
+            for state_key in ("custom_run", "custom_estimate", "custom_pending"):
+                st.session_state.pop(state_key, None)
             st.rerun()
+
+    estimate = st.session_state.get("custom_estimate")
+    if estimate is not None:
+        col1, col2 = st.columns(2)
+        col1.metric("Estimated Rows (largest step)", f"{estimate['rows']:,}")
+        col2.metric("Estimated Cost", f"{estimate['cost']:,.1f}")
+        with st.expander("🔎 EXPLAIN"):
+            st.dataframe(estimate["plan"], use_container_width=True)
+
+    pending = st.session_state.get("custom_pending")
+    if pending:
+        if estimate is None:
+            st.warning("⚠️ This statement cannot be EXPLAINed, so its cost is unknown. "
+                       "It will still be stopped by the limits above.")
+        else:
+            st.warning(
+                f"⚠️ The optimizer expects this to be expensive (over {custom_queries.CONFIRM_ROWS:,} rows "
+                f"or cost {custom_queries.CONFIRM_COST:,.0f}). It will still be stopped by the limits above."
+            )
+        if st.button("Run Anyway"):
+            st.session_state.custom_pending = None
+            run = st.session_state.custom_run = custom_queries.QueryRun(pending)
+
+    if run is not None:
+        if run.running():
+            st.info(f"⏳ Running for {run.elapsed():.1f}s on connection {run.connection_id}...")
+            if st.button("🛑 Cancel Query"):
+                try:
+                    run.cancel()
+                except Error as e:
+                    st.error(f"Database Error: {e}")
+                run.wait(2)
+            else:
+                time.sleep(0.5)
+            st.rerun()
+        elif run.status == "done":
+            if run.columns is None:
+                st.success(f"✅ Query executed successfully! ({run.rowcount} rows affected, {run.elapsed():.2f}s)")
+            elif run.rows:
+                st.dataframe(run.frame(), use_container_width=True)
+                if run.truncated:
+                    st.caption(f"Showing the first {run.row_limit} rows; the rest were not read.")
+                st.success(f"✅ Query executed successfully! ({len(run.rows)} rows, {run.elapsed():.2f}s)")
+            else:
+                st.info("Query executed but returned no results")
+        elif run.status == "cancelled":
+            st.warning(f"🛑 Query cancelled after {run.elapsed():.1f}s.")
+        elif run.status == "timed out":
+            st.error(f"⏱️ Query stopped after {run.elapsed():.1f}s (time limit {run.timeout:.0f}s).")
+        else:
+            st.error(f"Database Error: {run.error}")
 # DEMO PAGE - Trigger, Function, and Procedure Showcase
 elif menu == "⚡ Triggers, Functions & Procedures":
     st.markdown('<h2 class="section-header">⚡ Trigger, Function & Procedure Demo</h2>', unsafe_allow_html=True)
@@ -734,59 +827,76 @@ elif menu == "⚡ Triggers, Functions & Procedures":
 
         if st.button("Run sp_register_player"):
             try:
-                cursor = conn.cursor()
-                cursor.callproc("sp_register_player", [username, email, avatar])
-                conn.commit()
+                db.call_procedure("sp_register_player", [username, email, avatar])
                 st.success(f"✅ Player '{username}' created successfully via procedure.")
                 df = execute_query("SELECT * FROM player WHERE Username=%s", (username,), fetch=True)
                 st.dataframe(df)
             except Error as e:
                 st.error(f"❌ Error: {e}")
-            finally:
-                cursor.close()
 
     # 2️⃣ Award item (procedure + trigger)
     elif choice == "2️⃣ Award Item to Player (sp_award_item)":
-        players = execute_query("SELECT PlayerID, Username FROM player", fetch=True)
-        items = execute_query("SELECT ItemID, ItemName FROM item", fetch=True)
-
-        if players is not None and items is not None:
-            player = st.selectbox("Select Player", players["Username"])
-            item = st.selectbox("Select Item", items["ItemName"])
-            qty = st.number_input("Quantity", min_value=1, max_value=999, value=1)
+        player_ids, item_ids = lookup_ids(lookups.players), lookup_ids(lookups.items)
 
-            # Convert numpy to plain int
-            pid = int(players.loc[players["Username"] == player, "PlayerID"].iloc[0])
-            iid = int(items.loc[items["ItemName"] == item, "ItemID"].iloc[0])
-            qty = int(qty)
+        if player_ids and item_ids:
+            pid = st.selectbox("Select Player", player_ids, format_func=lookups.players.name_for)
+            iid = st.selectbox("Select Item", item_ids, format_func=lookups.items.name_for)
+            qty = int(st.number_input("Quantity", min_value=1, max_value=999, value=1))
+            player, item = lookups.players.name_for(pid), lookups.items.name_for(iid)
 
             if st.button("Run sp_award_item"):
                 try:
-                    cursor = conn.cursor()
-                    cursor.callproc("sp_award_item", [pid, iid, qty])  # all plain ints now
-                    conn.commit()
+                    db.call_procedure("sp_award_item", [pid, iid, qty])  # all plain ints now
                     st.success(f"✅ Item '{item}' x{qty} awarded to '{player}' successfully.")
                     df = execute_query("SELECT * FROM playeritem WHERE PlayerID=%s", (pid,), fetch=True)
                     st.dataframe(df)
                 except Error as e:
                     st.error(f"❌ Error: {e}")
-                finally:
-                    cursor.close()
+
+            # Reward drops: many grants in one transaction instead of one call each
+            with st.expander("🎁 Bulk Award"):
+                source = st.radio("Grants", ["Top leaderboard players", "Upload CSV/Parquet"], horizontal=True)
+                grants = top_n = None
+                if source == "Top leaderboard players":
+                    n = st.number_input("Top N players", min_value=1, max_value=10000, value=10)
+                    if st.button("Award to Top Players"):
+                        top_n = int(n)
+                else:
+                    upload = st.file_uploader("Columns: PlayerID, ItemID, Quantity", type=["csv", "parquet"])
+                    if upload is not None and st.button("Award Uploaded Grants"):
+                        try:
+                            grants = bulk_import.read_upload(upload)
+                        except ValueError as e:
+                            st.error(f"❌ {e}")
+
+                if grants is not None or top_n is not None:
+                    try:
+                        if top_n is not None:
+                            top = leaderboard.top_players(top_n)
+                            grants = [(p, iid, qty) for p in top["PlayerID"].tolist()]
+                        report = inventory.award_items(grants)
+                        c1, c2, c3, c4 = st.columns(4)
+                        c1.metric("Stacks Awarded", report["awarded"])
+                        c2.metric("New / Topped Up", f"{report['new_stacks']} / {report['updated_stacks']}")
+                        c3.metric("Rejected", len(report["rejected"]))
+                        c4.metric("Grants/sec", f"{report['grants_per_sec']:,.0f}")
+                        st.caption(
+                            f"{report['received']} grants, {report['units']} units in {report['seconds']:.2f}s · "
+                            f"{report['merged_in_request']} duplicate grants merged"
+                        )
+                        if not report["rejected"].empty:
+                            st.warning("⚠️ Some grants were rejected:")
+                            st.dataframe(report["rejected"], use_container_width=True)
+                    except (Error, KeyError) as e:
+                        st.error(f"❌ Error: {e}")
     elif choice == "3️⃣ Complete Game Session (sp_complete_session)":
-        sessions = execute_query("SELECT SessionID FROM multiplayersession", fetch=True)
-        if sessions is not None and not sessions.empty:
-            sid = st.selectbox("Select Session", sessions["SessionID"])
+        session_ids = lookup_ids(lookups.sessions)
+        if session_ids:
+            sid = st.selectbox("Select Session", session_ids)
             if st.button("Run sp_complete_session"):
                 try:
-                    cursor = conn.cursor()
-                    # Call procedure
-                    cursor.callproc("sp_complete_session", [int(sid)])
-                    
-                    # Consume all pending result sets (important!)
-                    for result in cursor.stored_results():
-                        _ = result.fetchall()
-                    
-                    conn.commit()
+                    # Call procedure (pending result sets are consumed by call_procedure)
+                    db.call_procedure("sp_complete_session", [int(sid)])
                     st.success(f"✅ Session {sid} completed successfully!")
 
                     # Show updated session details
@@ -794,100 +904,102 @@ elif menu == "⚡ Triggers, Functions & Procedures":
                     st.dataframe(df)
                 except Error as e:
                     st.error(f"❌ Error: {e}")
-                finally:
-                    cursor.close()
+
+        # Batch completion: one transaction, one window-function ranking pass
+        open_sessions = execute_query(
+            "SELECT COUNT(*) AS n FROM multiplayersession WHERE EndTime IS NULL", fetch=True
+        )
+        open_count = int(open_sessions["n"].iloc[0]) if open_sessions is not None else 0
+        st.caption(f"Open sessions: {open_count}")
+        if st.button("Complete All Open Sessions", disabled=open_count == 0):
+            try:
+                closed, seconds = session_ops.complete_open_sessions()
+                st.success(f"✅ Completed {closed} sessions in {seconds * 1000:.1f} ms")
+            except Error as e:
+                st.error(f"❌ Error: {e}")
 
 
     # 4️⃣ Leaderboard
     elif choice == "4️⃣ Leaderboard Procedure (sp_get_leaderboard)":
         top_n = st.number_input("Top N Players", 1, 10, 5)
         if st.button("Run sp_get_leaderboard"):
-            df = execute_query(f"CALL sp_get_leaderboard({top_n});", fetch=True)
+            df = execute_query("CALL sp_get_leaderboard(%s)", (int(top_n),), fetch=True)
             st.dataframe(df)
 
-    # 5️⃣ Trigger: Rank auto-update
-    def ensure_connection():
-        global conn
-        if conn is None or not conn.is_connected():
-            conn = get_connection()
-        try:
-            conn.ping(reconnect=True, attempts=3, delay=2)
-        except:
-            conn = get_connection()
-        return conn
+        # Position lookup and recovery for the materialized leaderboard
+        lookup_id = st.number_input("Player ID for Leaderboard Position", min_value=1, step=1)
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("Get Position"):
+                try:
+                    position = leaderboard.player_position(lookup_id)
+                    if position is None:
+                        st.warning("⚠️ Player is not on the leaderboard.")
+                    else:
+                        st.success(f"🏅 Player {lookup_id} is #{position} on the leaderboard.")
+                except Error as e:
+                    st.error(f"❌ Error: {e}")
+        with col2:
+            if st.button("Rebuild Leaderboard"):
+                try:
+                    count, seconds = leaderboard.rebuild()
+                    st.success(f"✅ Leaderboard rebuilt for {count} players in {seconds:.2f}s")
+                except Error as e:
+                    st.error(f"❌ Error: {e}")
 
     # 5️⃣ Auto Rank Update Trigger
     if choice == "5️⃣ Trigger: Auto Rank Update":
-        st.info("Update a player's total score — trigger should auto-adjust their rank.")
+        st.info("Adjust several players' scores at once — ranks are resolved against the ranks thresholds "
+                "and written in the same transaction.")
 
-        players = execute_query("SELECT PlayerID, Username, TotalScore FROM player", fetch=True)
-        if players is not None and not players.empty:
-            player = st.selectbox("Select Player", players["Username"])
-            pid = int(players.loc[players["Username"] == player, "PlayerID"].iloc[0])
-            new_score = st.number_input("New Total Score", min_value=0)
+        player_ids = lookup_ids(lookups.players)
+        if player_ids:
+            selected = st.multiselect("Select Players", player_ids, default=player_ids[:3],
+                                      format_func=lookups.players.name_for)
+            delta = st.number_input("Score Change (+/-)", value=1000, step=100)
 
-            if st.button("Update Score"):
+            if st.button("Apply Score Changes") and selected:
                 try:
-                    conn = ensure_connection()
-                    cursor = conn.cursor()
-
-                    # Store old rank
-                    old_rank = execute_query("SELECT RankID FROM player WHERE PlayerID=%s", (pid,), fetch=True)
-                    old_rank_id = old_rank["RankID"].iloc[0] if not old_rank.empty else "?"
-
-                    cursor.execute("UPDATE player SET TotalScore=%s WHERE PlayerID=%s", (new_score, pid))
-                    conn.commit()
-
-                    st.success("✅ Score updated successfully! Trigger auto-adjusted rank.")
+                    changes, summary = scores.adjust_scores([(pid, delta) for pid in selected])
 
-                    conn.ping(reconnect=True, attempts=3, delay=2)
-
-                    df = execute_query("""
-                        SELECT p.Username, p.TotalScore, p.RankID, r.RankName
-                        FROM player p 
-                        LEFT JOIN ranks r ON p.RankID = r.RankID
-                        WHERE p.PlayerID=%s
-                    """, (pid,), fetch=True)
-
-                    if not df.empty:
-                        new_rank_id = df["RankID"].iloc[0]
-                        st.info(f"🏅 Rank changed from {old_rank_id} ➡️ {new_rank_id}")
-                        st.dataframe(df, use_container_width=True)
-                    else:
-                        st.warning("⚠️ Could not fetch updated player info.")
-
-                except Exception as e:
+                    c1, c2, c3 = st.columns(3)
+                    c1.metric("Players Updated", summary["players"])
+                    c2.metric("Rank Changes", summary["rank_changes"])
+                    c3.metric("Time", f"{summary['seconds'] * 1000:.1f} ms")
+                    st.success("✅ Scores updated in one transaction.")
+                    st.dataframe(
+                        changes[["Username", "OldScore", "NewScore", "OldRank", "NewRank", "RankChanged"]],
+                        use_container_width=True,
+                    )
+                except Error as e:
                     st.error(f"❌ Error: {e}")
-                finally:
-                    try:
-                        cursor.close()
-                    except:
-                        pass
 
     # 6️⃣ Achievement Unlock Trigger
     elif choice == "6️⃣ Trigger: Achievement Unlock (First Blood / Sharp Shooter)":
         st.info("Insert or update player sessions to trigger achievements automatically.")
-        players = execute_query("SELECT PlayerID, Username FROM player", fetch=True)
-        sessions = execute_query("SELECT SessionID FROM multiplayersession", fetch=True)
+        player_ids, session_ids = lookup_ids(lookups.players), lookup_ids(lookups.sessions)
 
-        if players is not None and not players.empty and sessions is not None and not sessions.empty:
-            player = st.selectbox("Select Player", players["Username"])
-            pid = int(players.loc[players["Username"] == player, "PlayerID"].iloc[0])
-            sid = st.selectbox("Select Session", sessions["SessionID"])
+        if player_ids and session_ids:
+            pid = st.selectbox("Select Player", player_ids, format_func=lookups.players.name_for)
+            sid = st.selectbox("Select Session", session_ids)
             score = st.number_input("Score", min_value=0)
 
             if st.button("Insert Session Score"):
                 try:
-                    conn = ensure_connection()
-                    cursor = conn.cursor()
-                    cursor.execute(
+                    db.execute_query(
                         "INSERT INTO playersession (SessionID, PlayerID, Score) VALUES (%s, %s, %s)",
-                        (sid, pid, int(score))
+                        (int(sid), pid, int(score))
                     )
-                    conn.commit()
 
                     st.success("✅ Session inserted. Trigger should unlock achievement (if criteria met).")
 
+                    # Maintained by trg_first_session on every insert
+                    session_count, best_score, last_played = player_stats.get(pid)
+                    c1, c2, c3 = st.columns(3)
+                    c1.metric("Sessions Played", session_count)
+                    c2.metric("Best Score", best_score)
+                    c3.metric("Last Played", str(last_played or "—"))
+
                     df = execute_query("""
                         SELECT a.Name AS Achievement, a.Description 
                         FROM playerachievement pa
@@ -902,64 +1014,47 @@ elif menu == "⚡ Triggers, Functions & Procedures":
 
                 except Exception as e:
                     st.error(f"❌ Error inserting session: {e}")
-                finally:
-                    try:
-                        cursor.close()
-                    except:
-                        pass
 
     # 7️⃣ Validate Item Quantity Trigger
     elif choice == "7️⃣ Trigger: Validate Item Quantity":
         st.info("Try inserting an invalid quantity (<1 or >999) to test validation trigger.")
 
-        players = execute_query("SELECT PlayerID, Username FROM player", fetch=True)
-        items = execute_query("SELECT ItemID, ItemName FROM item", fetch=True)
+        player_ids, item_ids = lookup_ids(lookups.players), lookup_ids(lookups.items)
 
-        if players is not None and not players.empty and items is not None and not items.empty:
-            player = st.selectbox("Select Player", players["Username"])
-            pid = int(players.loc[players["Username"] == player, "PlayerID"].iloc[0])
-            item = st.selectbox("Select Item", items["ItemName"])
-            iid = int(items.loc[items["ItemName"] == item, "ItemID"].iloc[0])
+        if player_ids and item_ids:
+            pid = st.selectbox("Select Player", player_ids, format_func=lookups.players.name_for)
+            iid = st.selectbox("Select Item", item_ids, format_func=lookups.items.name_for)
             qty = st.number_input("Quantity", min_value=-5, max_value=1500, value=0)
 
             if st.button("Insert PlayerItem"):
                 try:
-                    conn = ensure_connection()
-                    cursor = conn.cursor()
-                    cursor.execute(
+                    db.execute_query(
                         "INSERT INTO playeritem (PlayerID, ItemID, Quantity) VALUES (%s, %s, %s)",
                         (pid, iid, int(qty))
                     )
-                    conn.commit()
                     st.success("✅ Insert succeeded (trigger accepted the value).")
 
                 except Error as e:
                     st.error(f"❌ Trigger or DB Error: {e}")
-                finally:
-                    try:
-                        cursor.close()
-                    except:
-                        pass
 
     # 8️⃣ Functions Test
     elif choice == "8️⃣ Functions Test":
         st.info("Test all custom MySQL functions for a selected player.")
-        players = execute_query("SELECT PlayerID, Username FROM player", fetch=True)
+        player_ids = lookup_ids(lookups.players)
 
-        if players is not None and not players.empty:
-            player = st.selectbox("Select Player", players["Username"])
-            pid = int(players.loc[players["Username"] == player, "PlayerID"].iloc[0])
+        if player_ids:
+            pid = st.selectbox("Select Player", player_ids, format_func=lookups.players.name_for)
 
             if st.button("Run All Functions"):
                 try:
-                    conn = ensure_connection()
-                    df = execute_query(f"""
+                    # Parameterized, so the statement is prepared once and reused for every player
+                    df = execute_query("""
                         SELECT 
-                            fn_get_player_rank({pid}) AS PlayerRank,
-                            fn_achievement_completion({pid}) AS AchievementCompletionPercent,
-                            fn_player_inventory_count({pid}) AS TotalInventoryItems,
-                            fn_has_achievement({pid}, 1) AS Has_Achievement_1;
-                    """, fetch=True)
+                            fn_get_player_rank(%s) AS PlayerRank,
+                            fn_achievement_completion(%s) AS AchievementCompletionPercent,
+                            fn_player_inventory_count(%s) AS TotalInventoryItems,
+                            fn_has_achievement(%s, 1) AS Has_Achievement_1
+                    """, (pid, pid, pid, pid), fetch=True)
 
                     if df is not None and not df.empty:
                         st.dataframe(df, use_container_width=True)
@@ -968,24 +1063,69 @@ elif menu == "⚡ Triggers, Functions & Procedures":
 
                 except Exception as e:
                     st.error(f"❌ Error executing functions: {e}")
-    # 8️⃣ Functions
-    elif choice == "8️⃣ Functions Test":
-        players = execute_query("SELECT PlayerID, Username FROM player", fetch=True)
-        if players is not None:
-            player = st.selectbox("Select Player", players["Username"])
-            pid = players.loc[players["Username"] == player, "PlayerID"].iloc[0]
-            if st.button("Run All Functions"):
-                df = execute_query(f"""
-                    SELECT 
-                        fn_get_player_rank({pid}) AS RankName,
-                        fn_achievement_completion({pid}) AS AchievementPercent,
-                        fn_player_inventory_count({pid}) AS TotalItems,
-                        fn_has_achievement({pid}, 1) AS Has_Achievement_1;
-                """, fetch=True)
-                st.dataframe(df)
+
+        # Same values for many players in one set-based query instead of four function calls each
+        with st.expander("👥 Player Profiles"):
+            everyone = st.checkbox("All players")
+            chosen = [] if everyone else st.multiselect("Players", player_ids or [], format_func=lookups.players.name_for)
+            if st.button("Load Profiles"):
+                ids = None if everyone else chosen
+                if ids == []:
+                    st.warning("⚠️ Select at least one player.")
+                else:
+                    try:
+                        start = time.perf_counter()
+                        df = profiles.player_profiles(ids)
+                        df["Has_Achievement_1"] = profiles.has_achievement(df, 1)
+                        st.caption(f"{len(df)} profiles in {(time.perf_counter() - start) * 1000:.1f} ms")
+                        st.dataframe(df, use_container_width=True)
+                    except Error as e:
+                        st.error(f"❌ Error: {e}")
+
+# PERFORMANCE PAGE
+elif menu == "📈 Performance":
+    st.markdown('<h2 class="section-header">Query Performance</h2>', unsafe_allow_html=True)
+    st.caption("Every query, stream and procedure call since the server started, grouped by SQL fingerprint.")
+
+    summary = db.stats.summary()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Fingerprints", summary["fingerprints"])
+    col2.metric("Calls", summary["calls"])
+    col3.metric("DB Time", f"{summary['total_ms'] / 1000:.2f} s")
+    col4.metric("Slow Queries", summary["slow_queries"], help=f"At or over {summary['slow_ms']:.0f} ms")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        top_n = st.number_input("Show top", min_value=5, max_value=500, value=20, step=5)
+    with col2:
+        order = st.selectbox("Order by", ["Total ms", "p95 ms", "p99 ms", "Calls", "Rows", "Bytes", "Errors"])
+
+    top = db.stats.top(int(top_n), by=order)
+    if top.empty:
+        st.info("ℹ️ No queries recorded yet.")
+    else:
+        st.dataframe(top, use_container_width=True)
+
+    with st.expander(f"🐢 Slow Query Log ({query_stats.SLOW_QUERY_LOG})"):
+        slow = query_stats.recent_slow_queries()
+        if slow.empty:
+            st.info(f"ℹ️ No queries over {summary['slow_ms']:.0f} ms logged.")
+        else:
+            st.dataframe(slow, use_container_width=True)
+
+    if st.button("Reset Statistics"):
+        db.stats.reset()
+        st.rerun()
 
 # Footer
 st.markdown("---")
+timing = db.page_timing()
+st.caption(
+    f"⏱️ Page rendered in {(time.perf_counter() - page_start) * 1000:.1f} ms · "
+    f"DB: {timing['queries']} calls, {timing['query_ms']:.1f} ms · "
+    f"Pings: {timing['pings']}, {timing['ping_ms']:.1f} ms · "
+    f"Reconnects: {timing['reconnects']}, {timing['reconnect_ms']:.1f} ms"
+)
 st.markdown(
     "<div style='text-align: center; color: gray;'>"
     "Arcade Database Management System © 2025 | Built with Streamlit"
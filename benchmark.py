@@ -0,0 +1,280 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime
+
+import db
+import profiles
+import queries
+from query_stats import percentile
+
+BENCHMARK_DIR = os.getenv("BENCHMARK_DIR", "benchmark_results")
+REPEATS = 5
+READ_PAGE_SIZE = 50             # the Read page's default page size
+PROFILE_SAMPLE = 1000           # players per player_profiles case
+GROUPS = ["read", "advanced", "procedure", "function", "coldstart"]
+ROOT = os.path.dirname(os.path.abspath(__file__))
+# Interpreter for the coldstart group: point it at a venv built from requirements.txt
+# alone, so the numbers match a deployment rather than a dev env with extra packages
+COLD_START_PYTHON = os.getenv("BENCHMARK_PYTHON", sys.executable)
+
+# Cold start: every run is a new interpreter, like a fresh serverless instance.
+# Only /health answers without pandas; the data pages import it on their first query
+_FIRST_RESPONSE = "import web; raise SystemExit(web.app.test_client().get({path!r}).status_code != 200)"
+COLD_START = [
+    ("interpreter", "pass"),
+    ("import db", "import db"),
+    ("import web", "import web"),
+    ("first response /health", _FIRST_RESPONSE.format(path="/health")),
+    ("first response /", _FIRST_RESPONSE.format(path="/")),
+    ("first response /leaderboard", _FIRST_RESPONSE.format(path="/leaderboard")),
+]
+
+
+def _git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                               capture_output=True, text=True, check=True)
+        return commit.stdout.strip() + ("-dirty" if dirty.stdout.strip() else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _scalar(query, params=None):
+    df = db.execute_query(query, params, fetch=True, use_cache=False)
+    return None if df.empty else df.iloc[0, 0]
+
+
+def _middle_key(table, column):
+    # A key from the middle of the table, for a page that is not at either end
+    return _scalar(
+        f"SELECT {column} FROM {table} WHERE {column} >= "
+        f"(SELECT (MIN({column}) + MAX({column})) DIV 2 FROM {table}) ORDER BY {column} LIMIT 1"
+    )
+
+
+def _sample_ids():
+    """Representative arguments for the routines: mid-table player/item, an open session if any."""
+    session = _scalar("SELECT SessionID FROM multiplayersession WHERE EndTime IS NULL LIMIT 1")
+    return {
+        "player": int(_middle_key("player", "PlayerID") or 1),
+        "item": int(_middle_key("item", "ItemID") or 1),
+        "session": int(session if session is not None else _middle_key("multiplayersession", "SessionID") or 1),
+        "achievement": int(_scalar("SELECT MIN(AchievementID) FROM achievement") or 1),
+    }
+
+
+def _rolled_back(name, args):
+    # Runs a data-changing procedure and undoes it, so repeated runs see the same data
+    with db.connection() as conn:
+        cursor = conn.cursor()
+        try:
+            conn.start_transaction()
+            cursor.callproc(name, args)
+            rows = sum(len(result.fetchall()) for result in cursor.stored_results())
+            conn.rollback()
+            return rows
+        finally:
+            cursor.close()
+
+
+def _register_and_remove():
+    # sp_register_player commits itself, so the test player is deleted afterwards
+    username = f"bench_{uuid.uuid4().hex[:12]}"
+    db.call_procedure("sp_register_player", [username, f"{username}@example.com", "default.png"])
+    db.execute_query("DELETE FROM player WHERE Username = %s", (username,))
+    return 1
+
+
+def _streamed_rows(query):
+    return sum(len(chunk) for chunk in db.stream_query(query))
+
+
+def _fresh_interpreter(code, python=COLD_START_PYTHON):
+    result = subprocess.run([python, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    if result.returncode:
+        raise RuntimeError(f"Cold start case failed: {code}\n{result.stderr.strip()}")
+    return 1
+
+
+def _packages(python):
+    # What the coldstart interpreter has installed, so results from different envs aren't compared blindly
+    try:
+        result = subprocess.run([python, "-m", "pip", "freeze"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.split()
+
+
+def import_profile(module="web", top=15, python=COLD_START_PYTHON):
+    """Slowest imports (cumulative ms) when `module` is imported in a fresh interpreter."""
+    result = subprocess.run([python, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=ROOT, capture_output=True, text=True)
+    modules = []
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            modules.append((parts[2].strip(), int(parts[1]) / 1000))
+    return sorted(modules, key=lambda m: m[1], reverse=True)[:top]
+
+
+def workload(ids, python=COLD_START_PYTHON):
+    """[(name, group, run)] where run() executes the case once and returns its row count."""
+    cases = []
+    for label, (base, key_expr, key_column, table) in queries.READ_QUERIES.items():
+        middle = _middle_key(table, key_column)
+        cases.append((f"Read: {label} (first page)", "read",
+                      lambda b=base, k=key_expr: len(db.fetch_page(b, k, READ_PAGE_SIZE, use_cache=False)[0])))
+        if middle is not None:
+            cases.append((f"Read: {label} (middle page)", "read",
+                          lambda b=base, k=key_expr, m=middle: len(
+                              db.fetch_page(b, k, READ_PAGE_SIZE, start=m, use_cache=False)[0])))
+        cases.append((f"Read: {label} (row count)", "read",
+                      lambda t=table: db.table_row_count(t, use_cache=False)[0]))
+
+    for label, query in queries.ADVANCED_QUERIES.items():
+        cases.append((f"Advanced: {label}", "advanced", lambda q=query: _streamed_rows(q)))
+
+    player, item, session = ids["player"], ids["item"], ids["session"]
+    cases += [
+        ("Procedure: sp_register_player", "procedure", _register_and_remove),
+        ("Procedure: sp_award_item", "procedure", lambda: _rolled_back("sp_award_item", [player, item, 1])),
+        ("Procedure: sp_complete_session", "procedure", lambda: _rolled_back("sp_complete_session", [session])),
+        ("Procedure: sp_get_leaderboard", "procedure",
+         lambda: sum(len(df) for df in db.call_procedure("sp_get_leaderboard", [10]))),
+    ]
+
+    for function, args in [
+        ("fn_get_player_rank", (player,)),
+        ("fn_achievement_completion", (player,)),
+        ("fn_player_inventory_count", (player,)),
+        ("fn_has_achievement", (player, ids["achievement"])),
+    ]:
+        query = f"SELECT {function}({', '.join(['%s'] * len(args))}) AS Result"
+        cases.append((f"Function: {function}", "function",
+                      lambda q=query, a=args: len(db.execute_query(q, a, fetch=True, use_cache=False))))
+
+    first = max(player - PROFILE_SAMPLE // 2, 1)
+    sample = list(range(first, first + PROFILE_SAMPLE))
+    cases.append((f"Function: player_profiles ({PROFILE_SAMPLE} players)", "function",
+                  lambda: len(profiles.player_profiles(sample, use_cache=False))))
+
+    for label, code in COLD_START:
+        cases.append((f"Cold start: {label}", "coldstart", lambda c=code: _fresh_interpreter(c, python)))
+    return cases
+
+
+def run(repeats=REPEATS, groups=GROUPS, label=None, progress=print, python=COLD_START_PYTHON):
+    """Time every case (one warm-up, then `repeats` runs) and return the results document."""
+    ids = _sample_ids()
+    results = []
+    for name, group, case in workload(ids, python):
+        if group not in groups:
+            continue
+        rows = case()     # warm-up: fills the buffer pool and the prepared-statement cache
+        samples = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            rows = case()
+            samples.append((time.perf_counter() - start) * 1000)
+        samples.sort()
+        results.append({
+            "name": name,
+            "group": group,
+            "rows": int(rows),
+            "runs": repeats,
+            "min_ms": round(samples[0], 3),
+            "median_ms": round(percentile(samples, 50), 3),
+            "p95_ms": round(percentile(samples, 95), 3),
+            "max_ms": round(samples[-1], 3),
+            "mean_ms": round(sum(samples) / len(samples), 3),
+        })
+        if progress:
+            progress(f"{results[-1]['median_ms']:>10.2f} ms  {name} ({rows} rows)")
+
+    tables = {}
+    for _, (_, _, _, table) in queries.READ_QUERIES.items():
+        count, estimate = db.table_row_count(table, use_cache=False)
+        tables[table] = {"rows": count, "estimate": estimate}
+    for table in ("playersession", "leaderboard"):
+        count, estimate = db.table_row_count(table, use_cache=False)
+        tables[table] = {"rows": count, "estimate": estimate}
+
+    return {
+        "meta": {
+            "label": label,
+            "commit": _git_commit(),
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "mysql_version": _scalar("SELECT VERSION()"),
+            "python_version": platform.python_version(),
+            "repeats": repeats,
+            "read_page_size": READ_PAGE_SIZE,
+            "sample_ids": ids,
+            "tables": tables,
+            "coldstart_python": python if "coldstart" in groups else None,
+            "coldstart_packages": _packages(python) if "coldstart" in groups else None,
+            "import_profile": import_profile(python=python) if "coldstart" in groups else None,
+        },
+        "results": results,
+    }
+
+
+def save(document):
+    os.makedirs(BENCHMARK_DIR, exist_ok=True)
+    meta = document["meta"]
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    name = "_".join(part for part in (stamp, meta["commit"], meta["label"]) if part)
+    path = os.path.join(BENCHMARK_DIR, f"{name}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2, default=str)
+    return path
+
+
+def compare(old_path, new_path, threshold=1.2):
+    """Median-time ratio new/old per case; ratios at or over threshold are flagged as regressions."""
+    with open(old_path, encoding="utf-8") as f:
+        old = {r["name"]: r for r in json.load(f)["results"]}
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)["results"]
+    rows = []
+    for result in new:
+        before = old.get(result["name"])
+        if before is None:
+            continue
+        ratio = result["median_ms"] / before["median_ms"] if before["median_ms"] else float("inf")
+        rows.append((result["name"], before["median_ms"], result["median_ms"], ratio, ratio >= threshold))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the app's queries, procedures and functions")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run_parser = sub.add_parser("run")
+    run_parser.add_argument("--label", help="tag for the results file, e.g. the datagen scale")
+    run_parser.add_argument("--repeats", type=int, default=REPEATS)
+    run_parser.add_argument("--only", choices=GROUPS, action="append", help="limit to a group (repeatable)")
+    run_parser.add_argument("--python", default=COLD_START_PYTHON,
+                            help="interpreter for the coldstart group (default: $BENCHMARK_PYTHON or this one)")
+    compare_parser = sub.add_parser("compare")
+    compare_parser.add_argument("old")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--threshold", type=float, default=1.2, help="ratio reported as a regression")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        document = run(args.repeats, args.only or GROUPS, args.label, python=args.python)
+        print(f"Results written to {save(document)}")
+    else:
+        regressions = 0
+        for name, before, after, ratio, regressed in compare(args.old, args.new, args.threshold):
+            regressions += regressed
+            print(f"{'SLOWER' if regressed else '      '} {ratio:6.2f}x  {before:>10.2f} -> {after:>10.2f} ms  {name}")
+        print(f"{regressions} regression(s) at {args.threshold:.2f}x or worse")
+        raise SystemExit(1 if regressions else 0)
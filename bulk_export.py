@@ -0,0 +1,120 @@
+import gzip
+import os
+import re
+import time
+from datetime import datetime
+
+import db
+
+EXPORT_DIR = os.getenv("EXPORT_DIR", "exports")
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "50000"))
+
+EXPORT_FORMATS = {
+    "CSV (gzip)": ".csv.gz",
+    "Parquet (snappy)": ".parquet",
+}
+
+
+def export_path(label, fmt):
+    slug = re.sub(r"\W+", "_", label).strip("_").lower()
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    return os.path.join(EXPORT_DIR, f"{slug}_{stamp}{EXPORT_FORMATS[fmt]}")
+
+
+class _CsvSink:
+    def __init__(self, path):
+        self.file = gzip.open(path, "wt", newline="", encoding="utf-8")
+        self.header = True
+
+    def write(self, description, rows):
+        import pandas as pd
+        pd.DataFrame(rows, columns=[desc[0] for desc in description]).to_csv(
+            self.file, header=self.header, index=False)
+        self.header = False
+
+    def close(self):
+        self.file.close()
+
+
+class _ParquetSink:
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("Parquet export needs pyarrow (pip install pyarrow)")
+        self.pa, self.pq = pa, pq
+        self.path = path
+        self.writer = None
+
+    def _arrow_type(self, desc):
+        # Column type from the cursor description, so a column that is all NULL
+        # in the first chunk still gets its real type
+        from mysql.connector.constants import FieldFlag, FieldType
+
+        pa = self.pa
+        type_code = desc[1]
+        flags = desc[7] if len(desc) > 7 else 0
+        if type_code in (FieldType.TINY, FieldType.SHORT, FieldType.INT24, FieldType.LONG,
+                         FieldType.LONGLONG, FieldType.YEAR, FieldType.BIT):
+            return pa.uint64() if flags & FieldFlag.UNSIGNED and type_code == FieldType.LONGLONG else pa.int64()
+        if type_code in (FieldType.FLOAT, FieldType.DOUBLE):
+            return pa.float64()
+        if type_code in (FieldType.DECIMAL, FieldType.NEWDECIMAL):
+            return pa.decimal128(38, 10)
+        if type_code in (FieldType.DATE, FieldType.NEWDATE):
+            return pa.date32()
+        if type_code in (FieldType.DATETIME, FieldType.TIMESTAMP):
+            return pa.timestamp("us")
+        if type_code == FieldType.TIME:
+            return pa.duration("us")
+        if flags & FieldFlag.BINARY and type_code in (FieldType.BLOB, FieldType.TINY_BLOB, FieldType.MEDIUM_BLOB,
+                                                      FieldType.LONG_BLOB, FieldType.STRING, FieldType.VAR_STRING):
+            return pa.binary()
+        return pa.string()
+
+    def write(self, description, rows):
+        pa = self.pa
+        if self.writer is None:
+            schema = pa.schema([(desc[0], self._arrow_type(desc)) for desc in description])
+            self.writer = self.pq.ParquetWriter(self.path, schema, compression="snappy")
+        schema = self.writer.schema
+        columns = list(zip(*rows)) if rows else [()] * len(schema)
+        # One row group per chunk
+        self.writer.write_table(pa.Table.from_arrays(
+            [pa.array(values, type=field.type) for values, field in zip(columns, schema)], schema=schema
+        ))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def export_query(query, path, fmt, params=None, chunk_size=EXPORT_CHUNK_SIZE, progress=None):
+    """Stream a query's result to a compressed file, one chunk in memory at a time.
+
+    progress(rows_written, rows_per_sec) is called after every chunk.
+    """
+    sink = _ParquetSink(path) if fmt.startswith("Parquet") else _CsvSink(path)
+    rows = 0
+    start = time.perf_counter()
+    try:
+        for description, chunk in db.stream_query(query, params, chunk_size=chunk_size, as_frames=False,
+                                                  describe=True):
+            sink.write(description, chunk)
+            rows += len(chunk)
+            if progress:
+                elapsed = time.perf_counter() - start
+                progress(rows, rows / elapsed if elapsed > 0 else 0.0)
+    finally:
+        sink.close()
+
+    elapsed = time.perf_counter() - start
+    return {
+        "path": path,
+        "rows": rows,
+        "bytes": os.path.getsize(path) if os.path.exists(path) else 0,
+        "seconds": elapsed,
+        "rows_per_sec": rows / elapsed if elapsed > 0 else 0.0,
+    }
@@ -0,0 +1,291 @@
+import io
+import os
+import time
+from datetime import date
+
+import pandas as pd
+from mysql.connector import Error
+
+import db
+from query_cache import write_tables
+
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "1000"))
+LOOKUP_CHUNK = 1000            # values per IN (...) list when checking existing keys
+
+# Same limits as trg_validate_item_quantity
+MIN_ITEM_QUANTITY = 1
+MAX_ITEM_QUANTITY = 999
+
+# Columns accepted per import kind: (table, required, optional)
+IMPORT_SPECS = {
+    "Players": ("player", ["Username", "Email"], ["RegistrationDate", "TotalScore", "Avatar"]),
+    "Games": ("game", ["Title"], ["GameID", "Genre", "MaxPlayers", "ReleaseDate"]),
+    "Items": ("item", ["ItemName"], ["ItemID", "ItemType", "Rarity"]),
+    "Player Items": ("playeritem", ["PlayerID", "ItemID", "Quantity"], ["DateObtained"]),
+    "Session Scores": ("playersession", ["SessionID", "PlayerID", "Score"], ["Position"]),
+}
+
+# Imports that add to an existing row instead of failing on its unique key
+# (a player's item stack, uq_playeritem_player_item; same effect as sp_award_item)
+ON_DUPLICATE = {
+    "Player Items": "Quantity = Quantity + VALUES(Quantity), DateObtained = VALUES(DateObtained)",
+}
+
+
+def read_upload(uploaded_file):
+    """Load a CSV or Parquet upload into a DataFrame."""
+    name = uploaded_file.name.lower()
+    if name.endswith(".parquet"):
+        try:
+            return pd.read_parquet(io.BytesIO(uploaded_file.getvalue()))
+        except ImportError:
+            raise ValueError("Parquet import needs pyarrow (pip install pyarrow)")
+    return pd.read_csv(uploaded_file)
+
+
+# Validation helpers (vectorized over the whole upload)
+
+def _reject(reasons, mask, message):
+    # First failing rule wins, so each rejected row carries a single reason
+    reasons[mask & (reasons == "")] = message
+
+
+def _as_int(df, column, reasons, required=True, min_value=None, max_value=None):
+    if column not in df:
+        df[column] = pd.NA
+    values = pd.to_numeric(df[column], errors="coerce")
+    missing = values.isna()
+    if required:
+        _reject(reasons, missing, f"{column} is required")
+    _reject(reasons, ~missing & (values % 1 != 0), f"{column} must be a whole number")
+    if min_value is not None:
+        _reject(reasons, ~missing & (values < min_value), f"{column} must be at least {min_value}")
+    if max_value is not None:
+        _reject(reasons, ~missing & (values > max_value), f"{column} cannot exceed {max_value}")
+    df[column] = values.where(values % 1 == 0).astype("Int64")
+
+
+def _as_text(df, column, reasons, required=True, default=None):
+    if column not in df:
+        df[column] = default
+    values = df[column].astype("string").str.strip()
+    if default is not None:
+        values = values.fillna(default).replace("", default)
+    if required:
+        _reject(reasons, values.isna() | (values == ""), f"{column} is required")
+    df[column] = values
+
+
+def _as_date(df, column, reasons, default=None):
+    if column not in df:
+        df[column] = default
+    raw = df[column]
+    values = pd.to_datetime(raw, errors="coerce")
+    _reject(reasons, raw.notna() & values.isna(), f"{column} is not a valid date")
+    values = values.dt.date
+    if default is not None:
+        values = values.where(values.notna(), default)
+    df[column] = values
+
+
+def _existing(table, column, values):
+    # Which of these key values already exist in table.column
+    values = list(pd.unique(values.dropna()))
+    found = set()
+    for i in range(0, len(values), LOOKUP_CHUNK):
+        chunk = [v.item() if hasattr(v, "item") else v for v in values[i:i + LOOKUP_CHUNK]]
+        placeholders = ", ".join(["%s"] * len(chunk))
+        df = db.execute_query(
+            f"SELECT {column} FROM {table} WHERE {column} IN ({placeholders})",
+            tuple(chunk), fetch=True, use_cache=False,
+        )
+        found.update(df[column].tolist())
+    return found
+
+
+def _check_unique(df, column, reasons, table):
+    # Unique key: reject repeats inside the file and values already in the table
+    lowered = df[column].str.lower()
+    _reject(reasons, lowered.duplicated(keep="first") & lowered.notna(), f"Duplicate {column} in file")
+    taken = {str(v).lower() for v in _existing(table, column, df[column])}
+    _reject(reasons, lowered.isin(taken), f"{column} already exists")
+
+
+def _check_foreign_key(df, column, reasons, table):
+    present = _existing(table, column, df[column])
+    _reject(reasons, df[column].notna() & ~df[column].isin(present), f"{column} does not exist in {table}")
+
+
+def _check_stacks(df, reasons):
+    # Rows for the same (PlayerID, ItemID) stack are added together on import, so
+    # the file's total plus the stored quantity must stay within the item limit
+    # (trg_validate_item_quantity_update would fail the whole batch otherwise)
+    ok = reasons == ""
+    pairs = df.loc[ok, ["PlayerID", "ItemID"]].astype("int64")
+    if pairs.empty:
+        return
+    totals = df.loc[ok].groupby(["PlayerID", "ItemID"])["Quantity"].transform("sum")
+    unique = list(pairs.drop_duplicates().itertuples(index=False, name=None))
+    held = {}
+    for i in range(0, len(unique), LOOKUP_CHUNK):
+        chunk = unique[i:i + LOOKUP_CHUNK]
+        stacks = db.execute_query(
+            f"SELECT PlayerID, ItemID, Quantity FROM playeritem "
+            f"WHERE (PlayerID, ItemID) IN ({', '.join(['(%s, %s)'] * len(chunk))})",
+            tuple(value for pair in chunk for value in pair), fetch=True, use_cache=False,
+        )
+        held.update({(player, item): quantity for player, item, quantity in stacks.itertuples(index=False, name=None)})
+    current = pd.Series([held.get(pair) or 0 for pair in pairs.itertuples(index=False, name=None)],
+                        index=pairs.index)
+    over = current + totals > MAX_ITEM_QUANTITY
+    reasons[over[over].index] = (
+        current[over].astype(str) + " held + " + totals[over].astype(str)
+        + f" in file; stack would exceed {MAX_ITEM_QUANTITY}"
+    )
+
+
+def _rank_ids(scores):
+    # RankID for each TotalScore, from the ranks thresholds (as trg_auto_rank_update would)
+    ranks = db.execute_query("SELECT RankID, RankScore FROM ranks ORDER BY RankScore", fetch=True)
+    if ranks.empty:
+        return pd.Series(1, index=scores.index)
+    positions = ranks["RankScore"].searchsorted(scores.fillna(0).astype("int64").to_numpy(), side="right") - 1
+    rank_ids = ranks["RankID"].to_numpy()[positions.clip(min=0)]
+    return pd.Series(rank_ids, index=scores.index)
+
+
+def validate(kind, upload):
+    """Split an upload into (valid rows ready to insert, rejected rows with a Reason column).
+
+    Player Items rows for the same stack are merged into one valid row.
+    """
+    table, required, _ = IMPORT_SPECS[kind]
+    df = upload.copy()
+    df.columns = [str(c).strip() for c in df.columns]
+    reasons = pd.Series("", index=df.index, dtype=object)
+
+    missing = [c for c in required if c not in df.columns]
+    if missing:
+        raise ValueError(f"Missing required column(s): {', '.join(missing)}")
+
+    if kind == "Players":
+        _as_text(df, "Username", reasons)
+        _as_text(df, "Email", reasons)
+        _reject(reasons, ~df["Email"].str.contains("@", na=False), "Email is not valid")
+        _as_text(df, "Avatar", reasons, required=False, default="default.png")
+        _as_date(df, "RegistrationDate", reasons, default=date.today())
+        _as_int(df, "TotalScore", reasons, required=False, min_value=0)
+        df["TotalScore"] = df["TotalScore"].fillna(0)
+        _check_unique(df, "Username", reasons, table)
+        _check_unique(df, "Email", reasons, table)
+        df["RankID"] = _rank_ids(df["TotalScore"])
+        columns = ["Username", "Email", "RegistrationDate", "TotalScore", "Avatar", "RankID"]
+
+    elif kind == "Games":
+        _as_text(df, "Title", reasons)
+        _as_text(df, "Genre", reasons, required=False)
+        _as_int(df, "MaxPlayers", reasons, required=False, min_value=1)
+        _as_date(df, "ReleaseDate", reasons)
+        columns = ["Title", "Genre", "MaxPlayers", "ReleaseDate"]
+
+    elif kind == "Items":
+        _as_text(df, "ItemName", reasons)
+        _as_text(df, "ItemType", reasons, required=False)
+        _as_text(df, "Rarity", reasons, required=False)
+        columns = ["ItemName", "ItemType", "Rarity"]
+
+    elif kind == "Player Items":
+        _as_int(df, "PlayerID", reasons)
+        _as_int(df, "ItemID", reasons)
+        _as_int(df, "Quantity", reasons, min_value=MIN_ITEM_QUANTITY, max_value=MAX_ITEM_QUANTITY)
+        _as_date(df, "DateObtained", reasons, default=date.today())
+        _check_foreign_key(df, "PlayerID", reasons, "player")
+        _check_foreign_key(df, "ItemID", reasons, "item")
+        _check_stacks(df, reasons)
+        columns = ["PlayerID", "ItemID", "Quantity", "DateObtained"]
+
+    elif kind == "Session Scores":
+        _as_int(df, "SessionID", reasons)
+        _as_int(df, "PlayerID", reasons)
+        _as_int(df, "Score", reasons, min_value=0)
+        _as_int(df, "Position", reasons, required=False, min_value=1)
+        _check_foreign_key(df, "SessionID", reasons, "multiplayersession")
+        _check_foreign_key(df, "PlayerID", reasons, "player")
+        columns = ["SessionID", "PlayerID", "Score", "Position"]
+
+    # Explicit primary keys are optional; keep them only when given for every row
+    id_column = {"Games": "GameID", "Items": "ItemID"}.get(kind)
+    if id_column and id_column in df.columns and df[id_column].notna().all():
+        _as_int(df, id_column, reasons, min_value=1)
+        _reject(reasons, df[id_column].duplicated(keep="first"), f"Duplicate {id_column} in file")
+        taken = _existing(table, id_column, df[id_column])
+        _reject(reasons, df[id_column].isin(taken), f"{id_column} already exists")
+        columns = [id_column] + columns
+
+    rejected = upload.loc[reasons != ""].copy()
+    rejected["Reason"] = reasons[reasons != ""]
+    valid = df.loc[reasons == "", columns]
+    if kind == "Player Items":
+        # One row per stack (as inventory.award_items does), in key order, so no batch
+        # updates the same stack twice
+        valid = valid.groupby(["PlayerID", "ItemID"], as_index=False, sort=True).agg(
+            {"Quantity": "sum", "DateObtained": "max"})
+    return valid, rejected
+
+
+def _python_rows(df):
+    # mysql.connector only accepts plain Python values
+    return df.astype(object).where(df.notna(), None).values.tolist()
+
+
+def import_rows(kind, valid, batch_size=BULK_BATCH_SIZE, progress=None):
+    """Insert validated rows in batches, one executemany and commit per batch.
+
+    Kinds in ON_DUPLICATE are upserts: a row whose key exists updates it.
+    A batch that hits a constraint (e.g. a username taken after validation) is
+    retried row by row so only the offending rows are rejected.
+    """
+    table = IMPORT_SPECS[kind][0]
+    columns = list(valid.columns)
+    query = (
+        f"INSERT INTO {table} ({', '.join(columns)}) "
+        f"VALUES ({', '.join(['%s'] * len(columns))})"
+    )
+    if kind in ON_DUPLICATE:
+        query += f" ON DUPLICATE KEY UPDATE {ON_DUPLICATE[kind]}"
+    rows = _python_rows(valid)
+    inserted, failed = 0, []
+    start = time.perf_counter()
+
+    with db.connection() as conn:
+        cursor = conn.cursor()
+        try:
+            for offset in range(0, len(rows), batch_size):
+                batch = rows[offset:offset + batch_size]
+                try:
+                    cursor.executemany(query, batch)
+                    conn.commit()
+                    inserted += len(batch)
+                except Error:
+                    conn.rollback()
+                    for row in batch:
+                        try:
+                            cursor.execute(query, row)
+                            conn.commit()
+                            inserted += 1
+                        except Error as e:
+                            conn.rollback()
+                            failed.append(dict(zip(columns, row), Reason=str(e)))
+                if progress:
+                    progress(min(offset + batch_size, len(rows)) / max(len(rows), 1))
+        finally:
+            cursor.close()
+            db.cache.invalidate(write_tables(query))
+
+    elapsed = time.perf_counter() - start
+    return {
+        "inserted": inserted,
+        "failed": pd.DataFrame(failed),
+        "seconds": elapsed,
+        "rows_per_sec": inserted / elapsed if elapsed > 0 else 0.0,
+    }
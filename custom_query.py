@@ -0,0 +1,181 @@
+import contextvars
+import json
+import os
+import re
+import threading
+import time
+
+from mysql.connector import Error, errorcode
+
+import db
+from query_cache import write_tables
+from query_stats import payload_bytes
+
+# Guards for the Advanced Queries "Custom Query" box
+CUSTOM_ROW_LIMIT = int(os.getenv("DB_CUSTOM_ROW_LIMIT", "1000"))           # rows returned before the result is cut off
+CUSTOM_TIMEOUT = float(os.getenv("DB_CUSTOM_TIMEOUT", "15"))               # seconds (server MAX_EXECUTION_TIME)
+CUSTOM_GRACE = float(os.getenv("DB_CUSTOM_GRACE", "5"))                    # extra seconds before the client kills it
+CONFIRM_ROWS = int(os.getenv("DB_CUSTOM_CONFIRM_ROWS", "1000000"))         # estimates above these ask before running
+CONFIRM_COST = float(os.getenv("DB_CUSTOM_CONFIRM_COST", "1000000"))
+
+# Statements EXPLAIN accepts
+_EXPLAINABLE = re.compile(r"^(SELECT|WITH|TABLE|INSERT|REPLACE|UPDATE|DELETE)\b", re.IGNORECASE)
+# Leading whitespace, comments and opening parentheses ("/*! ... */" is executable, not a comment)
+_LEADING = re.compile(r"^(?:\s+|--[^\n]*(?:\n|$)|#[^\n]*(?:\n|$)|/\*(?!!).*?\*/|\()*", re.DOTALL)
+
+
+def _walk(node):
+    if isinstance(node, dict):
+        yield node
+        for value in node.values():
+            yield from _walk(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _walk(value)
+
+
+def estimate(query):
+    """EXPLAIN the statement without running it.
+
+    Returns {"rows", "cost", "plan", "risky"}: the largest row count the optimizer
+    expects any step to produce, its total cost, and the tabular plan. None
+    for statements EXPLAIN does not accept (SHOW, CALL, DDL, ...): their cost
+    is unknown, and callers should ask before running them.
+    """
+    if not _EXPLAINABLE.match(query[_LEADING.match(query).end():]):
+        return None
+    plan = db.execute_query(f"EXPLAIN {query}", fetch=True, use_cache=False)
+    document = json.loads(db.execute_query(f"EXPLAIN FORMAT=JSON {query}", fetch=True, use_cache=False).iloc[0, 0])
+    block = document.get("query_block", {})
+    cost = float(block.get("cost_info", {}).get("query_cost", 0))
+    rows = max((int(node.get("rows_produced_per_join", node.get("rows_examined_per_scan", 0)))
+                for node in _walk(block) if "table_name" in node), default=0)
+    return {"rows": rows, "cost": cost, "plan": plan, "risky": rows > CONFIRM_ROWS or cost > CONFIRM_COST}
+
+
+class QueryRun:
+    """One custom query on its own connection, run in a background thread.
+
+    Top-level SELECT results stop at row_limit (sql_select_limit, plus a capped
+    fetch). Reads are stopped by the server after timeout seconds
+    (MAX_EXECUTION_TIME); every statement is killed from the client once
+    timeout + CUSTOM_GRACE seconds pass. cancel() kills it at any time.
+    """
+
+    def __init__(self, query, row_limit=CUSTOM_ROW_LIMIT, timeout=CUSTOM_TIMEOUT):
+        self.query = query
+        self.row_limit = row_limit
+        self.timeout = timeout
+        self.connection_id = None
+        self.started = time.monotonic()
+        self.finished = None
+        self.columns = None           # None: the statement returned no result set
+        self.rows = []
+        self.truncated = False
+        self.rowcount = None
+        self.error = None
+        self.cancelled = False
+        self.timed_out = False
+        self._connected = threading.Event()
+        self._done = threading.Event()
+        # The session's context goes along, so its read-your-writes tracking sees a write
+        self._thread = threading.Thread(target=contextvars.copy_context().run, args=(self._run,),
+                                        name="custom-query", daemon=True)
+        self._thread.start()
+        self._connected.wait(db.POOL_TIMEOUT)
+
+    @property
+    def status(self):
+        if not self._done.is_set():
+            return "running"
+        if self.cancelled:
+            return "cancelled"
+        if self.timed_out or getattr(self.error, "errno", None) == errorcode.ER_QUERY_TIMEOUT:
+            return "timed out"
+        return "failed" if self.error is not None else "done"
+
+    def running(self):
+        return not self._done.is_set()
+
+    def elapsed(self):
+        return (self.finished or time.monotonic()) - self.started
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def cancel(self):
+        if self.running():
+            self.cancelled = True
+            self._kill()
+
+    def _expire(self):
+        if self.running():
+            self.timed_out = True
+            self._kill()
+
+    def _kill(self):
+        # Sent from a pooled connection; the query's own connection is blocked in it
+        if self.connection_id is None:
+            return
+        with db.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(f"KILL QUERY {int(self.connection_id)}")
+            except Error as e:
+                if e.errno != errorcode.ER_NO_SUCH_THREAD:     # already finished
+                    raise
+            finally:
+                cursor.close()
+
+    def _run(self):
+        conn = None
+        timer = threading.Timer(self.timeout + CUSTOM_GRACE, self._expire)
+        timer.daemon = True
+        wrote = False
+        try:
+            # Always the primary, and never a pooled connection: a runaway query
+            # holds only this one, and KILL QUERY needs its ID
+            conn = db.connect_with_backoff(dict(db.DB_CONFIG))
+            self.connection_id = conn.connection_id
+            self._connected.set()
+            cursor = conn.cursor(buffered=False)
+            cursor.execute(f"SET SESSION max_execution_time = {int(self.timeout * 1000)}, "
+                           f"sql_select_limit = {int(self.row_limit) + 1}")
+            timer.start()
+            cursor.execute(self.query)
+            if cursor.with_rows:
+                self.columns = [desc[0] for desc in cursor.description]
+                rows = cursor.fetchmany(self.row_limit + 1)
+                self.truncated = len(rows) > self.row_limit
+                self.rows = rows[:self.row_limit]
+                if self.truncated:
+                    # The statement's own LIMIT can exceed sql_select_limit: stop the rest at the server
+                    try:
+                        self._kill()
+                    except Error:
+                        pass           # closing the connection below ends it too
+            else:
+                conn.commit()
+                wrote = True
+                self.rowcount = cursor.rowcount
+        except Error as e:
+            self.error = e
+        finally:
+            timer.cancel()
+            self._connected.set()
+            if conn is not None:
+                try:
+                    conn.close()       # uncommitted work (a killed write) is rolled back
+                except Error:
+                    pass
+            if wrote:
+                db.cache.invalidate(write_tables(self.query))
+            self.finished = time.monotonic()
+            error = None if self.error is None else f"{type(self.error).__name__}: {self.error.errno}"
+            db.stats.record(self.query, None, self.elapsed() * 1000, len(self.rows), payload_bytes(self.rows),
+                            0.0, error)
+            self._done.set()
+
+    def frame(self):
+        import pandas as pd
+        return pd.DataFrame(self.rows, columns=self.columns)
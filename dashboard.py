@@ -0,0 +1,44 @@
+import argparse
+import time
+
+import db
+
+# All Home metrics in one round trip, from the trigger-maintained counter tables
+_STATS_QUERY = """
+    SELECT StatName, StatValue, UpdatedAt FROM dashboard_stats
+    UNION ALL
+    SELECT 'scores_today', ScoresSubmitted, UpdatedAt FROM dashboard_daily WHERE StatDate = CURDATE()
+    UNION ALL
+    SELECT 'points_today', PointsScored, UpdatedAt FROM dashboard_daily WHERE StatDate = CURDATE()
+"""
+
+STAT_NAMES = [
+    "players", "games", "sessions", "active_sessions",
+    "items_awarded", "achievements_earned", "scores_today", "points_today",
+]
+
+
+def get_stats():
+    """Returns (stats dict, last-updated timestamp) for the Home dashboard."""
+    df = db.execute_query(_STATS_QUERY, fetch=True)
+    stats = dict.fromkeys(STAT_NAMES, 0)
+    stats.update({name: int(value) for name, value in zip(df["StatName"], df["StatValue"])})
+    updated_at = df["UpdatedAt"].max() if not df.empty else None
+    return stats, updated_at
+
+
+def refresh():
+    """Recount the totals from the base tables (backfill / recovery). Returns seconds taken."""
+    start = time.perf_counter()
+    db.call_procedure("sp_refresh_dashboard_stats", [])
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dashboard counter maintenance")
+    parser.add_argument("command", choices=["refresh"])
+    args = parser.parse_args()
+
+    if args.command == "refresh":
+        seconds = refresh()
+        print(f"Recounted dashboard totals in {seconds:.2f}s")
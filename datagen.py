@@ -0,0 +1,280 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import dashboard
+import db
+
+# Row volumes per preset; any of them can be overridden on the command line
+SCALES = {
+    "small": {"players": 10_000, "games": 100, "items": 500,
+              "player_sessions": 100_000, "player_items": 500_000},
+    "medium": {"players": 100_000, "games": 500, "items": 2_000,
+               "player_sessions": 1_000_000, "player_items": 5_000_000},
+    "large": {"players": 1_000_000, "games": 1_000, "items": 5_000,
+              "player_sessions": 10_000_000, "player_items": 50_000_000},
+}
+GENERATE_BATCH = 50_000        # rows generated in memory at a time
+INSERT_BATCH = 5_000           # rows per multi-row INSERT
+
+LEVELS_PER_GAME = 10
+PLAYERS_PER_SESSION = (2, 6)   # inclusive range
+OPEN_SESSION_RATE = 0.001      # sessions left without an EndTime
+ACHIEVEMENT_RATE = 0.3         # chance a player earns the first achievement; halves for each next one
+
+GENRES = ["Arcade", "Action", "Puzzle", "Racing", "Shooter", "Platformer", "Strategy", "Sports"]
+GENRE_WEIGHTS = [0.25, 0.2, 0.12, 0.1, 0.12, 0.08, 0.08, 0.05]
+ITEM_TYPES = ["Weapon", "Armor", "Consumable", "Accessory"]
+RARITIES = ["Common", "Uncommon", "Rare", "Epic", "Mythic"]
+RARITY_WEIGHTS = [0.5, 0.25, 0.15, 0.07, 0.03]
+DIFFICULTIES = ["Easy", "Medium", "Hard", "Expert"]
+
+
+class Popularity:
+    """Skewed picks from a range of IDs: a few IDs get most of the traffic.
+
+    skew=1 is uniform; larger values concentrate picks on fewer IDs. The
+    popular IDs are shuffled so they are not simply the oldest rows.
+    """
+
+    def __init__(self, rng, first_id, count, skew):
+        self.rng = rng
+        self.skew = skew
+        self.ids = first_id + rng.permutation(count)
+
+    def pick(self, size):
+        positions = (len(self.ids) * self.rng.random(size) ** self.skew).astype(np.int64)
+        return self.ids[positions]
+
+
+def _next_id(table, column):
+    df = db.execute_query(f"SELECT IFNULL(MAX({column}), 0) + 1 AS next_id FROM {table}", fetch=True, use_cache=False)
+    return int(df["next_id"].iloc[0])
+
+
+def _random_times(rng, size, days, fmt="%Y-%m-%d %H:%M:%S"):
+    # Uniform timestamps over the last `days` days, as strings mysql.connector can send as-is
+    offsets = pd.to_timedelta(rng.integers(0, days * 86400, size), unit="s")
+    return (pd.Timestamp.now().floor("s") - offsets).strftime(fmt)
+
+
+def _rows(df):
+    return df.astype(object).where(df.notna(), None).values.tolist()
+
+
+class Loader:
+    """Multi-row INSERTs on one connection, with per-table row counts and throughput."""
+
+    def __init__(self, conn, batch_size=INSERT_BATCH):
+        self.conn = conn
+        self.cursor = conn.cursor()
+        self.batch_size = batch_size
+        self.counts = {}
+        # Generated foreign keys are valid by construction. Unique checks stay on:
+        # trg_first_session relies on them for its INSERT IGNORE.
+        self.cursor.execute("SET SESSION foreign_key_checks = 0")
+
+    def insert(self, table, df):
+        query = f"INSERT INTO {table} ({', '.join(df.columns)}) VALUES ({', '.join(['%s'] * len(df.columns))})"
+        rows = _rows(df)
+        for offset in range(0, len(rows), self.batch_size):
+            # executemany rewrites this into one multi-row INSERT per batch
+            self.cursor.executemany(query, rows[offset:offset + self.batch_size])
+            self.conn.commit()
+        self.counts[table] = self.counts.get(table, 0) + len(rows)
+
+    def close(self):
+        self.cursor.execute("SET SESSION foreign_key_checks = 1")
+        self.cursor.close()
+
+
+def _batches(first_id, count):
+    for start in range(0, count, GENERATE_BATCH):
+        yield first_id + start, min(GENERATE_BATCH, count - start)
+
+
+def _report(table, started, loader):
+    elapsed = time.perf_counter() - started
+    rows = loader.counts.get(table, 0)
+    print(f"  {table}: {rows:,} rows in {elapsed:.1f}s ({rows / elapsed if elapsed > 0 else 0:,.0f} rows/s)")
+
+
+def generate_games(loader, rng, count):
+    first = _next_id("game", "GameID")
+    started = time.perf_counter()
+    ids = np.arange(first, first + count)
+    loader.insert("game", pd.DataFrame({
+        "GameID": ids,
+        "Title": [f"Game {i}" for i in ids],
+        "Genre": rng.choice(GENRES, count, p=GENRE_WEIGHTS),
+        "MaxPlayers": rng.choice([2, 4, 6, 8, 10], count),
+        "ReleaseDate": _random_times(rng, count, 20 * 365, "%Y-%m-%d"),
+    }))
+    levels = pd.DataFrame({
+        "GameID": np.repeat(ids, LEVELS_PER_GAME),
+        "LevelNumber": np.tile(np.arange(1, LEVELS_PER_GAME + 1), count),
+    })
+    levels["Difficulty"] = np.array(DIFFICULTIES)[(levels["LevelNumber"] - 1) * len(DIFFICULTIES) // LEVELS_PER_GAME]
+    levels["Description"] = "Level " + levels["LevelNumber"].astype(str)
+    loader.insert("level", levels)
+    _report("game", started, loader)
+    return first
+
+
+def generate_items(loader, rng, count):
+    first = _next_id("item", "ItemID")
+    started = time.perf_counter()
+    ids = np.arange(first, first + count)
+    types = rng.choice(ITEM_TYPES, count)
+    loader.insert("item", pd.DataFrame({
+        "ItemID": ids,
+        "ItemName": [f"{t} {i}" for t, i in zip(types, ids)],
+        "ItemType": types,
+        "Rarity": rng.choice(RARITIES, count, p=RARITY_WEIGHTS),
+    }))
+    _report("item", started, loader)
+    return first
+
+
+def generate_players(loader, rng, count):
+    first = _next_id("player", "PlayerID")
+    ranks = db.execute_query("SELECT RankID, RankScore FROM ranks ORDER BY RankScore", fetch=True, use_cache=False)
+    started = time.perf_counter()
+    for start, size in _batches(first, count):
+        ids = np.arange(start, start + size)
+        # Long-tailed scores: most players near the bottom ranks, a few far ahead
+        scores = np.minimum(rng.lognormal(6.5, 1.3, size), 1_000_000).astype(np.int64)
+        if ranks.empty:
+            rank_ids = np.ones(size, dtype=np.int64)
+        else:
+            positions = np.searchsorted(ranks["RankScore"].to_numpy(), scores, side="right") - 1
+            rank_ids = ranks["RankID"].to_numpy()[positions.clip(min=0)]
+        loader.insert("player", pd.DataFrame({
+            "PlayerID": ids,
+            "Username": [f"gen_player_{i}" for i in ids],
+            "Email": [f"gen_player_{i}@example.com" for i in ids],
+            "RegistrationDate": _random_times(rng, size, 3 * 365, "%Y-%m-%d"),
+            "TotalScore": scores,
+            "Avatar": "default.png",
+            "RankID": rank_ids,
+        }))
+    _report("player", started, loader)
+    return first
+
+
+def generate_sessions(loader, rng, player_sessions, games, players):
+    """Multiplayer sessions plus their player rows, positions ranked by score within each session."""
+    low, high = PLAYERS_PER_SESSION
+    count = max(player_sessions // ((low + high) // 2), 1)
+    first = _next_id("multiplayersession", "SessionID")
+    started = time.perf_counter()
+    for start, size in _batches(first, count):
+        ids = np.arange(start, start + size)
+        start_times = pd.Timestamp.now().floor("s") - pd.to_timedelta(rng.integers(0, 365 * 86400, size), unit="s")
+        end_times = start_times + pd.to_timedelta(rng.integers(5 * 60, 60 * 60, size), unit="s")
+        is_open = rng.random(size) < OPEN_SESSION_RATE
+        sessions = pd.DataFrame({
+            "SessionID": ids,
+            "GameID": games.pick(size),
+            "StartTime": start_times.strftime("%Y-%m-%d %H:%M:%S"),
+            "EndTime": pd.Series(end_times.strftime("%Y-%m-%d %H:%M:%S")).where(~is_open, None).to_numpy(),
+        })
+        loader.insert("multiplayersession", sessions)
+
+        per_session = rng.integers(low, high + 1, size)
+        scores = pd.DataFrame({
+            "SessionID": np.repeat(ids, per_session),
+            "PlayerID": players.pick(int(per_session.sum())),
+        }).drop_duplicates()
+        scores["Score"] = np.minimum(rng.gamma(2.0, 150.0, len(scores)), 5000).astype(np.int64)
+        scores["Position"] = scores.groupby("SessionID")["Score"].rank(method="min", ascending=False).astype("Int64")
+        scores.loc[scores["SessionID"].isin(ids[is_open]), "Position"] = pd.NA
+        loader.insert("playersession", scores)
+    _report("playersession", started, loader)
+
+
+def generate_inventory(loader, rng, player_items, items, first_player, players_count, item_count):
+    """Inventory rows, one per (player, item): item counts per player are long-tailed too."""
+    started = time.perf_counter()
+    per_player = player_items / max(players_count, 1)
+    for start, size in _batches(first_player, players_count):
+        weights = rng.pareto(1.5, size) + 1
+        counts = np.minimum(np.round(weights / weights.mean() * per_player), item_count).astype(np.int64)
+        owned = pd.DataFrame({
+            "PlayerID": np.repeat(np.arange(start, start + size), counts),
+            "ItemID": items.pick(int(counts.sum())),
+        }).drop_duplicates()
+        # Mostly small stacks, inside trg_validate_item_quantity's 1..999
+        owned["Quantity"] = np.minimum(rng.geometric(0.3, len(owned)), 999)
+        owned["DateObtained"] = _random_times(rng, len(owned), 3 * 365, "%Y-%m-%d")
+        loader.insert("playeritem", owned)
+    _report("playeritem", started, loader)
+
+
+def generate_achievements(loader, rng, first_player, players_count):
+    achievements = db.execute_query(
+        "SELECT AchievementID FROM achievement ORDER BY AchievementID", fetch=True, use_cache=False
+    )["AchievementID"].to_numpy()
+    started = time.perf_counter()
+    for start, size in _batches(first_player, players_count):
+        earned = []
+        for n, achievement_id in enumerate(achievements):
+            players = np.arange(start, start + size)[rng.random(size) < ACHIEVEMENT_RATE / 2 ** n]
+            earned.append(pd.DataFrame({"PlayerID": players, "AchievementID": achievement_id}))
+        if earned:
+            earned = pd.concat(earned, ignore_index=True)
+            earned["DateEarned"] = _random_times(rng, len(earned), 365)
+            loader.insert("playerachievement", earned)
+    _report("playerachievement", started, loader)
+
+
+def generate(players, games, items, player_sessions, player_items, skew=1.5, seed=None, batch_size=INSERT_BATCH):
+    """Append synthetic rows to every table, then rebuild the trigger-maintained summaries.
+
+    Triggers still fire for every row, so today's dashboard_daily counters include
+    the generated scores. Returns {table: rows inserted}.
+    """
+    rng = np.random.default_rng(seed)
+    started = time.perf_counter()
+    with db.connection() as conn:
+        loader = Loader(conn, batch_size)
+        try:
+            first_game = generate_games(loader, rng, games)
+            first_item = generate_items(loader, rng, items)
+            first_player = generate_players(loader, rng, players)
+            generate_achievements(loader, rng, first_player, players)
+            generate_sessions(loader, rng, player_sessions,
+                              Popularity(rng, first_game, games, skew), Popularity(rng, first_player, players, skew))
+            generate_inventory(loader, rng, player_items, Popularity(rng, first_item, items, skew),
+                               first_player, players, items)
+        finally:
+            loader.close()
+
+    print("Rebuilding leaderboard and dashboard counters...")
+    db.call_procedure("sp_rebuild_leaderboard", [])
+    dashboard.refresh()
+    for table in loader.counts:
+        db.execute_query(f"ANALYZE TABLE {table}", fetch=True, use_cache=False)
+    db.cache.clear()
+    print(f"Done in {time.perf_counter() - started:.1f}s: " + ", ".join(f"{t}={n:,}" for t, n in loader.counts.items()))
+    return loader.counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fill the database with skewed synthetic data")
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    for option in SCALES["small"]:
+        parser.add_argument(f"--{option.replace('_', '-')}", type=int, help=f"override the preset's {option}")
+    parser.add_argument("--skew", type=float, default=1.5, help="1 = uniform; higher = fewer, busier players/games/items")
+    parser.add_argument("--seed", type=int, help="random seed for a repeatable dataset")
+    parser.add_argument("--batch-size", type=int, default=INSERT_BATCH, help="rows per INSERT")
+    args = parser.parse_args()
+
+    volumes = dict(SCALES[args.scale])
+    for option in volumes:
+        if getattr(args, option) is not None:
+            volumes[option] = getattr(args, option)
+    print(f"Generating {args.scale}: " + ", ".join(f"{k}={v:,}" for k, v in volumes.items()))
+    generate(skew=args.skew, seed=args.seed, batch_size=args.batch_size, **volumes)
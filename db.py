@@ -0,0 +1,837 @@
+import contextvars
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+import mysql.connector
+from mysql.connector import Error, errorcode
+from mysql.connector.errors import InterfaceError, OperationalError, PoolError
+
+from query_cache import QueryCache, cacheable_tables, routine_write_tables, write_tables
+from query_stats import QueryStats, payload_bytes
+
+# Database connection settings (the DB_* variables declared in vercel.json / .env.example)
+DB_CONFIG = {
+    "host": os.getenv("DB_HOST", "localhost"),
+    "port": int(os.getenv("DB_PORT", "3306")),
+    "database": os.getenv("DB_NAME", "mini_project_25"),
+    "user": os.getenv("DB_USER", "root"),
+    "password": os.getenv("DB_PASSWORD", ""),
+}
+
+# Pool settings (override through the environment)
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))            # seconds to wait for a free connection
+POOL_MAX_LIFETIME = float(os.getenv("DB_POOL_MAX_LIFETIME", "1800"))  # seconds before a connection is recycled
+
+# Health-check policy: only ping connections that sat idle for a while, and
+# replace a dead one straight away with a short, capped backoff between attempts
+HEALTH_CHECK_IDLE = float(os.getenv("DB_HEALTH_CHECK_IDLE", "30"))   # seconds idle before a ping
+RECONNECT_ATTEMPTS = int(os.getenv("DB_RECONNECT_ATTEMPTS", "3"))
+RECONNECT_BACKOFF = float(os.getenv("DB_RECONNECT_BACKOFF", "0.1"))  # first retry delay, doubled each time
+RECONNECT_BACKOFF_MAX = float(os.getenv("DB_RECONNECT_BACKOFF_MAX", "1.0"))
+
+# Server-side prepared statements: parameterized SELECT/INSERT/UPDATE/DELETE are
+# prepared once per connection and re-executed from a per-connection LRU
+PREPARED_STATEMENTS = os.getenv("DB_PREPARED_STATEMENTS", "1") == "1"
+STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "64"))
+
+# Read replicas, "host[:port],host[:port]" (same database and credentials as the
+# primary). Plain SELECTs go to a replica that is up and caught up; writes,
+# procedures and locking reads stay on the primary. Empty: primary only
+REPLICA_HOSTS = [h.strip() for h in os.getenv("DB_REPLICA_HOSTS", "").split(",") if h.strip()]
+REPLICA_MAX_LAG = float(os.getenv("DB_REPLICA_MAX_LAG", "5"))        # seconds behind before a replica is skipped
+REPLICA_LAG_CHECK = float(os.getenv("DB_REPLICA_LAG_CHECK", "2"))    # seconds between lag checks (0: no checks)
+REPLICA_RETRY = float(os.getenv("DB_REPLICA_RETRY", "10"))           # seconds an unreachable replica is left out
+STICKY_SECONDS = float(os.getenv("DB_STICKY_SECONDS", "5"))          # reads on the primary after a write, without lag checks
+_REPLICA_SAFE = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+_LOCKING_READ = re.compile(r"\bFOR\s+(UPDATE|SHARE)\b|\bLOCK\s+IN\s+SHARE\s+MODE\b", re.IGNORECASE)
+_PREPARABLE = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|REPLACE)\b", re.IGNORECASE)
+
+# Client errors meaning the server connection is gone
+CONNECTION_LOST_ERRORS = {
+    errorcode.CR_SERVER_GONE_ERROR,
+    errorcode.CR_SERVER_LOST,
+    errorcode.CR_SERVER_LOST_EXTENDED,
+}
+
+# Errors meaning a server cannot be reached at all
+CONNECT_ERRORS = {
+    errorcode.CR_CONNECTION_ERROR,
+    errorcode.CR_CONN_HOST_ERROR,
+    errorcode.CR_UNKNOWN_HOST,
+    errorcode.ER_CON_COUNT_ERROR,
+}
+
+
+# Per-thread timing, so each Streamlit rerun can report its own DB overhead
+_local = threading.local()
+
+
+def reset_timing():
+    _local.timing = {
+        "queries": 0, "query_ms": 0.0,
+        "pings": 0, "ping_ms": 0.0,
+        "reconnects": 0, "reconnect_ms": 0.0,
+    }
+
+
+def page_timing():
+    if not hasattr(_local, "timing"):
+        reset_timing()
+    return dict(_local.timing)
+
+
+def _record(counter, ms_key, elapsed):
+    if not hasattr(_local, "timing"):
+        reset_timing()
+    _local.timing[counter] += 1
+    _local.timing[ms_key] += elapsed * 1000
+
+
+def connect_with_backoff(connect_args, attempts=RECONNECT_ATTEMPTS):
+    delay = RECONNECT_BACKOFF
+    for attempt in range(1, attempts + 1):
+        try:
+            return mysql.connector.connect(**connect_args)
+        except Error:
+            if attempt == attempts:
+                raise
+            time.sleep(delay)
+            delay = min(delay * 2, RECONNECT_BACKOFF_MAX)
+
+
+class ConnectionPool:
+    """Fixed-size pool of MySQL connections with checkout timeout and max lifetime."""
+
+    def __init__(self, size=POOL_SIZE, timeout=POOL_TIMEOUT, max_lifetime=POOL_MAX_LIFETIME,
+                 health_check_idle=HEALTH_CHECK_IDLE, **connect_args):
+        self.size = size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.health_check_idle = health_check_idle
+        self.connect_args = connect_args or dict(DB_CONFIG)
+
+        self._idle = deque()          # connections ready to be handed out
+        self._created = {}            # id(conn) -> created_at for every open connection
+        self._last_used = {}          # id(conn) -> when it was last returned to the pool
+        self._opening = 0             # slots reserved for connections being opened
+        self._statements = {}         # id(conn) -> OrderedDict(sql -> (prepared cursor, sql))
+        self._cond = threading.Condition()
+
+        # Metrics
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.peak_in_use = 0
+        self.pings = 0
+        self.ping_failures = 0
+        self.reconnects = 0
+        self.stmt_prepares = 0
+        self.stmt_reuses = 0
+        self.stmt_evictions = 0
+
+    @property
+    def in_use(self):
+        return len(self._created) + self._opening - len(self._idle)
+
+    def _discard(self, conn):
+        self._created.pop(id(conn), None)
+        self._last_used.pop(id(conn), None)
+        self._statements.pop(id(conn), None)   # closed along with the connection
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _expired(self, conn):
+        created = self._created.get(id(conn), 0)
+        return time.monotonic() - created > self.max_lifetime
+
+    def _take(self, deadline):
+        # Returns an idle connection, or None once a slot is reserved for a new one
+        with self._cond:
+            while True:
+                # Reuse the most recently returned connection, dropping expired ones
+                while self._idle:
+                    conn = self._idle.pop()
+                    if self._expired(conn):
+                        self._discard(conn)
+                        continue
+                    return conn
+
+                if len(self._created) + self._opening < self.size:
+                    self._opening += 1
+                    return None
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolError(
+                        f"Timed out after {self.timeout:.1f}s waiting for a database connection "
+                        f"({self.size} in use)"
+                    )
+                self._cond.wait(remaining)
+
+    def _open_reserved(self):
+        # Fills a slot reserved by _take (or _replace) with a fresh connection
+        try:
+            conn = connect_with_backoff(self.connect_args)
+        finally:
+            with self._cond:
+                self._opening -= 1
+                self._cond.notify()
+        with self._cond:
+            now = time.monotonic()
+            self._created[id(conn)] = now
+            self._last_used[id(conn)] = now
+        return conn
+
+    def _healthy(self, conn):
+        # Connections used recently are trusted; only long-idle ones get a ping
+        idle_for = time.monotonic() - self._last_used.get(id(conn), 0)
+        if idle_for < self.health_check_idle:
+            return True
+
+        start = time.perf_counter()
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Error:
+            self.ping_failures += 1
+            return False
+        finally:
+            self.pings += 1
+            _record("pings", "ping_ms", time.perf_counter() - start)
+
+    def _replace(self, conn):
+        # Swap a dead connection for a new one without giving up its slot
+        with self._cond:
+            self._discard(conn)
+            self._opening += 1
+            self.reconnects += 1
+        start = time.perf_counter()
+        try:
+            return self._open_reserved()
+        finally:
+            _record("reconnects", "reconnect_ms", time.perf_counter() - start)
+
+    def acquire(self):
+        start = time.monotonic()
+        conn = self._take(start + self.timeout)
+        if conn is None:
+            conn = self._open_reserved()
+        elif not self._healthy(conn):
+            conn = self._replace(conn)
+        with self._cond:
+            return self._checked_out(conn, start)
+
+    def _checked_out(self, conn, start):
+        waited = time.monotonic() - start
+        self.checkouts += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        self.peak_in_use = max(self.peak_in_use, self.in_use)
+        return conn
+
+    def prepared_cursor(self, conn, sql):
+        """Prepared cursor for sql on conn, reused while it stays in the connection's LRU.
+
+        Returns (cursor, operation); executing the same operation object on the
+        cursor skips the re-prepare.
+        """
+        with self._cond:
+            statements = self._statements.setdefault(id(conn), OrderedDict())
+            entry = statements.get(sql)
+            if entry is not None:
+                statements.move_to_end(sql)
+                self.stmt_reuses += 1
+                return entry
+            self.stmt_prepares += 1
+            evicted = []
+            while len(statements) >= STATEMENT_CACHE_SIZE:
+                evicted.append(statements.popitem(last=False)[1][0])
+                self.stmt_evictions += 1
+
+        for cursor in evicted:
+            try:
+                cursor.close()    # deallocates the server-side statement
+            except Error:
+                pass
+        entry = (conn.cursor(prepared=True), sql)
+        with self._cond:
+            self._statements[id(conn)][sql] = entry
+        return entry
+
+    def forget_statement(self, conn, sql):
+        with self._cond:
+            entry = self._statements.get(id(conn), {}).pop(sql, None)
+        if entry is not None:
+            try:
+                entry[0].close()
+            except Error:
+                pass
+
+    def release(self, conn):
+        with self._cond:
+            if id(conn) not in self._created:
+                return
+            if self._expired(conn):
+                self._discard(conn)
+            else:
+                # Never hand out a connection with an open transaction
+                try:
+                    if conn.in_transaction:
+                        conn.rollback()
+                except Error:
+                    self._discard(conn)
+                    self._cond.notify()
+                    return
+                self._last_used[id(conn)] = time.monotonic()
+                self._idle.append(conn)
+            self._cond.notify()
+
+    def invalidate(self, conn):
+        # Drop a connection that failed mid-query; the next checkout opens a new one
+        with self._cond:
+            if id(conn) in self._created:
+                self._discard(conn)
+                self.reconnects += 1
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        except (OperationalError, InterfaceError) as e:
+            if e.errno in CONNECTION_LOST_ERRORS:
+                self.invalidate(conn)
+            else:
+                self.release(conn)
+            raise
+        except BaseException:
+            self.release(conn)
+            raise
+        else:
+            self.release(conn)
+
+    def close(self):
+        with self._cond:
+            while self._idle:
+                conn = self._idle.pop()
+                self._discard(conn)
+
+    def stats(self):
+        with self._cond:
+            in_use = self.in_use
+            return {
+                "size": self.size,
+                "in_use": in_use,
+                "idle": len(self._idle),
+                "saturation": in_use / self.size if self.size else 0.0,
+                "peak_in_use": self.peak_in_use,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": (self.total_wait / self.checkouts * 1000) if self.checkouts else 0.0,
+                "max_wait_ms": self.max_wait * 1000,
+                "pings": self.pings,
+                "ping_failures": self.ping_failures,
+                "reconnects": self.reconnects,
+                "stmt_prepares": self.stmt_prepares,
+                "stmt_reuses": self.stmt_reuses,
+                "stmt_evictions": self.stmt_evictions,
+                "stmt_reuse_rate": (
+                    self.stmt_reuses / (self.stmt_reuses + self.stmt_prepares)
+                    if self.stmt_reuses + self.stmt_prepares else 0.0
+                ),
+            }
+
+
+# Process-wide pool, shared by every browser session
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+    return _pool
+
+
+# Process-wide result cache for execute_query reads
+cache = QueryCache()
+
+# Process-wide per-fingerprint query timings (Performance page, slow-query log)
+stats = QueryStats()
+
+
+# Whose writes a read must see: app.py sets one key per browser session. Reads
+# without a key (the web front end, shared caches) must see every write made
+# by this process
+_session = contextvars.ContextVar("db_session", default=None)
+
+
+def set_session(key):
+    _session.set(key)
+
+
+@contextmanager
+def shared_reads():
+    """Reads inside see every write made by this process (for caches shared across sessions)."""
+    token = _session.set(None)
+    try:
+        yield
+    finally:
+        _session.reset(token)
+
+
+class Replica:
+    """One read replica: its own pool and the replication lag last measured on it."""
+
+    def __init__(self, endpoint):
+        host, _, port = endpoint.partition(":")
+        self.endpoint = endpoint
+        self.pool = ConnectionPool(**dict(DB_CONFIG, host=host, port=int(port or DB_CONFIG["port"])))
+        self.lag = None               # Seconds_Behind_Source; None: not replicating
+        self.checked_at = float("-inf")
+        self.down_until = 0.0
+
+        # Metrics
+        self.reads = 0
+        self.failures = 0
+
+    def check(self):
+        now = time.monotonic()
+        with self.pool.connection() as conn:
+            cursor = conn.cursor(dictionary=True, buffered=True)
+            try:
+                try:
+                    cursor.execute("SHOW REPLICA STATUS")
+                except Error as e:
+                    if e.errno != errorcode.ER_PARSE_ERROR:
+                        raise
+                    cursor.execute("SHOW SLAVE STATUS")     # MySQL before 8.0.22
+                row = cursor.fetchone()
+            finally:
+                cursor.close()
+        lag = row and row.get("Seconds_Behind_Source", row.get("Seconds_Behind_Master"))
+        self.lag = None if lag is None else float(lag)
+        self.checked_at = now
+
+    def applied_until(self):
+        # Primary commits made before this (monotonic) time are visible here;
+        # the lag is reported in whole seconds, hence the extra second
+        if self.lag is None:
+            return float("-inf")
+        return self.checked_at - self.lag - 1
+
+    def mark_down(self):
+        self.failures += 1
+        self.down_until = time.monotonic() + REPLICA_RETRY
+        self.pool.close()
+
+    def stats(self):
+        now = time.monotonic()
+        return {
+            "endpoint": self.endpoint,
+            "up": self.down_until <= now,
+            "lag": self.lag,
+            "reads": self.reads,
+            "failures": self.failures,
+            "pool_in_use": self.pool.in_use,
+        }
+
+
+class ReplicaRouter:
+    """Chooses a replica (round robin) for each plain read, or None for the primary.
+
+    A replica is skipped while it is unreachable, lags more than REPLICA_MAX_LAG,
+    or has not yet applied the reading session's last write. With lag checks
+    off, a session reads from the primary for STICKY_SECONDS after it writes.
+    """
+
+    def __init__(self, endpoints):
+        self.replicas = [Replica(e) for e in endpoints]
+        self._lock = threading.Lock()
+        self._next = 0
+        self._last_write = {}         # session key -> monotonic time of its last write
+        self._last_write_any = float("-inf")
+
+        # Metrics
+        self.replica_reads = 0
+        self.primary_reads = 0        # not replica-safe (CALL, locking reads)
+        self.sticky_reads = 0         # on the primary for read-your-writes
+        self.fallback_reads = 0       # on the primary because no replica was usable
+
+    def note_write(self, tables=None):
+        now = time.monotonic()
+        key = _session.get()
+        with self._lock:
+            self._last_write_any = now
+            if key is not None:
+                self._last_write[key] = now
+            if len(self._last_write) > 10000:
+                # Writes this old are on every replica that is still in use
+                horizon = now - max(REPLICA_MAX_LAG + REPLICA_LAG_CHECK + 1, STICKY_SECONDS)
+                self._last_write = {k: t for k, t in self._last_write.items() if t > horizon}
+
+    def last_write(self):
+        key = _session.get()
+        if key is None:
+            return self._last_write_any
+        return self._last_write.get(key, float("-inf"))
+
+    def caught_up(self, replica):
+        # Results read here may go into the shared cache: every process write is applied
+        if REPLICA_LAG_CHECK <= 0:
+            return time.monotonic() - self._last_write_any >= STICKY_SECONDS
+        return replica.applied_until() >= self._last_write_any
+
+    def pick(self, query):
+        if not _REPLICA_SAFE.match(query) or _LOCKING_READ.search(query):
+            self.primary_reads += 1
+            return None
+        now = time.monotonic()
+        last_write = self.last_write()
+        if REPLICA_LAG_CHECK <= 0 and now - last_write < STICKY_SECONDS:
+            self.sticky_reads += 1
+            return None
+
+        with self._lock:
+            first = self._next
+            self._next = (self._next + 1) % len(self.replicas)
+        behind = False
+        for i in range(len(self.replicas)):
+            replica = self.replicas[(first + i) % len(self.replicas)]
+            if replica.down_until > now:
+                continue
+            if REPLICA_LAG_CHECK > 0:
+                if now - replica.checked_at > REPLICA_LAG_CHECK:
+                    try:
+                        replica.check()
+                    except Error:
+                        replica.mark_down()
+                        continue
+                if replica.lag is None or replica.lag > REPLICA_MAX_LAG:
+                    continue
+                if replica.applied_until() < last_write:
+                    behind = True
+                    continue
+            replica.reads += 1
+            self.replica_reads += 1
+            return replica
+
+        if behind:
+            self.sticky_reads += 1
+        else:
+            self.fallback_reads += 1
+        return None
+
+    def failed(self, replica, e):
+        # The read is retried on the primary; an unreachable replica is left out for a while
+        if not isinstance(e, PoolError):
+            replica.mark_down()
+        self.replica_reads -= 1
+        self.fallback_reads += 1
+
+    def stats(self):
+        return {
+            "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads,
+            "sticky_reads": self.sticky_reads,
+            "fallback_reads": self.fallback_reads,
+            "replicas": [replica.stats() for replica in self.replicas],
+        }
+
+
+# Process-wide router, None when no replicas are configured
+router = ReplicaRouter(REPLICA_HOSTS) if REPLICA_HOSTS else None
+if router is not None:
+    cache.add_listener(router.note_write)    # every write path invalidates the cache
+
+
+def _unreachable(e):
+    return isinstance(e, PoolError) or e.errno in CONNECTION_LOST_ERRORS or e.errno in CONNECT_ERRORS
+
+
+def routing_stats():
+    return router.stats() if router is not None else None
+
+
+@contextmanager
+def connection():
+    with get_pool().connection() as conn:
+        yield conn
+
+
+def _frame(rows, columns):
+    # pandas is imported by the first read that builds a frame, not when db is imported
+    import pandas as pd
+    return pd.DataFrame(rows, columns=columns)
+
+
+def _plain(params):
+    # numpy/pandas scalars (e.g. IDs picked from a DataFrame) -> plain Python values
+    if not params:
+        return params
+    return tuple(p.item() if hasattr(p, "item") and not isinstance(p, (str, bytes)) else p for p in params)
+
+
+def _use_prepared(query, params, fetch):
+    if not (PREPARED_STATEMENTS and params):
+        return False
+    match = _PREPARABLE.match(query)
+    # Only statements whose result handling matches fetch, so no rows are left unread
+    return bool(match) and (match.group(1).upper() == "SELECT") == bool(fetch)
+
+
+def _run_query(query, params, fetch, info, pool=None):
+    # info receives rows, bytes and DataFrame build time for the query stats
+    if pool is None:
+        pool = get_pool()
+    prepared = _use_prepared(query, params, fetch)
+    with pool.connection() as conn:
+        if prepared:
+            cursor, operation = pool.prepared_cursor(conn, query)
+        else:
+            cursor, operation = conn.cursor(), query
+        try:
+            if params:
+                cursor.execute(operation, params)
+            else:
+                cursor.execute(operation)
+
+            # FETCH (for SELECT queries)
+            if fetch:
+                result = cursor.fetchall()
+                columns = [desc[0] for desc in cursor.description]
+                built = time.perf_counter()
+                df = _frame(result, columns)
+                info["frame_ms"] = (time.perf_counter() - built) * 1000
+                info["rows"] = len(result)
+                info["bytes"] = payload_bytes(result)
+                return df
+
+            # Non-select queries (INSERT, UPDATE, DELETE)
+            conn.commit()
+            info["rows"] = cursor.rowcount
+            return True
+        except Error:
+            if prepared:
+                pool.forget_statement(conn, query)
+            raise
+        finally:
+            if not prepared:
+                cursor.close()
+
+
+def execute_query(query, params=None, fetch=False, use_cache=True):
+    params = _plain(params)
+    # Reads are served from the result cache when possible
+    tables = cacheable_tables(query) if fetch and use_cache else None
+    if tables:
+        key = cache.key(query, params)
+        cached = cache.get(key)
+        if cached is not None:
+            stats.record_hit(query)
+            return cached.copy()
+        generation = cache.generation
+
+    replica = router.pick(query) if fetch and router is not None else None
+    start = time.perf_counter()
+    info, error = {}, None
+    try:
+        try:
+            result = _run_query(query, params, fetch, info, replica and replica.pool)
+        except (OperationalError, InterfaceError, PoolError) as e:
+            if replica is not None and _unreachable(e):
+                router.failed(replica, e)
+                replica = None
+                result = _run_query(query, params, fetch, info)
+            # A read on a connection that dropped while idle is safe to retry once
+            # on a fresh connection; writes are never replayed
+            elif not fetch or isinstance(e, PoolError) or e.errno not in CONNECTION_LOST_ERRORS:
+                raise
+            else:
+                result = _run_query(query, params, fetch, info)
+    except Error as e:
+        error = f"{type(e).__name__}: {e.errno}"
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        _record("queries", "query_ms", elapsed)
+        stats.record(query, params, elapsed * 1000, info.get("rows", 0), info.get("bytes", 0),
+                     info.get("frame_ms", 0.0), error)
+
+    if tables and (replica is None or router.caught_up(replica)):
+        cache.put(key, tables, result.copy(), generation)
+    elif not fetch:
+        cache.invalidate(write_tables(query))
+    return result
+
+
+STREAM_CHUNK_SIZE = int(os.getenv("DB_STREAM_CHUNK_SIZE", "10000"))
+
+
+def stream_query(query, params=None, chunk_size=STREAM_CHUNK_SIZE, as_frames=True, describe=False):
+    """Yield the result of a SELECT in chunks from an unbuffered cursor.
+
+    Yields DataFrames of up to chunk_size rows (or (columns, rows) batches when
+    as_frames=False, with the cursor description and its column types in place
+    of the names when describe=True), so peak memory is bounded by the chunk
+    size rather than the result size. An empty result yields one empty chunk
+    carrying the columns.
+    The pooled connection is held until the generator is exhausted or closed.
+    """
+    replica = router.pick(query) if router is not None else None
+    pool = replica.pool if replica is not None else get_pool()
+    try:
+        conn = pool.acquire()
+    except (OperationalError, InterfaceError, PoolError) as e:
+        if replica is None or not _unreachable(e):
+            raise
+        router.failed(replica, e)
+        pool = get_pool()
+        conn = pool.acquire()
+    cursor = None
+    reading = finished = False
+    start = time.perf_counter()
+    # Time spent in the database and building frames, excluding the consumer's work between chunks
+    db_ms = frame_ms = 0.0
+    total_rows = total_bytes = 0
+    error = None
+    try:
+        cursor = conn.cursor(buffered=False)
+        if params:
+            cursor.execute(query, params)
+        else:
+            cursor.execute(query)
+        reading = True
+        db_ms += (time.perf_counter() - start) * 1000
+
+        first = True
+        while True:
+            fetched = time.perf_counter()
+            rows = cursor.fetchmany(chunk_size)
+            db_ms += (time.perf_counter() - fetched) * 1000
+            if not rows and not first:
+                break
+            first = False
+            total_rows += len(rows)
+            total_bytes += payload_bytes(rows)
+            columns = [desc[0] for desc in cursor.description]
+            if as_frames:
+                built = time.perf_counter()
+                chunk = _frame(rows, columns)
+                frame_ms += (time.perf_counter() - built) * 1000
+            else:
+                chunk = (cursor.description if describe else columns, rows)
+            yield chunk
+            if len(rows) < chunk_size:
+                break
+        finished = True
+    except Error as e:
+        error = f"{type(e).__name__}: {e.errno}"
+        raise
+    finally:
+        _record("queries", "query_ms", time.perf_counter() - start)
+        stats.record(query, params, db_ms + frame_ms, total_rows, total_bytes, frame_ms, error)
+        if finished or not reading:
+            if cursor is not None:
+                cursor.close()
+            pool.release(conn)
+        else:
+            # Abandoned (or failed) mid-result: unread rows are still on the wire,
+            # so drop the connection rather than draining it
+            pool.invalidate(conn)
+
+
+def call_procedure(name, args):
+    """Run a stored procedure on its own pooled connection and commit.
+
+    Returns one DataFrame per result set the procedure produced.
+    """
+    start = time.perf_counter()
+    total_rows = total_bytes = 0
+    frame_ms, error = 0.0, None
+    try:
+        with connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.callproc(name, args)
+
+                # Consume all pending result sets (important!)
+                results = []
+                for result in cursor.stored_results():
+                    rows = result.fetchall()
+                    columns = [desc[0] for desc in result.description]
+                    built = time.perf_counter()
+                    results.append(_frame(rows, columns))
+                    frame_ms += (time.perf_counter() - built) * 1000
+                    total_rows += len(rows)
+                    total_bytes += payload_bytes(rows)
+
+                conn.commit()
+                cache.invalidate(routine_write_tables(name))
+                return results
+            finally:
+                cursor.close()
+    except Error as e:
+        error = f"{type(e).__name__}: {e.errno}"
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        _record("queries", "query_ms", elapsed)
+        stats.record(f"CALL {name}({', '.join(['%s'] * len(args))})", args, elapsed * 1000,
+                     total_rows, total_bytes, frame_ms, error)
+
+
+def fetch_page(base_query, key_expr, page_size, start=None, before=None, use_cache=True):
+    """Keyset-paginated read of base_query ordered by key_expr.
+
+    start: first key of the page (inclusive); before: load the page ending just
+    before this key. Returns (df, has_prev, has_next).
+    """
+    if before is not None:
+        query = f"{base_query} WHERE {key_expr} < %s ORDER BY {key_expr} DESC LIMIT %s"
+        df = execute_query(query, (before, page_size + 1), fetch=True, use_cache=use_cache)
+        has_prev = len(df) > page_size
+        df = df.head(page_size).iloc[::-1].reset_index(drop=True)
+        return df, has_prev, True
+
+    if start is not None:
+        query = f"{base_query} WHERE {key_expr} >= %s ORDER BY {key_expr} LIMIT %s"
+        df = execute_query(query, (start, page_size + 1), fetch=True, use_cache=use_cache)
+    else:
+        query = f"{base_query} ORDER BY {key_expr} LIMIT %s"
+        df = execute_query(query, (page_size + 1,), fetch=True, use_cache=use_cache)
+    has_next = len(df) > page_size
+    df = df.head(page_size)
+    return df, start is not None, has_next
+
+
+EXACT_COUNT_LIMIT = 100000   # estimated rows below which an exact COUNT(*) is cheap enough
+
+
+def table_row_count(table, use_cache=True):
+    """Row count for a table: InnoDB's estimate for big tables, exact (and cached) for small ones.
+
+    Returns (count, is_estimate).
+    """
+    estimate = execute_query(
+        "SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+        (table,), fetch=True, use_cache=use_cache,
+    )
+    approx = int(estimate.iloc[0, 0] or 0) if not estimate.empty else 0
+    if approx >= EXACT_COUNT_LIMIT:
+        return approx, True
+    exact = execute_query(f"SELECT COUNT(*) FROM {table}", fetch=True, use_cache=use_cache)
+    return int(exact.iloc[0, 0]), False
@@ -0,0 +1,16 @@
+import multiprocessing
+import os
+
+# gunicorn -c gunicorn.conf.py web:app
+bind = os.getenv("WEB_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_WORKERS", str(multiprocessing.cpu_count() * 2 + 1)))
+# Threads per worker; each worker has its own pool of DB_POOL_SIZE connections, so keep
+# threads <= DB_POOL_SIZE and workers * DB_POOL_SIZE under MySQL's max_connections
+worker_class = "gthread"
+threads = int(os.getenv("WEB_THREADS", os.getenv("DB_POOL_SIZE", "5")))
+keepalive = 5
+# Recycle workers now and then so the per-process caches never grow stale for long
+max_requests = 20000
+max_requests_jitter = 2000
+# Import once in the master; the connection pool is only created on first use, inside each worker
+preload_app = True
@@ -0,0 +1,207 @@
+import argparse
+import ast
+import glob
+import os
+import re
+
+import db
+import migrate
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+TOOL_MODULES = {"index_advisor.py", "migrate.py", "datagen.py", "benchmark.py"}   # their own catalogue queries are not workload
+
+# Statements issued inside the stored routines and triggers (Team_25_arcade.sql),
+# with their parameters bound to sample values
+ROUTINE_WORKLOAD = [
+    ("sp_award_item / award_items: stack lookup",
+     "SELECT Quantity FROM playeritem WHERE PlayerID = 1 AND ItemID = 1"),
+    ("sp_complete_session: rank players",
+     "SELECT PlayerSessionID, RANK() OVER (ORDER BY Score DESC) AS NewPosition "
+     "FROM playersession WHERE SessionID = 1"),
+    ("sp_complete_open_sessions: open sessions",
+     "SELECT SessionID FROM multiplayersession WHERE EndTime IS NULL"),
+    ("sp_get_leaderboard",
+     "SELECT PlayerID, Username, TotalScore, RankName, AchievementCount "
+     "FROM leaderboard ORDER BY TotalScore DESC, PlayerID LIMIT 10"),
+    ("fn_leaderboard_position: higher scores",
+     "SELECT IFNULL(SUM(Players), 0) FROM leaderboard_score_counts WHERE TotalScore > 1000"),
+    ("fn_leaderboard_position: ties ahead",
+     "SELECT COUNT(*) FROM leaderboard WHERE TotalScore = 1000 AND PlayerID < 1"),
+    ("fn_get_player_rank",
+     "SELECT r.RankName FROM player p JOIN ranks r ON p.RankID = r.RankID WHERE p.PlayerID = 1"),
+    ("fn_achievement_completion: earned",
+     "SELECT COUNT(*) FROM playerachievement WHERE PlayerID = 1"),
+    ("fn_player_inventory_count",
+     "SELECT IFNULL(SUM(Quantity), 0) FROM playeritem WHERE PlayerID = 1"),
+    ("fn_has_achievement",
+     "SELECT EXISTS(SELECT 1 FROM playerachievement WHERE PlayerID = 1 AND AchievementID = 1)"),
+    ("trg_first_session: session count",
+     "SELECT SessionCount FROM player_stats WHERE PlayerID = 1"),
+    ("trg_auto_rank_update: rank lookup",
+     "SELECT RankID FROM ranks WHERE 1000 >= RankScore ORDER BY RankScore DESC LIMIT 1"),
+]
+
+# SQL in this repo is written with upper-case keywords, which also keeps UI labels out
+_SQL_START = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\s")
+_SHAPING = re.compile(r"\b(WHERE|JOIN|GROUP\s+BY|ORDER\s+BY)\b", re.IGNORECASE)
+_TABLE_REF = re.compile(r"\b(?:FROM|JOIN|UPDATE)\s+`?(\w+)`?(?:\s+(?:AS\s+)?`?(\w+)`?)?", re.IGNORECASE)
+_KEYWORDS = {"where", "on", "join", "left", "right", "inner", "cross", "group", "order", "limit", "set", "using"}
+FULL_SCAN_MIN_ROWS = 1000     # smaller tables are cheaper to scan than to index
+
+
+def collect_workload():
+    """(source, sql) pairs: SQL literals in the app modules plus the routine statements."""
+    workload = []
+    for path in sorted(glob.glob(os.path.join(ROOT, "*.py"))):
+        name = os.path.basename(path)
+        if name in TOOL_MODULES:
+            continue
+        with open(path, encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=name)
+        # Literal pieces of f-strings are fragments, not statements
+        fragments = {id(part) for node in ast.walk(tree) if isinstance(node, ast.JoinedStr) for part in node.values}
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Constant) and isinstance(node.value, str) and id(node) not in fragments:
+                sql = node.value.strip()
+                # Templates with {placeholders} are built at runtime; skip them
+                if _SQL_START.match(sql) and "{" not in sql:
+                    workload.append((f"{name}:{node.lineno}", sql.replace("%s", "1").rstrip(";")))
+    workload.extend(ROUTINE_WORKLOAD)
+
+    seen, unique = set(), []
+    for source, sql in workload:
+        key = " ".join(sql.split())
+        if key not in seen:
+            seen.add(key)
+            unique.append((source, sql))
+    return unique
+
+
+def explain(sql, analyze=False):
+    plan = db.execute_query(f"EXPLAIN {sql}", fetch=True, use_cache=False)
+    tree = None
+    if analyze and sql.lstrip().upper().startswith(("SELECT", "WITH")):
+        # EXPLAIN ANALYZE executes the statement, so it is only used for reads
+        tree = db.execute_query(f"EXPLAIN ANALYZE {sql}", fetch=True, use_cache=False).iloc[0, 0]
+    return plan, tree
+
+
+def findings(sql, plan):
+    """Problems in an EXPLAIN plan: [(alias, problem, estimated rows)]."""
+    problems = []
+    inherent = not _SHAPING.search(sql)   # plain "SELECT ... FROM t" reads the whole table by design
+    for row in plan.to_dict("records"):
+        extra = row.get("Extra") or ""
+        rows = int(row.get("rows") or 0)
+        alias = row.get("table")
+        if row.get("type") == "ALL" and rows >= FULL_SCAN_MIN_ROWS and not inherent:
+            problems.append((alias, "full table scan", rows))
+        elif row.get("type") == "index" and rows >= FULL_SCAN_MIN_ROWS and not inherent:
+            problems.append((alias, "full index scan", rows))
+        if "Using filesort" in extra:
+            problems.append((alias, "filesort", rows))
+        if "Using temporary" in extra:
+            problems.append((alias, "temporary table", rows))
+    return problems
+
+
+def _aliases(sql):
+    refs = {}
+    for table, alias in _TABLE_REF.findall(sql):
+        if alias and alias.lower() not in _KEYWORDS:
+            refs[alias] = table
+        refs.setdefault(table, table)
+    return refs
+
+
+def _table_columns(table):
+    df = db.execute_query(
+        "SELECT COLUMN_NAME FROM information_schema.COLUMNS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s", (table,), fetch=True, use_cache=False,
+    )
+    return {c.lower(): c for c in df["COLUMN_NAME"]}
+
+
+def _existing_indexes(table):
+    df = db.execute_query(
+        "SELECT INDEX_NAME, COLUMN_NAME FROM information_schema.STATISTICS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s ORDER BY INDEX_NAME, SEQ_IN_INDEX",
+        (table,), fetch=True, use_cache=False,
+    )
+    return [[c.lower() for c in group["COLUMN_NAME"]] for _, group in df.groupby("INDEX_NAME")]
+
+
+def suggest_index(sql, alias):
+    """Composite index for one table of a flagged statement: equality columns, then the sort column."""
+    refs = _aliases(sql)
+    table = refs.get(alias, alias)
+    columns = _table_columns(table)
+    single = len(set(refs.values())) == 1
+    qualifier = rf"(?:\b{re.escape(alias)}\.)" + ("?" if single else "")
+
+    equality = re.findall(qualifier + r"`?(\w+)`?\s*=(?!=)", sql)
+    equality += re.findall(r"=\s*" + rf"\b{re.escape(alias)}\.`?(\w+)`?", sql)
+    ordering = []
+    for clause in re.findall(r"\b(?:ORDER|GROUP)\s+BY\s+(.+?)(?:\bLIMIT\b|\bORDER\b|$)", sql, re.I | re.S):
+        for part in clause.split(","):
+            match = re.match(qualifier + r"`?(\w+)`?", part.strip())
+            if match:
+                ordering.append(match.group(1))
+
+    chosen = []
+    for col in equality[:2] + ordering[:1]:
+        real = columns.get(col.lower())
+        if real and real not in chosen:
+            chosen.append(real)
+    if not chosen:
+        return None
+
+    wanted = [c.lower() for c in chosen]
+    if any(index[:len(wanted)] == wanted for index in _existing_indexes(table)):
+        return None
+    return table, chosen
+
+
+def emit_migration(name, suggestions):
+    version = max(migrate.available(), default=0) + 1
+    up, down = ["-- Generated by index_advisor.py"], []
+    for table, cols in suggestions:
+        index = f"idx_{table}_{'_'.join(c.lower() for c in cols)}"
+        up.append(f"CREATE INDEX {index} ON {table} ({', '.join(cols)});")
+        down.insert(0, f"DROP INDEX {index} ON {table};")
+    for direction, lines in (("up", up), ("down", down)):
+        with open(migrate.migration_file(version, name, direction), "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+    return version
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="EXPLAIN every app and routine statement and suggest indexes")
+    parser.add_argument("--analyze", action="store_true", help="also run EXPLAIN ANALYZE on reads (executes them)")
+    parser.add_argument("--emit", metavar="NAME", help="write suggested indexes as a new migration")
+    args = parser.parse_args()
+
+    suggestions = []
+    for source, sql in collect_workload():
+        try:
+            plan, tree = explain(sql, args.analyze)
+        except Exception as e:
+            print(f"!! {source}: could not EXPLAIN ({e})")
+            continue
+        problems = findings(sql, plan)
+        status = "FLAG" if problems else "ok  "
+        print(f"{status} {source}: {' '.join(sql.split())[:100]}")
+        for alias, problem, rows in problems:
+            print(f"       {alias}: {problem} (~{rows} rows)")
+            suggestion = suggest_index(sql, alias)
+            if suggestion and suggestion not in suggestions:
+                suggestions.append(suggestion)
+                print(f"       suggest: INDEX ON {suggestion[0]} ({', '.join(suggestion[1])})")
+        if tree:
+            print("       " + tree.replace("\n", "\n       "))
+
+    if args.emit and suggestions:
+        version = emit_migration(args.emit, suggestions)
+        print(f"Wrote migration {version:03d}_{args.emit} (apply with: python migrate.py up)")
+    elif args.emit:
+        print("No index suggestions; no migration written.")
@@ -0,0 +1,346 @@
+# Batched HTTP ingestion of session scores: python ingest.py [--host 0.0.0.0] [--port 8081]
+#   POST /scores   {"session_id": 3, "player_id": 12, "score": 450}, or a list of them
+#   GET  /metrics  throughput, queue depth and ack/commit latency
+#   GET  /health
+# Each micro-batch is one multi-row INSERT into playersession and one commit. The
+# row triggers (trg_first_session, player_stats, dashboard counters) still fire
+# per row. Requests are answered only after commit, so a client that gets a 503
+# or loses the connection retries (at-least-once).
+import argparse
+import asyncio
+import json
+import logging
+import os
+import signal
+import time
+from collections import deque
+from http import HTTPStatus
+
+from mysql.connector import Error
+
+import db
+from query_cache import write_tables
+from query_stats import percentile
+
+INGEST_HOST = os.getenv("INGEST_HOST", "127.0.0.1")
+INGEST_PORT = int(os.getenv("INGEST_PORT", "8081"))
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "500"))          # rows per INSERT / commit
+INGEST_BATCH_WINDOW = float(os.getenv("INGEST_BATCH_WINDOW_MS", "50")) / 1000
+INGEST_QUEUE_LIMIT = int(os.getenv("INGEST_QUEUE_LIMIT", "10000"))      # buffered events before 429s
+INGEST_MAX_EVENTS = int(os.getenv("INGEST_MAX_EVENTS", "1000"))         # events per request
+INGEST_MAX_BODY = 1024 * 1024
+
+_INSERT = "INSERT INTO playersession (SessionID, PlayerID, Score) VALUES (%s, %s, %s)"
+# Lock waits and deadlocks say nothing about the row itself: the batch is retried by the client
+_RETRYABLE_ERRORS = {1205, 1213}
+
+logger = logging.getLogger("arcade.ingest")
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def parse_events(body):
+    try:
+        payload = json.loads(body or b"null")
+    except ValueError:
+        raise BadRequest("Body is not valid JSON")
+    events = payload if isinstance(payload, list) else [payload]
+    if not events or len(events) > INGEST_MAX_EVENTS:
+        raise BadRequest(f"Send between 1 and {INGEST_MAX_EVENTS} events per request")
+
+    rows = []
+    for i, event in enumerate(events):
+        if not isinstance(event, dict):
+            raise BadRequest(f"Event {i} is not an object")
+        try:
+            row = tuple(int(event[field]) for field in ("session_id", "player_id", "score"))
+        except (KeyError, TypeError, ValueError):
+            raise BadRequest(f"Event {i} needs integer session_id, player_id and score")
+        if row[2] < 0:
+            raise BadRequest(f"Event {i} has a negative score")
+        rows.append(row)
+    return rows
+
+
+def write_batch(rows):
+    """Insert one batch with a single commit. Returns an error message (or None) per row.
+
+    A multi-row INSERT fails as a whole, so when one row is bad the batch is
+    replayed row by row under savepoints, still inside one transaction.
+    """
+    with db.connection() as conn:
+        cursor = conn.cursor()
+        try:
+            try:
+                cursor.executemany(_INSERT, rows)
+                conn.commit()
+                return [None] * len(rows)
+            except Error as e:
+                # Checked before any rollback: on a lost connection the rollback would
+                # fail too and hide this errno, which the pool needs to drop the connection
+                if e.errno in db.CONNECTION_LOST_ERRORS or e.errno in _RETRYABLE_ERRORS:
+                    raise
+                conn.rollback()
+
+            errors = []
+            conn.start_transaction()
+            for row in rows:
+                cursor.execute("SAVEPOINT ingest_row")
+                try:
+                    cursor.execute(_INSERT, row)
+                    errors.append(None)
+                except Error as e:
+                    if e.errno in db.CONNECTION_LOST_ERRORS or e.errno in _RETRYABLE_ERRORS:
+                        raise
+                    cursor.execute("ROLLBACK TO SAVEPOINT ingest_row")
+                    errors.append(e.msg)
+            conn.commit()
+            return errors
+        except Error:
+            if conn.is_connected():
+                try:
+                    conn.rollback()
+                except Error:
+                    pass        # the original error is the one to report
+            raise
+        finally:
+            cursor.close()
+
+
+class Ingestor:
+    """Bounded event queue drained by one writer task in size/time-bounded batches."""
+
+    def __init__(self, batch_size=INGEST_BATCH_SIZE, window=INGEST_BATCH_WINDOW, queue_limit=INGEST_QUEUE_LIMIT):
+        self.batch_size = batch_size
+        self.window = window
+        self.queue = asyncio.Queue(maxsize=queue_limit)
+        self.writer = None
+
+        # Metrics
+        self.started = time.monotonic()
+        self.received = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.throttled = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.ack_ms = deque(maxlen=10000)
+        self.commit_ms = deque(maxlen=1000)
+        self._committed = deque()       # (monotonic time, rows) for the last minute
+
+    def start(self):
+        self.writer = asyncio.create_task(self._run())
+
+    async def submit(self, rows):
+        """Queue rows and wait for their commit. Returns one error (or None) per row, or None when the queue is full."""
+        if self.queue.maxsize - self.queue.qsize() < len(rows):
+            self.throttled += len(rows)
+            return None
+        loop = asyncio.get_running_loop()
+        received = time.monotonic()
+        futures = []
+        for row in rows:
+            future = loop.create_future()
+            self.queue.put_nowait((row, future))
+            futures.append(future)
+        self.received += len(rows)
+        try:
+            return await asyncio.gather(*futures)
+        finally:
+            self.ack_ms.append((time.monotonic() - received) * 1000)
+
+    async def _next_batch(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        deadline = loop.time() + self.window
+        while len(batch) < self.batch_size:
+            if self.queue.empty():
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            else:
+                batch.append(self.queue.get_nowait())
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            rows = [row for row, _ in batch]
+            start = time.monotonic()
+            try:
+                # Blocking driver calls run off the event loop; intake continues meanwhile
+                errors = await loop.run_in_executor(None, write_batch, rows)
+            except Exception as e:
+                self.failed_batches += 1
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            finally:
+                self.commit_ms.append((time.monotonic() - start) * 1000)
+
+            now = time.monotonic()
+            ok = errors.count(None)
+            self.batches += 1
+            self.accepted += ok
+            self.rejected += len(errors) - ok
+            self._committed.append((now, ok))
+            db.cache.invalidate(write_tables(_INSERT))
+            for (_, future), error in zip(batch, errors):
+                if not future.done():
+                    future.set_result(error)
+
+    async def drain(self):
+        # Wait for queued events to be written before shutting down
+        while not self.queue.empty():
+            await asyncio.sleep(self.window)
+        await asyncio.sleep(self.window * 2)
+        if self.writer:
+            self.writer.cancel()
+
+    def metrics(self):
+        now = time.monotonic()
+        while self._committed and self._committed[0][0] < now - 60:
+            self._committed.popleft()
+        window = min(60.0, now - self.started) or 1.0
+        ack, commit = sorted(self.ack_ms), sorted(self.commit_ms)
+        return {
+            "uptime_s": round(now - self.started, 1),
+            "received": self.received,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "throttled": self.throttled,
+            "queue_depth": self.queue.qsize(),
+            "queue_limit": self.queue.maxsize,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "avg_batch_size": round(self.accepted / self.batches, 1) if self.batches else 0.0,
+            "events_per_sec_1m": round(sum(n for _, n in self._committed) / window, 1),
+            "ack_ms": {f"p{p}": round(percentile(ack, p), 2) for p in (50, 95, 99)},
+            "commit_ms": {f"p{p}": round(percentile(commit, p), 2) for p in (50, 95, 99)},
+        }
+
+
+# Minimal HTTP/1.1 on asyncio streams (keep-alive, Content-Length bodies)
+
+async def _read_request(reader):
+    line = await reader.readline()
+    if not line:
+        return None
+    method, path, version = line.decode("latin-1").split(" ", 2)
+    headers = {}
+    while True:
+        header = await reader.readline()
+        if header in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = header.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", "0"))
+    if length > INGEST_MAX_BODY:
+        raise BadRequest("Request body too large")
+    body = await reader.readexactly(length) if length else b""
+    return method, path.split("?", 1)[0], version.strip(), headers, body
+
+
+def _response(status, payload, keep_alive=True, extra_headers=()):
+    body = json.dumps(payload).encode()
+    headers = [
+        f"HTTP/1.1 {status.value} {status.phrase}",
+        "Content-Type: application/json",
+        f"Content-Length: {len(body)}",
+        f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        *extra_headers,
+    ]
+    return ("\r\n".join(headers) + "\r\n\r\n").encode() + body
+
+
+async def _respond(ingestor, method, path, body):
+    if path == "/health" and method == "GET":
+        return HTTPStatus.OK, {"status": "ok"}, ()
+    if path == "/metrics" and method == "GET":
+        return HTTPStatus.OK, ingestor.metrics(), ()
+    if path != "/scores":
+        return HTTPStatus.NOT_FOUND, {"error": "Not found"}, ()
+    if method != "POST":
+        return HTTPStatus.METHOD_NOT_ALLOWED, {"error": "Use POST"}, ("Allow: POST",)
+
+    rows = parse_events(body)
+    try:
+        errors = await ingestor.submit(rows)
+    except Error as e:
+        return HTTPStatus.SERVICE_UNAVAILABLE, {"error": f"Database unavailable, retry: {e.msg}"}, ("Retry-After: 1",)
+    if errors is None:
+        return HTTPStatus.TOO_MANY_REQUESTS, {"error": "Ingest queue is full, retry"}, ("Retry-After: 1",)
+
+    rejected = [{"index": i, "error": error} for i, error in enumerate(errors) if error]
+    return HTTPStatus.OK, {"accepted": len(rows) - len(rejected), "rejected": rejected}, ()
+
+
+async def handle_connection(ingestor, reader, writer):
+    try:
+        while True:
+            try:
+                request = await _read_request(reader)
+            except BadRequest as e:
+                writer.write(_response(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": str(e)}, keep_alive=False))
+                break
+            except (ValueError, asyncio.IncompleteReadError):
+                writer.write(_response(HTTPStatus.BAD_REQUEST, {"error": "Malformed request"}, keep_alive=False))
+                break
+            if request is None:
+                break
+            method, path, version, headers, body = request
+            keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+            try:
+                status, payload, extra = await _respond(ingestor, method, path, body)
+            except ValueError as e:         # BadRequest and other validation failures
+                status, payload, extra = HTTPStatus.BAD_REQUEST, {"error": str(e)}, ()
+            except Exception:
+                # Always answer, so the client can retry instead of seeing a dropped connection
+                logger.exception("Unhandled error on %s %s", method, path)
+                status, payload, extra = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Internal error, retry"}, ()
+            writer.write(_response(status, payload, keep_alive, extra))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host=INGEST_HOST, port=INGEST_PORT):
+    ingestor = Ingestor()
+    ingestor.start()
+    server = await asyncio.start_server(lambda r, w: handle_connection(ingestor, r, w), host, port)
+    print(f"Ingesting scores on http://{host}:{port}/scores "
+          f"(batch {ingestor.batch_size} rows / {ingestor.window * 1000:.0f} ms)")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:     # Windows
+            pass
+    async with server:
+        await stop.wait()
+        server.close()
+        await server.wait_closed()
+        await ingestor.drain()
+    print(json.dumps(ingestor.metrics(), indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batched HTTP ingestion of session scores")
+    parser.add_argument("--host", default=INGEST_HOST)
+    parser.add_argument("--port", type=int, default=INGEST_PORT)
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port))
@@ -0,0 +1,135 @@
+import time
+
+import pandas as pd
+from mysql.connector import Error
+
+import db
+from bulk_import import LOOKUP_CHUNK, MAX_ITEM_QUANTITY, MIN_ITEM_QUANTITY
+from query_cache import write_tables
+
+AWARD_BATCH_SIZE = 1000        # rows per multi-row upsert
+
+# Same effect as sp_award_item, for many stacks per statement
+_UPSERT = """
+    INSERT INTO playeritem (PlayerID, ItemID, DateObtained, Quantity)
+    VALUES (%s, %s, CURDATE(), %s)
+    ON DUPLICATE KEY UPDATE
+        Quantity = Quantity + VALUES(Quantity),
+        DateObtained = VALUES(DateObtained)
+"""
+
+
+def _grants_frame(grants):
+    if isinstance(grants, pd.DataFrame):
+        df = grants[["PlayerID", "ItemID", "Quantity"]].copy()
+    else:
+        df = pd.DataFrame(list(grants), columns=["PlayerID", "ItemID", "Quantity"])
+    for column in df.columns:
+        df[column] = pd.to_numeric(df[column], errors="coerce")
+    return df
+
+
+def _locked_stacks(cursor, pairs):
+    # Current quantity of each existing stack, row-locked until commit so no
+    # concurrent award can change or create it in between
+    stacks = {}
+    for i in range(0, len(pairs), LOOKUP_CHUNK):
+        chunk = pairs[i:i + LOOKUP_CHUNK]
+        placeholders = ", ".join(["(%s, %s)"] * len(chunk))
+        cursor.execute(
+            f"SELECT PlayerID, ItemID, Quantity FROM playeritem "
+            f"WHERE (PlayerID, ItemID) IN ({placeholders}) FOR UPDATE",
+            [value for pair in chunk for value in pair],
+        )
+        stacks.update({(player, item): quantity for player, item, quantity in cursor.fetchall()})
+    return stacks
+
+
+def _existing_ids(cursor, table, column, values):
+    found = set()
+    for i in range(0, len(values), LOOKUP_CHUNK):
+        chunk = values[i:i + LOOKUP_CHUNK]
+        # LOCK IN SHARE MODE keeps the referenced players/items from being deleted before commit
+        cursor.execute(
+            f"SELECT {column} FROM {table} WHERE {column} IN ({', '.join(['%s'] * len(chunk))}) LOCK IN SHARE MODE",
+            chunk,
+        )
+        found.update(row[0] for row in cursor.fetchall())
+    return found
+
+
+def award_items(grants, batch_size=AWARD_BATCH_SIZE):
+    """Apply (player, item, quantity) grants as one set-based upsert in a single transaction.
+
+    Grants for the same stack are added together first. A grant is rejected
+    (with a Reason) when its quantity is outside 1..999, its player or item does
+    not exist, or the stack would go over 999, the same limits
+    trg_validate_item_quantity enforces. Everything else is committed together.
+    """
+    start = time.perf_counter()
+    df = _grants_frame(grants)
+    received = len(df)
+    reasons = pd.Series("", index=df.index, dtype=object)
+
+    invalid = df.isna().any(axis=1) | (df % 1 != 0).any(axis=1)
+    reasons[invalid] = "PlayerID, ItemID and Quantity must be whole numbers"
+    quantity = df["Quantity"]
+    reasons[(reasons == "") & (quantity < MIN_ITEM_QUANTITY)] = f"Quantity must be at least {MIN_ITEM_QUANTITY}"
+    reasons[(reasons == "") & (quantity > MAX_ITEM_QUANTITY)] = f"Quantity cannot exceed {MAX_ITEM_QUANTITY}"
+    rejected = [df.loc[reasons != ""].assign(Reason=reasons[reasons != ""])]
+
+    # Repeated grants for the same stack become one
+    grouped = (
+        df.loc[reasons == ""].astype("int64")
+        .groupby(["PlayerID", "ItemID"], as_index=False)["Quantity"].sum()
+        .sort_values(["PlayerID", "ItemID"])      # one lock order for every caller
+    )
+    merged_in_request = received - len(rejected[0]) - len(grouped)
+
+    new_stacks = updated_stacks = 0
+    with db.connection() as conn:
+        cursor = conn.cursor()
+        try:
+            conn.start_transaction()
+            players = _existing_ids(cursor, "player", "PlayerID", grouped["PlayerID"].unique().tolist())
+            items = _existing_ids(cursor, "item", "ItemID", grouped["ItemID"].unique().tolist())
+            known = grouped["PlayerID"].isin(players) & grouped["ItemID"].isin(items)
+            rejected.append(grouped.loc[~known].assign(Reason="Player or item does not exist"))
+            grouped = grouped.loc[known]
+
+            pairs = list(zip(grouped["PlayerID"].tolist(), grouped["ItemID"].tolist()))
+            stacks = _locked_stacks(cursor, pairs)
+            current = pd.Series([stacks.get(pair) or 0 for pair in pairs], index=grouped.index)
+            held = pd.Series([pair in stacks for pair in pairs], index=grouped.index, dtype=bool)
+            over = current + grouped["Quantity"] > MAX_ITEM_QUANTITY
+            rejected.append(grouped.loc[over].assign(
+                Reason=(current[over].astype(str) + " held; stack would exceed " + str(MAX_ITEM_QUANTITY))
+            ))
+            grouped = grouped.loc[~over]
+            updated_stacks = int(held[~over].sum())
+            new_stacks = len(grouped) - updated_stacks
+
+            rows = grouped[["PlayerID", "ItemID", "Quantity"]].values.tolist()
+            for offset in range(0, len(rows), batch_size):
+                # executemany sends each batch as one multi-row INSERT ... ON DUPLICATE KEY UPDATE
+                cursor.executemany(_UPSERT, rows[offset:offset + batch_size])
+            conn.commit()
+        except Error:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+    db.cache.invalidate(write_tables(_UPSERT.strip()))
+
+    elapsed = time.perf_counter() - start
+    return {
+        "received": received,
+        "awarded": len(grouped),
+        "units": int(grouped["Quantity"].sum()) if len(grouped) else 0,
+        "new_stacks": new_stacks,
+        "updated_stacks": updated_stacks,          # grants that landed on an existing stack
+        "merged_in_request": merged_in_request,   # duplicate grants folded together
+        "rejected": pd.concat(rejected, ignore_index=True),
+        "seconds": elapsed,
+        "grants_per_sec": received / elapsed if elapsed > 0 else 0.0,
+    }
@@ -0,0 +1,49 @@
+import argparse
+import time
+
+import db
+
+
+def top_players(limit=10):
+    # Same read as sp_get_leaderboard: top N straight off idx_leaderboard_score
+    return db.execute_query(
+        """
+        SELECT PlayerID, Username, TotalScore, RankName, AchievementCount
+        FROM leaderboard
+        ORDER BY TotalScore DESC, PlayerID
+        LIMIT %s
+        """,
+        (int(limit),), fetch=True,
+    )
+
+
+def player_position(player_id):
+    """1-based leaderboard position, or None when the player has no leaderboard row.
+
+    fn_leaderboard_position sums leaderboard_score_counts over the distinct scores
+    above the player and counts ties with a lower PlayerID, so its cost grows with
+    the number of distinct scores ahead rather than the number of players.
+    """
+    df = db.execute_query(
+        "SELECT fn_leaderboard_position(%s) AS Position", (int(player_id),), fetch=True
+    )
+    position = df["Position"].iloc[0]
+    return None if position is None else int(position)
+
+
+def rebuild():
+    """Recompute every leaderboard row from player, ranks and playerachievement."""
+    start = time.perf_counter()
+    db.call_procedure("sp_rebuild_leaderboard", [])
+    rows = db.execute_query("SELECT COUNT(*) AS n FROM leaderboard", fetch=True, use_cache=False)
+    return int(rows["n"].iloc[0]), time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Materialized leaderboard maintenance")
+    parser.add_argument("command", choices=["rebuild"])
+    args = parser.parse_args()
+
+    if args.command == "rebuild":
+        count, seconds = rebuild()
+        print(f"Rebuilt leaderboard: {count} players in {seconds:.2f}s")
@@ -0,0 +1,159 @@
+import os
+import threading
+import time
+
+import db
+
+LOOKUP_TTL = float(os.getenv("DB_LOOKUP_TTL", "30"))          # seconds between checks for other processes' writes
+WATERMARK_LAG = float(os.getenv("DB_LOOKUP_WATERMARK_LAG", "5"))  # re-read rows changed this close to the watermark
+
+
+class Lookup:
+    """ID <-> name maps for one table, shared by every page in the process.
+
+    Loaded on first use. After a write to the table in this process (or every
+    LOOKUP_TTL seconds) only the rows past the watermark are read again: rows
+    with a higher ID or, for tables with an UpdatedAt column (migration 003),
+    rows changed since the last refresh. A versioned table whose database lacks
+    the column falls back to the ID watermark alone. A row count that no longer
+    matches means rows were deleted, and the table is reloaded.
+    """
+
+    def __init__(self, table, key, name=None, versioned=True):
+        self.table = table
+        self.key = key
+        self.name = name              # None: the ID is its own label
+        self.versioned = versioned
+        self._lock = threading.Lock()
+        self._names = {}              # id -> name
+        self._ids = {}                # name -> id (first ID for names that repeat)
+        self._order = None            # IDs in ascending order, rebuilt after a change
+        self._loaded = False
+        self._dirty = False
+        self._checked = 0.0
+        self._max_id = 0
+        self._watermark = None
+
+        # Metrics
+        self.loads = 0
+        self.refreshes = 0
+
+    def _columns(self):
+        columns = [self.key] + ([self.name] if self.name else [])
+        return ", ".join(columns + (["UpdatedAt"] if self.versioned else []))
+
+    def _has_updated_at(self):
+        df = db.execute_query(
+            "SELECT COUNT(*) AS n FROM information_schema.COLUMNS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = 'UpdatedAt'",
+            (self.table,), fetch=True, use_cache=False,
+        )
+        return int(df["n"].iloc[0]) > 0
+
+    def _apply(self, rows):
+        for row in rows:
+            record_id = row[0]
+            name = row[1] if self.name else record_id
+            old = self._names.get(record_id)
+            if old is not None and old != name and self._ids.get(old) == record_id:
+                del self._ids[old]
+            self._names[record_id] = name
+            self._ids.setdefault(name, record_id)
+            self._max_id = max(self._max_id, record_id)
+            if self.versioned and (self._watermark is None or row[-1] > self._watermark):
+                self._watermark = row[-1]
+        if rows:
+            self._order = None
+
+    def _load(self):
+        self._names, self._ids, self._order = {}, {}, None
+        self._max_id, self._watermark = 0, None
+        query = f"SELECT {self._columns()} FROM {self.table} ORDER BY {self.key}"
+        for _, rows in db.stream_query(query, as_frames=False):
+            self._apply(rows)
+        self._loaded = True
+        self.loads += 1
+
+    def _refresh(self):
+        if self.versioned and self._watermark is not None:
+            where, params = (f"UpdatedAt >= %s - INTERVAL {WATERMARK_LAG} SECOND OR {self.key} > %s",
+                             (self._watermark, self._max_id))
+        else:
+            where, params = f"{self.key} > %s", (self._max_id,)
+        for _, rows in db.stream_query(f"SELECT {self._columns()} FROM {self.table} WHERE {where}", params,
+                                       as_frames=False):
+            self._apply(rows)
+
+        count = db.execute_query(f"SELECT COUNT(*) AS n FROM {self.table}", fetch=True, use_cache=False)
+        if int(count["n"].iloc[0]) != len(self._names):
+            self._load()         # rows were deleted
+        self.refreshes += 1
+
+    def _ensure(self):
+        # Shared by every session, so a replica read must include all of this process's writes
+        with self._lock, db.shared_reads():
+            now = time.monotonic()
+            if not self._loaded:
+                if self.versioned and not self._has_updated_at():
+                    self.versioned = False      # migration 003 not applied
+                self._load()
+            elif self._dirty or now - self._checked > LOOKUP_TTL:
+                self._refresh()
+            else:
+                return
+            self._dirty = False
+            self._checked = now
+
+    def invalidate(self):
+        self._dirty = True
+
+    def ids(self):
+        """All IDs in ascending order (selectbox options; label them with name_for)."""
+        self._ensure()
+        order = self._order
+        if order is None:
+            order = self._order = sorted(self._names)
+        return order
+
+    def name_for(self, record_id):
+        self._ensure()
+        return self._names.get(record_id)
+
+    def id_for(self, name):
+        self._ensure()
+        return self._ids.get(name)
+
+    def names(self):
+        """Names in ID order."""
+        order = self.ids()
+        names = self._names
+        return [names[i] for i in order]
+
+    def __len__(self):
+        self._ensure()
+        return len(self._names)
+
+
+players = Lookup("player", "PlayerID", "Username")
+items = Lookup("item", "ItemID", "ItemName")
+games = Lookup("game", "GameID", "Title")
+sessions = Lookup("multiplayersession", "SessionID", versioned=False)
+ALL = (players, items, games, sessions)
+
+
+def invalidate(tables=None):
+    # Registered with the query cache: every write that invalidates cached
+    # results for a table also marks its lookup for refresh
+    for lookup in ALL:
+        if tables is None or lookup.table in tables:
+            lookup.invalidate()
+
+
+def stats():
+    return {
+        lookup.table: {"entries": len(lookup._names), "loads": lookup.loads, "refreshes": lookup.refreshes}
+        for lookup in ALL
+    }
+
+
+db.cache.add_listener(invalidate)
@@ -0,0 +1,142 @@
+import argparse
+import os
+import re
+
+from mysql.connector import Error, errorcode
+
+import db
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+_FILE = re.compile(r"^(\d+)_(\w+)\.(up|down)\.sql$")
+# A down file that starts with "-- irreversible: <reason>" refuses to run
+_IRREVERSIBLE = re.compile(r"^--\s*irreversible:\s*(.*)", re.IGNORECASE)
+
+# A fresh install from Team_25_arcade.sql already has the keys and columns that
+# later migrations add to older databases (and lacks the ones they drop), so
+# those statements are skipped on the way up
+_ALREADY_PRESENT = {errorcode.ER_DUP_KEYNAME, errorcode.ER_DUP_FIELDNAME, errorcode.ER_CANT_DROP_FIELD_OR_KEY}
+
+
+def available():
+    """{version: name} for every migration that has both an up and a down file."""
+    found = {}
+    for filename in os.listdir(MIGRATIONS_DIR):
+        match = _FILE.match(filename)
+        if match:
+            version, name, direction = int(match.group(1)), match.group(2), match.group(3)
+            found.setdefault(version, [name, set()])[1].add(direction)
+    return {v: name for v, (name, dirs) in sorted(found.items()) if dirs == {"up", "down"}}
+
+
+def migration_file(version, name, direction):
+    return os.path.join(MIGRATIONS_DIR, f"{version:03d}_{name}.{direction}.sql")
+
+
+def _statements(path):
+    with open(path, encoding="utf-8") as f:
+        sql = "\n".join(line for line in f.read().splitlines() if not line.strip().startswith("--"))
+    return [stmt.strip() for stmt in sql.split(";") if stmt.strip()]
+
+
+def _ensure_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+          Version int NOT NULL,
+          Name varchar(100) NOT NULL,
+          AppliedAt datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+          PRIMARY KEY (Version)
+        )
+    """)
+
+
+def applied():
+    with db.connection() as conn:
+        cursor = conn.cursor()
+        try:
+            _ensure_table(cursor)
+            cursor.execute("SELECT Version FROM schema_migrations ORDER BY Version")
+            return [row[0] for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+
+def _refusal(path):
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    match = _IRREVERSIBLE.match(lines[0]) if lines else None
+    if not match:
+        return None
+    reason = [match.group(1)] + [line.lstrip("-").strip() for line in lines[1:] if line.startswith("--")]
+    return " ".join(reason)
+
+
+def _run(version, name, direction):
+    reason = _refusal(migration_file(version, name, direction)) if direction == "down" else None
+    if reason:
+        raise RuntimeError(f"Migration {version:03d} {name} cannot be rolled back: {reason}")
+    # DDL commits implicitly in MySQL, so each statement is applied on its own
+    with db.connection() as conn:
+        cursor = conn.cursor()
+        try:
+            _ensure_table(cursor)
+            for stmt in _statements(migration_file(version, name, direction)):
+                try:
+                    cursor.execute(stmt)
+                except Error as e:
+                    if direction != "up" or e.errno not in _ALREADY_PRESENT:
+                        raise
+            if direction == "up":
+                cursor.execute("INSERT INTO schema_migrations (Version, Name) VALUES (%s, %s)", (version, name))
+            else:
+                cursor.execute("DELETE FROM schema_migrations WHERE Version = %s", (version,))
+            conn.commit()
+        finally:
+            cursor.close()
+    db.cache.clear()
+
+
+def upgrade(target=None):
+    done = set(applied())
+    ran = []
+    for version, name in available().items():
+        if target is not None and version > target:
+            break
+        if version not in done:
+            _run(version, name, "up")
+            ran.append(version)
+    return ran
+
+
+def downgrade(target=0):
+    migrations = available()
+    ran = []
+    for version in sorted(applied(), reverse=True):
+        if version <= target:
+            break
+        _run(version, migrations[version], "down")
+        ran.append(version)
+    return ran
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply or roll back versioned schema migrations")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("status")
+    up = sub.add_parser("up")
+    up.add_argument("--to", type=int, help="highest version to apply (default: all)")
+    down = sub.add_parser("down")
+    down.add_argument("--to", type=int, default=None, help="version to roll back to (default: previous)")
+    args = parser.parse_args()
+
+    if args.command == "status":
+        done = set(applied())
+        for version, name in available().items():
+            print(f"{'[x]' if version in done else '[ ]'} {version:03d} {name}")
+    elif args.command == "up":
+        ran = upgrade(args.to)
+        print(f"Applied: {', '.join(f'{v:03d}' for v in ran) or 'nothing to do'}")
+    else:
+        done = applied()
+        target = args.to if args.to is not None else (done[-2] if len(done) > 1 else 0)
+        ran = downgrade(target)
+        print(f"Rolled back: {', '.join(f'{v:03d}' for v in ran) or 'nothing to do'}")
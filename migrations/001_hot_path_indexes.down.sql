@@ -0,0 +1,4 @@
+DROP INDEX idx_multiplayersession_endtime ON multiplayersession;
+DROP INDEX idx_ranks_score ON ranks;
+DROP INDEX idx_player_totalscore ON player;
+DROP INDEX idx_playersession_session_score ON playersession;
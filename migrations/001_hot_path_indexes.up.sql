@@ -0,0 +1,13 @@
+-- Hot-path indexes found with index_advisor.py
+
+-- Game Statistics aggregate / session ranking: join by SessionID, aggregate and rank on Score
+CREATE INDEX idx_playersession_session_score ON playersession (SessionID, Score, PlayerID);
+
+-- Nested Query - Top Players: range + ORDER BY on TotalScore
+CREATE INDEX idx_player_totalscore ON player (TotalScore);
+
+-- trg_auto_rank_update: highest RankScore <= score
+CREATE INDEX idx_ranks_score ON ranks (RankScore, RankID);
+
+-- Open-session lookups (dashboard refresh, sp_complete_open_sessions)
+CREATE INDEX idx_multiplayersession_endtime ON multiplayersession (EndTime);
@@ -0,0 +1,4 @@
+-- irreversible: sp_award_item, inventory.award_items and the Player Items import upsert on
+-- uq_playeritem_player_item; without it they would insert duplicate stacks instead of adding
+-- to them. Roll back the code that depends on the key before removing it by hand:
+-- ALTER TABLE playeritem DROP INDEX uq_playeritem_player_item;
@@ -0,0 +1,28 @@
+-- One inventory stack per (PlayerID, ItemID), so awards can upsert instead of check-then-insert.
+-- Team_25_arcade.sql creates the key on fresh installs; this merges the stacks of older databases.
+
+-- Fold duplicate stacks into the oldest row, capped at the 999 quantity limit
+UPDATE playeritem pi
+JOIN (
+    SELECT MIN(PlayerItemID) AS KeepID,
+           LEAST(SUM(Quantity), 999) AS Quantity,
+           MAX(DateObtained) AS DateObtained
+    FROM playeritem
+    WHERE PlayerID IS NOT NULL AND ItemID IS NOT NULL
+    GROUP BY PlayerID, ItemID
+    HAVING COUNT(*) > 1
+) merged ON merged.KeepID = pi.PlayerItemID
+SET pi.Quantity = merged.Quantity,
+    pi.DateObtained = merged.DateObtained;
+
+DELETE pi FROM playeritem pi
+JOIN playeritem kept
+  ON kept.PlayerID = pi.PlayerID
+ AND kept.ItemID = pi.ItemID
+ AND kept.PlayerItemID < pi.PlayerItemID;
+
+ALTER TABLE playeritem ADD UNIQUE KEY uq_playeritem_player_item (PlayerID, ItemID);
+
+-- The unique key serves sp_award_item's (PlayerID, ItemID) lookup, so the covering
+-- index an earlier version of migration 001 created is only extra write cost
+DROP INDEX idx_playeritem_player_item ON playeritem;
@@ -0,0 +1,5 @@
+ALTER TABLE level DROP COLUMN UpdatedAt;
+ALTER TABLE item DROP COLUMN UpdatedAt;
+ALTER TABLE achievement DROP COLUMN UpdatedAt;
+ALTER TABLE game DROP COLUMN UpdatedAt;
+ALTER TABLE player DROP COLUMN UpdatedAt;
@@ -0,0 +1,18 @@
+-- Row version for optimistic concurrency on the Update/Delete pages (records.py):
+-- MySQL bumps UpdatedAt on every change to the row, whoever makes it.
+-- Team_25_arcade.sql declares the column on fresh installs; this adds it to older databases.
+
+ALTER TABLE player
+  ADD COLUMN UpdatedAt timestamp(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6);
+
+ALTER TABLE game
+  ADD COLUMN UpdatedAt timestamp(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6);
+
+ALTER TABLE achievement
+  ADD COLUMN UpdatedAt timestamp(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6);
+
+ALTER TABLE item
+  ADD COLUMN UpdatedAt timestamp(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6);
+
+ALTER TABLE level
+  ADD COLUMN UpdatedAt timestamp(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6);
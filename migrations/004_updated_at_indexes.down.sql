@@ -0,0 +1,3 @@
+DROP INDEX idx_game_updatedat ON game;
+DROP INDEX idx_item_updatedat ON item;
+DROP INDEX idx_player_updatedat ON player;
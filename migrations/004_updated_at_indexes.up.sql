@@ -0,0 +1,4 @@
+-- Watermark refreshes of the lookup maps (lookups.py): rows changed since the last refresh
+CREATE INDEX idx_player_updatedat ON player (UpdatedAt);
+CREATE INDEX idx_item_updatedat ON item (UpdatedAt);
+CREATE INDEX idx_game_updatedat ON game (UpdatedAt);
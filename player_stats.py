@@ -0,0 +1,72 @@
+import argparse
+import time
+
+import db
+
+# What player_stats should hold, recomputed from playersession
+_ACTUAL = """
+    SELECT ps.PlayerID, COUNT(*) AS SessionCount, IFNULL(MAX(ps.Score), 0) AS BestScore,
+           MAX(m.StartTime) AS LastPlayed
+    FROM playersession ps
+    JOIN multiplayersession m ON m.SessionID = ps.SessionID
+    GROUP BY ps.PlayerID
+"""
+
+
+def get(player_id):
+    """(session_count, best_score, last_played) for one player; zeros if they have not played."""
+    df = db.execute_query(
+        "SELECT SessionCount, BestScore, LastPlayed FROM player_stats WHERE PlayerID = %s",
+        (int(player_id),), fetch=True,
+    )
+    if df.empty:
+        return 0, 0, None
+    row = df.iloc[0]
+    return int(row["SessionCount"]), int(row["BestScore"]), row["LastPlayed"]
+
+
+def rebuild():
+    """Recompute every player's stats from playersession. Returns (players, seconds)."""
+    start = time.perf_counter()
+    db.call_procedure("sp_rebuild_player_stats", [])
+    rows = db.execute_query("SELECT COUNT(*) AS n FROM player_stats", fetch=True, use_cache=False)
+    return int(rows["n"].iloc[0]), time.perf_counter() - start
+
+
+def verify(limit=100):
+    """Players whose stored stats differ from a full recount (empty when all is consistent)."""
+    return db.execute_query(
+        f"""
+        SELECT p.PlayerID,
+               IFNULL(s.SessionCount, 0) AS StoredCount, IFNULL(a.SessionCount, 0) AS ActualCount,
+               IFNULL(s.BestScore, 0) AS StoredBest, IFNULL(a.BestScore, 0) AS ActualBest,
+               s.LastPlayed AS StoredLastPlayed, a.LastPlayed AS ActualLastPlayed
+        FROM player p
+        LEFT JOIN player_stats s ON s.PlayerID = p.PlayerID
+        LEFT JOIN ({_ACTUAL}) a ON a.PlayerID = p.PlayerID
+        WHERE IFNULL(s.SessionCount, 0) <> IFNULL(a.SessionCount, 0)
+           OR IFNULL(s.BestScore, 0) <> IFNULL(a.BestScore, 0)
+           OR NOT (s.LastPlayed <=> a.LastPlayed)
+        ORDER BY p.PlayerID
+        LIMIT %s
+        """,
+        (int(limit),), fetch=True, use_cache=False,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-player session stats maintenance")
+    parser.add_argument("command", choices=["backfill", "verify"])
+    parser.add_argument("--limit", type=int, default=100, help="mismatches to list (verify)")
+    args = parser.parse_args()
+
+    if args.command == "backfill":
+        count, seconds = rebuild()
+        print(f"Rebuilt player stats: {count} players in {seconds:.2f}s")
+    else:
+        mismatches = verify(args.limit)
+        if mismatches.empty:
+            print("player_stats is consistent with playersession")
+        else:
+            print(mismatches.to_string(index=False))
+            raise SystemExit(f"{len(mismatches)} player(s) out of step (run: python player_stats.py backfill)")
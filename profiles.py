@@ -0,0 +1,82 @@
+import db
+
+PROFILE_CHUNK = 1000           # players per query (IN list size)
+BITMAP_BITS = 64               # AchievementBitmap is a BIGINT: bit (AchievementID - 1) for IDs 1..64
+
+# fn_get_player_rank, fn_achievement_completion, fn_player_inventory_count and
+# fn_has_achievement for many players at once: each aggregate is computed once per
+# table (not once per player) and the achievement total is counted once.
+_PROFILE_QUERY = """
+    SELECT p.PlayerID, p.Username,
+           IFNULL(r.RankName, 'Unranked') AS PlayerRank,
+           IFNULL(a.Earned, 0) AS AchievementsEarned,
+           CAST(IF(t.Total > 0, IFNULL(a.Earned, 0) / t.Total * 100, 0) AS DECIMAL(5,2))
+               AS AchievementCompletionPercent,
+           IFNULL(i.Units, 0) AS TotalInventoryItems,
+           IFNULL(a.Bitmap, 0) AS AchievementBitmap
+    FROM player p
+    LEFT JOIN ranks r ON r.RankID = p.RankID
+    LEFT JOIN (
+        SELECT PlayerID, COUNT(*) AS Earned,
+               BIT_OR(IF(AchievementID BETWEEN 1 AND {bits}, 1 << (AchievementID - 1), 0)) AS Bitmap
+        FROM playerachievement {where}
+        GROUP BY PlayerID
+    ) a ON a.PlayerID = p.PlayerID
+    LEFT JOIN (
+        SELECT PlayerID, SUM(Quantity) AS Units
+        FROM playeritem {where}
+        GROUP BY PlayerID
+    ) i ON i.PlayerID = p.PlayerID
+    CROSS JOIN (SELECT COUNT(*) AS Total FROM achievement) t
+    {player_where}
+    ORDER BY p.PlayerID
+"""
+
+COLUMNS = ["PlayerID", "Username", "PlayerRank", "AchievementsEarned",
+           "AchievementCompletionPercent", "TotalInventoryItems", "AchievementBitmap"]
+
+
+def _query(player_ids):
+    if player_ids is None:
+        return _PROFILE_QUERY.format(bits=BITMAP_BITS, where="", player_where=""), None
+    # The filter goes inside the derived tables too, so only these players are aggregated
+    placeholders = ", ".join(["%s"] * len(player_ids))
+    query = _PROFILE_QUERY.format(
+        bits=BITMAP_BITS,
+        where=f"WHERE PlayerID IN ({placeholders})",
+        player_where=f"WHERE p.PlayerID IN ({placeholders})",
+    )
+    return query, player_ids * 3
+
+
+def player_profiles(player_ids=None, use_cache=True):
+    """Profile rows for the given players (all players when None), ordered by PlayerID.
+
+    Columns match the scalar functions: PlayerRank ('Unranked' without a rank),
+    AchievementCompletionPercent, TotalInventoryItems, plus AchievementsEarned
+    and AchievementBitmap (see has_achievement). Unknown IDs are left out.
+    """
+    import pandas as pd
+
+    if player_ids is None:
+        query, params = _query(None)
+        return db.execute_query(query, params, fetch=True, use_cache=use_cache)
+
+    player_ids = sorted({int(p) for p in player_ids})
+    frames = []
+    for i in range(0, len(player_ids), PROFILE_CHUNK):
+        query, params = _query(player_ids[i:i + PROFILE_CHUNK])
+        frames.append(db.execute_query(query, params, fetch=True, use_cache=use_cache))
+    if not frames:
+        return pd.DataFrame(columns=COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def has_achievement(profiles, achievement_id):
+    """Boolean Series: fn_has_achievement for every row of a player_profiles() frame."""
+    achievement_id = int(achievement_id)
+    if not 1 <= achievement_id <= BITMAP_BITS:
+        raise ValueError(f"AchievementBitmap covers achievement IDs 1..{BITMAP_BITS}")
+    bit = 1 << (achievement_id - 1)
+    return profiles["AchievementBitmap"].apply(lambda bitmap: bool(int(bitmap) & bit))
+
@@ -0,0 +1,73 @@
+# SQL shared by the Streamlit pages and the benchmark runner
+
+# Read page: base query, key expression, key column and table per view (paged on the primary key)
+READ_QUERIES = {
+    "Players": ("""
+        SELECT p.PlayerID, p.Username, p.Email, p.RegistrationDate,
+               p.TotalScore, p.Avatar, r.RankName,
+               IFNULL(s.SessionCount, 0) AS Sessions, IFNULL(s.BestScore, 0) AS BestScore,
+               s.LastPlayed
+        FROM player p
+        LEFT JOIN ranks r ON p.RankID = r.RankID
+        LEFT JOIN player_stats s ON s.PlayerID = p.PlayerID
+    """, "p.PlayerID", "PlayerID", "player"),
+    "Games": ("SELECT * FROM game", "GameID", "GameID", "game"),
+    "Achievements": ("SELECT * FROM achievement", "AchievementID", "AchievementID", "achievement"),
+    "Items": ("SELECT * FROM item", "ItemID", "ItemID", "item"),
+    "Levels": ("""
+        SELECT l.LevelID, l.LevelNumber, l.Difficulty, l.Description, g.Title as GameTitle
+        FROM level l
+        JOIN game g ON l.GameID = g.GameID
+    """, "l.LevelID", "LevelID", "level"),
+    "Multiplayer Sessions": ("""
+        SELECT m.SessionID, g.Title as GameTitle, m.StartTime, m.EndTime
+        FROM multiplayersession m
+        JOIN game g ON m.GameID = g.GameID
+    """, "m.SessionID", "SessionID", "multiplayersession"),
+    "Ranks": ("SELECT * FROM ranks", "RankID", "RankID", "ranks"),
+    "Player Achievements": ("""
+        SELECT pa.PlayerAchievementID, p.Username, a.Name as Achievement, a.Description
+        FROM playerachievement pa
+        JOIN player p ON pa.PlayerID = p.PlayerID
+        JOIN achievement a ON pa.AchievementID = a.AchievementID
+    """, "pa.PlayerAchievementID", "PlayerAchievementID", "playerachievement"),
+    "Player Items": ("""
+        SELECT pi.PlayerItemID, p.Username, i.ItemName, i.ItemType, i.Rarity,
+               pi.Quantity, pi.DateObtained
+        FROM playeritem pi
+        JOIN player p ON pi.PlayerID = p.PlayerID
+        JOIN item i ON pi.ItemID = i.ItemID
+    """, "pi.PlayerItemID", "PlayerItemID", "playeritem"),
+}
+
+# Advanced Queries page
+ADVANCED_QUERIES = {
+    "Nested Query - Top Players": """
+        SELECT PlayerID, Username, Email, TotalScore,
+               (SELECT AVG(TotalScore) FROM player) as AverageScore
+        FROM player
+        WHERE TotalScore > (SELECT AVG(TotalScore) FROM player)
+        ORDER BY TotalScore DESC
+    """,
+    "Join Query - Player Sessions": """
+        SELECT p.Username, g.Title as GameTitle,
+               m.StartTime, m.EndTime, ps.Score, ps.Position
+        FROM playersession ps
+        JOIN player p ON ps.PlayerID = p.PlayerID
+        JOIN multiplayersession m ON ps.SessionID = m.SessionID
+        JOIN game g ON m.GameID = g.GameID
+        ORDER BY ps.Score DESC
+    """,
+    "Aggregate Query - Game Statistics": """
+        SELECT g.Title as GameTitle, g.Genre,
+               COUNT(DISTINCT ps.PlayerID) as TotalPlayers,
+               AVG(ps.Score) as AverageScore,
+               SUM(ps.Score) as TotalScore,
+               MAX(ps.Score) as HighScore
+        FROM game g
+        LEFT JOIN multiplayersession m ON g.GameID = m.GameID
+        LEFT JOIN playersession ps ON m.SessionID = ps.SessionID
+        GROUP BY g.GameID, g.Title, g.Genre
+        ORDER BY TotalPlayers DESC
+    """,
+}
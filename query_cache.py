@@ -0,0 +1,194 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# Cache settings (override through the environment)
+CACHE_TTL = float(os.getenv("DB_CACHE_TTL", "30"))                 # seconds a cached result stays fresh
+CACHE_MAX_ENTRIES = int(os.getenv("DB_CACHE_MAX_ENTRIES", "256"))  # LRU bound
+
+# Tables each stored routine reads or writes (see Team_25_arcade.sql)
+ROUTINE_TABLES = {
+    "sp_register_player": {"player"},
+    "sp_award_item": {"playeritem"},
+    "sp_complete_session": {"multiplayersession", "playersession"},
+    "sp_complete_open_sessions": {"multiplayersession", "playersession"},
+    "sp_get_leaderboard": {"leaderboard"},
+    "sp_rebuild_leaderboard": {"leaderboard", "leaderboard_score_counts"},
+    "fn_get_player_rank": {"player", "ranks"},
+    "fn_achievement_completion": {"playerachievement", "achievement"},
+    "fn_player_inventory_count": {"playeritem"},
+    "fn_has_achievement": {"playerachievement"},
+    "fn_leaderboard_position": {"leaderboard", "leaderboard_score_counts"},
+    "sp_refresh_dashboard_stats": {"dashboard_stats"},
+    "sp_rebuild_player_stats": {"player_stats"},
+}
+WRITING_ROUTINES = {
+    "sp_register_player", "sp_award_item", "sp_complete_session",
+    "sp_complete_open_sessions", "sp_rebuild_leaderboard", "sp_refresh_dashboard_stats",
+    "sp_rebuild_player_stats",
+}
+
+# Other tables changed when a table is written, through triggers and
+# ON DELETE CASCADE / SET NULL foreign keys
+WRITE_EFFECTS = {
+    "playersession": {"player", "playerachievement", "dashboard_daily", "player_stats"},  # trg_first_session, ...
+    "player": {"playeritem", "playersession", "playerachievement", "leaderboard", "leaderboard_score_counts",
+               "dashboard_stats", "player_stats"},
+    "playerachievement": {"leaderboard", "dashboard_stats"},             # trg_leaderboard_*, trg_stats_*
+    "playeritem": {"dashboard_stats"},
+    "game": {"level", "multiplayersession", "dashboard_stats"},
+    "multiplayersession": {"playersession", "dashboard_stats", "player_stats"},
+    "item": {"playeritem"},
+    "achievement": {"playerachievement"},
+    "ranks": {"player"},
+}
+
+_STRING_OR_SPACE = re.compile(r"""('(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")|\s+""")
+# A FROM/JOIN table and any comma-joined tables after it ("FROM a x, b AS y, c")
+_NOT_ALIAS = r"(?!(?:JOIN|INNER|LEFT|RIGHT|CROSS|NATURAL|STRAIGHT_JOIN|ON|USING|WHERE|GROUP|ORDER|HAVING|LIMIT|UNION|WINDOW|FOR|LOCK)\b)"
+_TABLE_REF = rf"`?\w+`?(?:\s+(?:AS\s+)?{_NOT_ALIAS}\w+)?"
+_READ_TABLES = re.compile(rf"\b(?:FROM|JOIN)\s+({_TABLE_REF}(?:\s*,\s*{_TABLE_REF})*)", re.IGNORECASE)
+_WRITE_TABLES = re.compile(
+    r"^\s*(?:INSERT(?:\s+IGNORE)?\s+INTO|REPLACE\s+INTO|UPDATE|DELETE\s+FROM|TRUNCATE(?:\s+TABLE)?)\s+`?(\w+)`?",
+    re.IGNORECASE,
+)
+_ROUTINE_CALLS = re.compile(r"\b((?:sp|fn)_\w+)\s*\(", re.IGNORECASE)
+
+
+def normalize_sql(query):
+    # Collapse whitespace outside string literals and drop the trailing semicolon
+    sql = _STRING_OR_SPACE.sub(lambda m: m.group(1) or " ", query).strip()
+    return sql.rstrip(";").strip()
+
+
+def _with_effects(tables):
+    result = set(tables)
+    pending = list(tables)
+    while pending:
+        for table in WRITE_EFFECTS.get(pending.pop(), ()):
+            if table not in result:
+                result.add(table)
+                pending.append(table)
+    return result
+
+
+def read_tables(query):
+    tables = {ref.split()[0].strip("`").lower() for refs in _READ_TABLES.findall(query) for ref in refs.split(",")}
+    for routine in _ROUTINE_CALLS.findall(query):
+        tables |= ROUTINE_TABLES.get(routine.lower(), set())
+    return tables
+
+
+def cacheable_tables(query):
+    """Tables a read depends on, or None when the statement should not be cached."""
+    sql = normalize_sql(query)
+    verb = sql.split(" ", 1)[0].upper()
+    if verb == "CALL":
+        routines = {r.lower() for r in _ROUTINE_CALLS.findall(sql)}
+        if not routines or routines & WRITING_ROUTINES or not routines <= ROUTINE_TABLES.keys():
+            return None
+    elif verb != "SELECT":
+        return None
+    return read_tables(sql) or None
+
+
+def write_tables(query):
+    """Tables a write statement can change, or None when they cannot be determined."""
+    match = _WRITE_TABLES.match(query)
+    if not match:
+        return None
+    return _with_effects({match.group(1).lower()})
+
+
+def routine_write_tables(name):
+    name = name.lower()
+    if name not in ROUTINE_TABLES:
+        return None
+    if name not in WRITING_ROUTINES:
+        return set()
+    return _with_effects(ROUTINE_TABLES[name])
+
+
+class QueryCache:
+    """Read-through cache of SELECT results with TTL, LRU bound and per-table invalidation."""
+
+    def __init__(self, ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()    # key -> (expires_at, tables, result)
+        self._lock = threading.Lock()
+        self.generation = 0              # bumped by every invalidation
+        self._listeners = []             # called with the invalidated tables (lookups.py)
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(query, params):
+        return normalize_sql(query), tuple(params) if params else ()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key, tables, result, generation=None):
+        with self._lock:
+            # Skip results read before a concurrent write invalidated them
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, frozenset(tables), result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, tables=None):
+        # tables=None drops everything (used when a write's targets are unknown);
+        # an empty set (a read-only routine) changed nothing
+        if tables is not None and not tables:
+            return
+        with self._lock:
+            self.generation += 1
+            if tables is None:
+                dropped = list(self._entries)
+            else:
+                dropped = [k for k, (_, deps, _) in self._entries.items() if deps & tables]
+            for key in dropped:
+                del self._entries[key]
+            self.invalidations += len(dropped)
+        for listener in self._listeners:
+            listener(tables)
+
+    def add_listener(self, listener):
+        # Other in-process caches that must follow the same write invalidation
+        self._listeners.append(listener)
+
+    def clear(self):
+        self.invalidate(None)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,211 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from functools import lru_cache
+from logging.handlers import RotatingFileHandler
+
+from query_cache import normalize_sql
+
+# Instrumentation settings (override through the environment)
+SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "200"))          # queries at or over this go to the slow log
+SLOW_QUERY_LOG = os.getenv("DB_SLOW_QUERY_LOG", os.path.join("logs", "slow_queries.log"))
+SLOW_LOG_MAX_BYTES = int(os.getenv("DB_SLOW_LOG_MAX_BYTES", str(5 * 1024 * 1024)))
+SLOW_LOG_BACKUPS = int(os.getenv("DB_SLOW_LOG_BACKUPS", "5"))
+LATENCY_SAMPLES = int(os.getenv("DB_STATS_SAMPLES", "1000"))         # recent latencies kept per fingerprint
+MAX_FINGERPRINTS = int(os.getenv("DB_STATS_MAX_FINGERPRINTS", "500"))
+
+_STRING = re.compile(r"""'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*\"""")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(query):
+    # Same statement shape -> same fingerprint: literals and placeholders become ?
+    sql = normalize_sql(query)
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql.replace("%s", "?"))
+    return _IN_LIST.sub("IN (...)", sql)
+
+
+def params_shape(params):
+    if not params:
+        return ""
+    if len(params) > 8:
+        return f"{len(params)} params"
+    return ", ".join(type(p).__name__ for p in params)
+
+
+def payload_bytes(rows):
+    """Approximate size of fetched rows as sent by the server (text lengths, 8 bytes per number)."""
+    total = 0
+    for row in rows:
+        for value in row:
+            if value is None:
+                continue
+            total += len(value) if isinstance(value, (str, bytes, bytearray)) else 8
+    return total
+
+
+def _slow_logger():
+    logger = logging.getLogger("arcade.slow_queries")
+    if not logger.handlers:
+        directory = os.path.dirname(SLOW_QUERY_LOG)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        handler = RotatingFileHandler(
+            SLOW_QUERY_LOG, maxBytes=SLOW_LOG_MAX_BYTES, backupCount=SLOW_LOG_BACKUPS, encoding="utf-8"
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+
+def percentile(samples, pct):
+    # Nearest-rank percentile of a sorted list
+    if not samples:
+        return 0.0
+    rank = max(int(round(pct / 100 * len(samples) + 0.5)) - 1, 0)
+    return samples[min(rank, len(samples) - 1)]
+
+
+class _Fingerprint:
+    __slots__ = ("sql", "calls", "errors", "cache_hits", "total_ms", "max_ms",
+                 "rows", "bytes", "frame_ms", "params", "samples")
+
+    def __init__(self, sql):
+        self.sql = sql
+        self.calls = self.errors = self.cache_hits = 0
+        self.total_ms = self.max_ms = self.frame_ms = 0.0
+        self.rows = self.bytes = 0
+        self.params = ""
+        self.samples = deque(maxlen=LATENCY_SAMPLES)
+
+
+class QueryStats:
+    """Per-fingerprint timings for every query and procedure call, plus a rotating slow-query log."""
+
+    def __init__(self, slow_ms=SLOW_QUERY_MS):
+        self.slow_ms = slow_ms
+        self._entries = OrderedDict()   # fingerprint -> _Fingerprint, least recently used first
+        self._lock = threading.Lock()
+        self.slow_queries = 0
+
+    def _entry(self, sql):
+        entry = self._entries.get(sql)
+        if entry is None:
+            entry = self._entries[sql] = _Fingerprint(sql)
+            while len(self._entries) > MAX_FINGERPRINTS:
+                self._entries.popitem(last=False)
+        self._entries.move_to_end(sql)
+        return entry
+
+    def record(self, query, params, ms, rows=0, nbytes=0, frame_ms=0.0, error=None):
+        sql = fingerprint(query)
+        shape = params_shape(params)
+        with self._lock:
+            entry = self._entry(sql)
+            entry.calls += 1
+            entry.total_ms += ms
+            entry.max_ms = max(entry.max_ms, ms)
+            entry.rows += rows
+            entry.bytes += nbytes
+            entry.frame_ms += frame_ms
+            entry.params = shape
+            entry.samples.append(ms)
+            if error:
+                entry.errors += 1
+            slow = ms >= self.slow_ms
+            if slow:
+                self.slow_queries += 1
+
+        if slow:
+            _slow_logger().info(json.dumps({
+                "at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "ms": round(ms, 2),
+                "rows": rows,
+                "bytes": nbytes,
+                "frame_ms": round(frame_ms, 2),
+                "params": shape,
+                "error": error,
+                "fingerprint": sql,
+            }))
+
+    def record_hit(self, query):
+        with self._lock:
+            self._entry(fingerprint(query)).cache_hits += 1
+
+    def top(self, limit=20, by="Total ms"):
+        """Fingerprints as a DataFrame, heaviest first, with p50/p95/p99 over recent calls."""
+        with self._lock:
+            entries = [
+                (e.sql, e.calls, e.errors, e.cache_hits, e.total_ms, e.max_ms,
+                 e.rows, e.bytes, e.frame_ms, e.params, sorted(e.samples))
+                for e in self._entries.values()
+            ]
+
+        records = []
+        for sql, calls, errors, hits, total_ms, max_ms, rows, nbytes, frame_ms, shape, samples in entries:
+            p50, p95, p99 = (percentile(samples, pct) for pct in (50, 95, 99))
+            records.append({
+                "Fingerprint": sql,
+                "Calls": calls,
+                "Cache Hits": hits,
+                "Errors": errors,
+                "Total ms": round(total_ms, 1),
+                "Avg ms": round(total_ms / calls, 2) if calls else 0.0,
+                "p50 ms": round(p50, 2),
+                "p95 ms": round(p95, 2),
+                "p99 ms": round(p99, 2),
+                "Max ms": round(max_ms, 2),
+                "Rows": rows,
+                "Bytes": nbytes,
+                "Frame ms": round(frame_ms, 1),
+                "Params": shape,
+            })
+        import pandas as pd     # only the Performance page needs it
+
+        df = pd.DataFrame(records, columns=[
+            "Fingerprint", "Calls", "Cache Hits", "Errors", "Total ms", "Avg ms", "p50 ms", "p95 ms",
+            "p99 ms", "Max ms", "Rows", "Bytes", "Frame ms", "Params",
+        ])
+        return df.sort_values(by, ascending=False).head(limit).reset_index(drop=True)
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+            self.slow_queries = 0
+
+    def summary(self):
+        with self._lock:
+            return {
+                "fingerprints": len(self._entries),
+                "calls": sum(e.calls for e in self._entries.values()),
+                "total_ms": sum(e.total_ms for e in self._entries.values()),
+                "errors": sum(e.errors for e in self._entries.values()),
+                "slow_queries": self.slow_queries,
+                "slow_ms": self.slow_ms,
+            }
+
+
+def recent_slow_queries(limit=50):
+    """Latest entries of the current slow-query log file, newest first."""
+    import pandas as pd
+
+    if not os.path.exists(SLOW_QUERY_LOG):
+        return pd.DataFrame()
+    with open(SLOW_QUERY_LOG, encoding="utf-8") as f:
+        lines = deque(f, maxlen=limit)
+    records = []
+    for line in reversed(lines):
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            continue
+    return pd.DataFrame(records)
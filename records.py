@@ -0,0 +1,102 @@
+from mysql.connector import Error
+
+import db
+from query_cache import write_tables
+
+SEARCH_LIMIT = 20              # matches listed by a name search
+
+# Update/Delete pages: table, primary key, searchable name column (prefix match) and editable columns
+RECORDS = {
+    "Player": ("player", "PlayerID", "Username", ["Username", "Email", "TotalScore", "Avatar"]),
+    "Game": ("game", "GameID", "Title", ["Title", "Genre", "MaxPlayers"]),
+    "Achievement": ("achievement", "AchievementID", "Name", ["Name", "Description"]),
+    "Item": ("item", "ItemID", "ItemName", ["ItemName", "ItemType", "Rarity"]),
+    "Level": ("level", "LevelID", None, ["GameID", "LevelNumber", "Difficulty", "Description"]),
+}
+
+
+class StaleRecordError(Exception):
+    """The record changed or was deleted after it was loaded."""
+
+
+def _select(kind):
+    table, key, _, columns = RECORDS[kind]
+    shown = [key] + [c for c in columns if c != key]
+    return f"SELECT {', '.join(shown)}, UpdatedAt FROM {table}"
+
+
+def fetch(kind, record_id):
+    """One record by primary key as a dict (plain Python values), or None.
+
+    UpdatedAt in the result is the version to pass back to update() / delete().
+    """
+    key = RECORDS[kind][1]
+    with db.connection() as conn:
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(f"{_select(kind)} WHERE {key} = %s", (int(record_id),))
+            return cursor.fetchone()
+        finally:
+            cursor.close()
+
+
+def search(kind, text, limit=SEARCH_LIMIT):
+    """Up to `limit` records whose name starts with `text`, as a DataFrame."""
+    table, key, name, _ = RECORDS[kind]
+    if name is None:
+        raise ValueError(f"{kind} records can only be looked up by ID")
+    return db.execute_query(
+        f"SELECT {key}, {name} FROM {table} WHERE {name} LIKE %s ORDER BY {name} LIMIT %s",
+        (text.replace("%", r"\%").replace("_", r"\_") + "%", int(limit)), fetch=True, use_cache=False,
+    )
+
+
+def _write_if_unchanged(kind, record_id, updated_at, query, params):
+    # The statement only matches while UpdatedAt is the version that was loaded
+    with db.connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(query, params)
+            conn.commit()
+            changed = cursor.rowcount
+        except Error:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+    db.cache.invalidate(write_tables(query))
+    if changed:
+        return True
+
+    current = fetch(kind, record_id)
+    if current is None:
+        raise StaleRecordError(f"{kind} {record_id} was deleted by someone else.")
+    if current["UpdatedAt"] != updated_at:
+        raise StaleRecordError(f"{kind} {record_id} was changed by someone else since it was loaded.")
+    return False      # same version: the new values equal the stored ones
+
+
+def update(kind, record_id, changes, updated_at):
+    """Write `changes` ({column: value}) if the record is still at version `updated_at`.
+
+    Returns True when the row changed, False when the values were already
+    stored. Raises StaleRecordError when another writer got there first.
+    """
+    table, key, _, columns = RECORDS[kind]
+    unknown = set(changes) - set(columns)
+    if unknown:
+        raise ValueError(f"Not editable: {', '.join(sorted(unknown))}")
+    if not changes:
+        return False
+    assignments = ", ".join(f"{column} = %s" for column in changes)
+    query = f"UPDATE {table} SET {assignments} WHERE {key} = %s AND UpdatedAt = %s"
+    return _write_if_unchanged(kind, record_id, updated_at, query,
+                               (*changes.values(), int(record_id), updated_at))
+
+
+def delete(kind, record_id, updated_at):
+    """Delete the record if it is still at version `updated_at` (StaleRecordError otherwise)."""
+    table, key, _, _ = RECORDS[kind]
+    query = f"DELETE FROM {table} WHERE {key} = %s AND UpdatedAt = %s"
+    _write_if_unchanged(kind, record_id, updated_at, query, (int(record_id), updated_at))
+    return True
@@ -0,0 +1,121 @@
+import time
+from bisect import bisect_right
+
+import pandas as pd
+from mysql.connector import Error
+
+import db
+from bulk_import import LOOKUP_CHUNK
+from query_cache import write_tables
+
+UPDATE_CHUNK = 500             # players per UPDATE ... JOIN statement
+
+
+class RankThresholds:
+    """ranks sorted by RankScore, for binary-search rank resolution in Python."""
+
+    def __init__(self, ranks):
+        ranks = ranks.sort_values("RankScore")
+        self.scores = [int(s) for s in ranks["RankScore"]]
+        self.ids = [int(r) for r in ranks["RankID"]]
+        self.names = dict(zip(self.ids, ranks["RankName"]))
+
+    @classmethod
+    def load(cls):
+        # Served from the query cache until ranks is written
+        return cls(db.execute_query("SELECT RankID, RankName, RankScore FROM ranks", fetch=True))
+
+    def rank_for(self, score):
+        # Highest threshold <= score, as trg_auto_rank_update picks it; None below every threshold
+        position = bisect_right(self.scores, score) - 1
+        return self.ids[position] if position >= 0 else None
+
+
+def _coalesce(deltas):
+    totals = {}
+    for player_id, delta in deltas:
+        player_id = int(player_id)
+        totals[player_id] = totals.get(player_id, 0) + int(delta)
+    return totals
+
+
+def _lock_players(cursor, player_ids):
+    players = {}
+    for i in range(0, len(player_ids), LOOKUP_CHUNK):
+        chunk = player_ids[i:i + LOOKUP_CHUNK]
+        cursor.execute(
+            f"SELECT PlayerID, Username, TotalScore, RankID FROM player "
+            f"WHERE PlayerID IN ({', '.join(['%s'] * len(chunk))}) FOR UPDATE",
+            chunk,
+        )
+        players.update({row[0]: row[1:] for row in cursor.fetchall()})
+    return players
+
+
+def adjust_scores(deltas):
+    """Apply many (player_id, delta) score changes in one transaction.
+
+    Deltas for the same player are summed first, scores are floored at 0, and
+    each player's new RankID is resolved in memory against the ranks thresholds
+    and written together with the score. The updates run with @rank_resolved
+    set, so trg_auto_rank_update skips its ranks lookup for them.
+
+    Returns (changes, summary). changes has one row per player with old and new
+    score and rank; unknown players are listed in summary["missing"].
+    """
+    start = time.perf_counter()
+    deltas = list(deltas)
+    totals = _coalesce(deltas)
+    thresholds = RankThresholds.load()
+    player_ids = sorted(totals)           # one lock order for every caller
+
+    changes = []
+    with db.connection() as conn:
+        cursor = conn.cursor()
+        try:
+            conn.start_transaction()
+            players = _lock_players(cursor, player_ids)
+            for player_id in player_ids:
+                if player_id not in players:
+                    continue
+                username, old_score, old_rank = players[player_id]
+                new_score = max((old_score or 0) + totals[player_id], 0)
+                new_rank = thresholds.rank_for(new_score)
+                changes.append((player_id, username, old_score or 0, new_score, old_rank,
+                                new_rank if new_rank is not None else old_rank))
+
+            # Pooled connections keep user variables, so it is cleared again right after
+            cursor.execute("SET @rank_resolved = 1")
+            try:
+                for i in range(0, len(changes), UPDATE_CHUNK):
+                    chunk = changes[i:i + UPDATE_CHUNK]
+                    values = " UNION ALL ".join(["SELECT %s AS PlayerID, %s AS TotalScore, %s AS RankID"] * len(chunk))
+                    cursor.execute(
+                        f"UPDATE player p JOIN ({values}) v ON v.PlayerID = p.PlayerID "
+                        f"SET p.TotalScore = v.TotalScore, p.RankID = v.RankID",
+                        [value for change in chunk for value in (change[0], change[3], change[5])],
+                    )
+            finally:
+                cursor.execute("SET @rank_resolved = NULL")
+            conn.commit()
+        except Error:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+    db.cache.invalidate(write_tables("UPDATE player"))
+
+    df = pd.DataFrame(changes, columns=["PlayerID", "Username", "OldScore", "NewScore", "OldRankID", "NewRankID"])
+    df["OldRank"] = df["OldRankID"].map(thresholds.names)
+    df["NewRank"] = df["NewRankID"].map(thresholds.names)
+    df["RankChanged"] = df["OldRankID"] != df["NewRankID"]
+    elapsed = time.perf_counter() - start
+    summary = {
+        "deltas": len(deltas),
+        "players": len(df),
+        "rank_changes": int(df["RankChanged"].sum()),
+        "missing": sorted(set(player_ids) - set(df["PlayerID"])),
+        "seconds": elapsed,
+        "players_per_sec": len(df) / elapsed if elapsed > 0 else 0.0,
+    }
+    return df, summary
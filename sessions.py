@@ -0,0 +1,11 @@
+import time
+
+import db
+
+
+def complete_open_sessions():
+    """Close every open session in one transaction. Returns (sessions_closed, seconds)."""
+    start = time.perf_counter()
+    results = db.call_procedure("sp_complete_open_sessions", [])
+    closed = int(results[0]["SessionsClosed"].iloc[0]) if results else 0
+    return closed, time.perf_counter() - start
@@ -0,0 +1,237 @@
+import gzip
+import hashlib
+import os
+import time
+
+from flask import Flask, abort, render_template, request
+from werkzeug.http import http_date
+
+import dashboard
+import db
+import leaderboard
+import player_stats
+import profiles
+import queries
+from query_cache import QueryCache
+
+# Public pages (templates/) served from the pooled, cached data layer.
+# Development: python web.py   Production: gunicorn -c gunicorn.conf.py web:app
+
+WEB_PAGE_TTL = float(os.getenv("WEB_PAGE_TTL", "10"))              # seconds a rendered page is reused
+WEB_PAGE_CACHE_SIZE = int(os.getenv("WEB_PAGE_CACHE_SIZE", "2048"))
+WEB_MAX_AGE = int(os.getenv("WEB_MAX_AGE", "5"))                   # browser / CDN freshness (Cache-Control)
+WEB_PAGE_SIZE = int(os.getenv("WEB_PAGE_SIZE", "50"))
+WEB_LEADERBOARD_SIZE = int(os.getenv("WEB_LEADERBOARD_SIZE", "100"))
+COMPRESS_MIN_BYTES = 1024          # smaller bodies are not worth compressing
+COMPRESS_LEVEL = 6
+
+app = Flask(__name__)
+
+# Rendered pages, dropped whenever the tables they were built from are written
+pages = QueryCache(ttl=WEB_PAGE_TTL, max_entries=WEB_PAGE_CACHE_SIZE)
+db.cache.add_listener(pages.invalidate)
+
+
+class Page:
+    """A rendered page with its validators; the gzip variant is built on first request."""
+
+    __slots__ = ("body", "etag", "last_modified", "_gzipped")
+
+    def __init__(self, html):
+        self.body = html.encode("utf-8")
+        self.etag = hashlib.sha1(self.body).hexdigest()[:20]
+        self.last_modified = time.time()
+        self._gzipped = None
+
+    def gzipped(self):
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body, COMPRESS_LEVEL)
+        return self._gzipped
+
+
+def _records(df):
+    # Template rows as dicts, NULLs as None rather than NaN
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+
+def _respond(page):
+    compress = len(page.body) >= COMPRESS_MIN_BYTES and "gzip" in request.headers.get("Accept-Encoding", "")
+    response = app.response_class(page.gzipped() if compress else page.body, mimetype="text/html")
+    if compress:
+        response.headers["Content-Encoding"] = "gzip"
+    # Each encoding is its own representation, so it gets its own validator
+    response.set_etag(page.etag + ("-gz" if compress else ""))
+    response.headers["Last-Modified"] = http_date(page.last_modified)
+    response.headers["Cache-Control"] = f"public, max-age={WEB_MAX_AGE}, stale-while-revalidate={WEB_MAX_AGE * 6}"
+    response.headers["Vary"] = "Accept-Encoding"
+    return response.make_conditional(request)
+
+
+def cached_page(tables, render):
+    """Serve the page for this URL from the page cache, rendering it on a miss."""
+    key = (request.full_path, ())
+    page = pages.get(key)
+    if page is None:
+        generation = pages.generation
+        page = Page(render())
+        pages.put(key, tables, page, generation)
+    return _respond(page)
+
+
+def _page_start():
+    start = request.args.get("start", type=int)
+    return start if start is not None and start > 0 else None
+
+
+@app.route("/")
+def index():
+    def render():
+        stats, _ = dashboard.get_stats()
+        return render_template("index.html", stats={
+            "total_players": stats["players"],
+            "total_games": stats["games"],
+            "active_sessions": stats["active_sessions"],
+            "total_achievements": stats["achievements_earned"],
+        })
+    return cached_page({"dashboard_stats", "dashboard_daily"}, render)
+
+
+@app.route("/players")
+def players():
+    start = _page_start()
+
+    def render():
+        base, key_expr, _, _ = queries.READ_QUERIES["Players"]
+        df, _, has_next = db.fetch_page(base, key_expr, WEB_PAGE_SIZE, start=start)
+        next_start = int(df["PlayerID"].iloc[-1]) + 1 if has_next else None
+        return render_template("players.html", players=_records(df), next_start=next_start)
+    return cached_page({"player", "ranks", "player_stats"}, render)
+
+
+@app.route("/games")
+def games():
+    start = _page_start()
+
+    def render():
+        df, _, has_next = db.fetch_page(
+            "SELECT GameID, Title, Genre, MaxPlayers, ReleaseDate FROM game", "GameID", WEB_PAGE_SIZE, start=start
+        )
+        next_start = int(df["GameID"].iloc[-1]) + 1 if has_next else None
+        return render_template("games.html", games=_records(df), next_start=next_start)
+    return cached_page({"game"}, render)
+
+
+_SESSIONS = """
+    SELECT m.SessionID, g.Title AS GameTitle, m.StartTime, m.EndTime,
+           (SELECT COUNT(*) FROM playersession ps WHERE ps.SessionID = m.SessionID) AS PlayerCount
+    FROM multiplayersession m
+    JOIN game g ON g.GameID = m.GameID
+"""
+
+
+@app.route("/sessions")
+def sessions():
+    start = _page_start()
+
+    def render():
+        df, _, has_next = db.fetch_page(_SESSIONS, "m.SessionID", WEB_PAGE_SIZE, start=start)
+        next_start = int(df["SessionID"].iloc[-1]) + 1 if has_next else None
+        return render_template("sessions.html", sessions=_records(df), next_start=next_start)
+    return cached_page({"multiplayersession", "game", "playersession"}, render)
+
+
+@app.route("/leaderboard")
+def leaderboard_page():
+    def render():
+        return render_template("leaderboard.html", players=_records(leaderboard.top_players(WEB_LEADERBOARD_SIZE)))
+    return cached_page({"leaderboard"}, render)
+
+
+@app.route("/player/<int:player_id>")
+def player_detail(player_id):
+    def render():
+        player = db.execute_query("""
+            SELECT p.PlayerID, p.Username, p.Email, p.RegistrationDate, p.TotalScore,
+                   IFNULL(r.RankName, 'Unranked') AS RankName
+            FROM player p
+            LEFT JOIN ranks r ON r.RankID = p.RankID
+            WHERE p.PlayerID = %s
+        """, (player_id,), fetch=True)
+        if player.empty:
+            abort(404)
+        achievements = db.execute_query("""
+            SELECT a.Name, a.Description, pa.DateEarned
+            FROM playerachievement pa
+            JOIN achievement a ON a.AchievementID = pa.AchievementID
+            WHERE pa.PlayerID = %s
+            ORDER BY pa.DateEarned DESC
+        """, (player_id,), fetch=True)
+        items = db.execute_query("""
+            SELECT i.ItemName, i.ItemType, i.Rarity, pi.Quantity
+            FROM playeritem pi
+            JOIN item i ON i.ItemID = pi.ItemID
+            WHERE pi.PlayerID = %s
+            ORDER BY i.ItemName
+        """, (player_id,), fetch=True)
+        profile = profiles.player_profiles([player_id])
+        completion = float(profile["AchievementCompletionPercent"].iloc[0]) if not profile.empty else 0.0
+        session_count, best_score, last_played = player_stats.get(player_id)
+        return render_template(
+            "player_detail.html",
+            player=_records(player)[0],
+            achievements=_records(achievements),
+            items=_records(items),
+            completion=completion,
+            stats={"SessionCount": session_count, "BestScore": best_score, "LastPlayed": last_played},
+        )
+    return cached_page({"player", "ranks", "playerachievement", "achievement", "playeritem", "item",
+                        "player_stats"}, render)
+
+
+@app.route("/game/<int:game_id>")
+def game_detail(game_id):
+    def render():
+        game = db.execute_query(
+            "SELECT GameID, Title, Genre, MaxPlayers, ReleaseDate FROM game WHERE GameID = %s", (game_id,), fetch=True
+        )
+        if game.empty:
+            abort(404)
+        levels = db.execute_query(
+            "SELECT LevelNumber, Difficulty, Description FROM level WHERE GameID = %s ORDER BY LevelNumber",
+            (game_id,), fetch=True,
+        )
+        recent = db.execute_query(
+            f"{_SESSIONS} WHERE m.GameID = %s ORDER BY m.StartTime DESC LIMIT %s", (game_id, WEB_PAGE_SIZE), fetch=True
+        )
+        return render_template("game_detail.html", game=_records(game)[0], levels=_records(levels),
+                               sessions=_records(recent))
+    return cached_page({"game", "level", "multiplayersession", "playersession"}, render)
+
+
+@app.route("/session/<int:session_id>")
+def session_detail(session_id):
+    def render():
+        session = db.execute_query(f"{_SESSIONS} WHERE m.SessionID = %s", (session_id,), fetch=True)
+        if session.empty:
+            abort(404)
+        scores = db.execute_query("""
+            SELECT ps.PlayerID, p.Username, ps.Score, ps.Position
+            FROM playersession ps
+            JOIN player p ON p.PlayerID = ps.PlayerID
+            WHERE ps.SessionID = %s
+            ORDER BY ps.Position IS NULL, ps.Position, ps.Score DESC
+        """, (session_id,), fetch=True)
+        return render_template("session_detail.html", session=_records(session)[0], scores=_records(scores))
+    return cached_page({"multiplayersession", "game", "playersession", "player"}, render)
+
+
+@app.route("/health")
+def health():
+    # Not cached: load balancers should see the live pool
+    pool = db.get_pool().stats()
+    return {"status": "ok", "pool_in_use": pool["in_use"], "pool_size": pool["size"],
+            "pages_cached": pages.stats()["entries"]}
+
+
+if __name__ == "__main__":
+    app.run(host=os.getenv("WEB_HOST", "127.0.0.1"), port=int(os.getenv("WEB_PORT", "5000")), threaded=True)